@@ -0,0 +1,282 @@
+"""
+DomeExcelConverter
+Copyright (C) 2021 Josef Brandt, University of Gothenburg <josef.brandt@gu.se>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program, see COPYING.
+If not, see <https://www.gnu.org/licenses/>.
+
+Converts excel files without the user interface, using the settings stored in a conversion profile.
+Run from the repository root, e.g.:
+    python -m batchConvert profile.json "cruises/*.xlsx" --output-dir converted --workers 8
+"""
+
+
+import argparse
+import glob
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, Future
+from dataclasses import dataclass
+from typing import *
+
+from dataimport.conversionProfile import readProfile, applyProfile
+from tableConverter import TableConverter
+
+
+_convertedSuffix: str = "_converted"  # Added to output file names that would overwrite an input file
+
+
+@dataclass
+class ConversionResult:
+    """
+    Outcome of converting one excel file.
+    """
+    inputFile: str
+    outputFile: str
+    success: bool
+    message: str = ""
+    numParticles: int = 0
+    seconds: float = 0.0  # Wall time of the conversion
+
+    def getParticlesPerSecond(self) -> float:
+        return self.numParticles / self.seconds if self.seconds > 0 else 0.0
+
+
+def convertFile(inputFile: str, outputFile: str, profile: Dict[str, Any]) -> ConversionResult:
+    """
+    Converts a single excel file with the settings of the given profile.
+    Errors are caught and reported in the result, so that the other files of a batch can still be converted.
+    :param inputFile: The excel file to read
+    :param outputFile: The csv file to write
+    :param profile: The conversion profile dictionary
+    :return: ConversionResult
+    """
+    result: ConversionResult = ConversionResult(inputFile, outputFile, success=False)
+    startTime: float = time.perf_counter()
+    try:
+        converter: TableConverter = TableConverter()
+        applyProfile(profile, converter)
+        reader = converter.getXLSReader()
+        reader.readXlsFile(inputFile)
+        sheetNames: Union[str, List[str]] = profile.get("sheet", reader.getSheetNames()[0])
+        reader.setActiveSheets(sheetNames if isinstance(sheetNames, list) else [sheetNames])
+        result.numParticles = converter.exportToCSV(outputFile)
+        result.success = True
+    except Exception as e:
+        result.message = _getErrorMessage(e)
+    result.seconds = time.perf_counter() - startTime
+    return result
+
+
+def convertFiles(inputFiles: List[str], profile: Dict[str, Any], outputDir: Optional[str] = None,
+                 numWorkers: int = 1,
+                 resultCallback: Optional[Callable[[ConversionResult], None]] = None) -> List[ConversionResult]:
+    """
+    Converts the excel files with the settings of the given profile. With more than one worker, the files are
+    distributed over a pool of processes, one file per task. Reading excel files is single-threaded and CPU-bound,
+    so the throughput scales with the number of worker processes.
+    :param inputFiles: The excel files to convert
+    :param profile: The conversion profile dictionary
+    :param outputDir: The directory to write the csv files to, None for the directories of the input files
+    :param numWorkers: Number of worker processes. With 1, the files are converted in this process.
+    :param resultCallback: Optional function that is called with each result, in the order of the input files,
+    as soon as the result and all results before it are available.
+    :return: The results, in the order of the input files. Raises an AssertionError before converting anything,
+    if two input files would be written to the same csv file (see getOutputFileNames).
+    """
+    assert numWorkers >= 1, "At least one worker is required."
+    outputFiles: List[str] = getOutputFileNames(inputFiles, outputDir)
+    for directory in set(os.path.dirname(outputFile) for outputFile in outputFiles):
+        if directory != "":
+            os.makedirs(directory, exist_ok=True)
+    results: List[ConversionResult] = []
+    if numWorkers == 1 or len(inputFiles) == 1:
+        for inputFile, outputFile in zip(inputFiles, outputFiles):
+            results.append(convertFile(inputFile, outputFile, profile))
+            if resultCallback is not None:
+                resultCallback(results[-1])
+    else:
+        with ProcessPoolExecutor(max_workers=min(numWorkers, len(inputFiles))) as executor:
+            futures: List[Future] = [executor.submit(convertFile, inputFile, outputFile, profile)
+                                     for inputFile, outputFile in zip(inputFiles, outputFiles)]
+            for inputFile, outputFile, future in zip(inputFiles, outputFiles, futures):
+                try:
+                    result: ConversionResult = future.result()
+                except Exception as e:  # e.g., the worker process died
+                    result = ConversionResult(inputFile, outputFile, success=False, message=_getErrorMessage(e))
+                results.append(result)
+                if resultCallback is not None:
+                    resultCallback(result)
+    return results
+
+
+def getInputFiles(patterns: List[str]) -> List[str]:
+    """
+    Expands the given file names and glob patterns (shells on Windows do not expand them). Each file is returned once,
+    in the order of the patterns.
+    :param patterns: List of file names or glob patterns
+    :return: List of file names
+    """
+    inputFiles: List[str] = []
+    for pattern in patterns:
+        matches: List[str] = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for fname in matches:
+            if fname not in inputFiles:
+                inputFiles.append(fname)
+    return inputFiles
+
+
+def getOutputFileName(inputFile: str, outputDir: Optional[str] = None) -> str:
+    """
+    Returns the name of the csv file to write the conversion result of the input file to. If that is the input
+    file itself (a csv file converted in its directory), the name gets the suffix "_converted".
+    :param inputFile: The excel file name
+    :param outputDir: The directory to write to, None for the directory of the input file
+    :return: The csv file name
+    """
+    directory, baseName = os.path.split(inputFile)
+    if outputDir is not None:
+        directory = outputDir
+    outputFile: str = os.path.join(directory, os.path.splitext(baseName)[0] + ".csv")
+    if _normalizePath(outputFile) == _normalizePath(inputFile):
+        outputFile = os.path.join(directory, os.path.splitext(baseName)[0] + _convertedSuffix + ".csv")
+    return outputFile
+
+
+def getOutputFileNames(inputFiles: List[str], outputDir: Optional[str] = None) -> List[str]:
+    """
+    Returns the names of the csv files to write the conversion results of the input files to, see getOutputFileName.
+    Files with the same name from different directories would be written to the same file in the output directory.
+    Their results keep the directories below the common directory of all input files instead, e.g.,
+    "cruise1/s.xlsx" and "cruise2/s.xlsx" are written to "outputDir/cruise1/s.csv" and "outputDir/cruise2/s.csv".
+    Output files that would overwrite an input file get the suffix "_converted".
+    :param inputFiles: The excel files to convert
+    :param outputDir: The directory to write to, None for the directories of the input files
+    :return: The csv file names, in the order of the input files
+    """
+    outputFiles: List[str] = [getOutputFileName(inputFile, outputDir) for inputFile in inputFiles]
+    if outputDir is not None:
+        duplicates: Set[str] = _getDuplicateFiles(outputFiles)
+        if len(duplicates) > 0:
+            inputDirs: List[str] = [os.path.dirname(os.path.abspath(inputFile)) for inputFile in inputFiles]
+            commonDir: str = os.path.commonpath(inputDirs)
+            for i, (inputFile, inputDir) in enumerate(zip(inputFiles, inputDirs)):
+                if _normalizePath(outputFiles[i]) in duplicates:
+                    subDir: str = os.path.relpath(inputDir, commonDir)
+                    outputFiles[i] = getOutputFileName(inputFile, os.path.normpath(os.path.join(outputDir, subDir)))
+
+    normalizedInputs: Set[str] = {_normalizePath(inputFile) for inputFile in inputFiles}
+    for i, outputFile in enumerate(outputFiles):
+        if _normalizePath(outputFile) in normalizedInputs:  # e.g., "s.csv" is converted along with "s.xlsx"
+            outputFiles[i] = os.path.splitext(outputFile)[0] + _convertedSuffix + ".csv"
+        assert _normalizePath(outputFiles[i]) not in normalizedInputs, \
+            f"The output file {outputFiles[i]} would overwrite an input file."
+
+    duplicates = _getDuplicateFiles(outputFiles)
+    assert len(duplicates) == 0, f"Several input files would be written to the same output file: " \
+                                 f"{', '.join(sorted(duplicates))}"
+    return outputFiles
+
+
+def _getDuplicateFiles(fnames: List[str]) -> Set[str]:
+    """
+    Returns the (normalized) file names that occur more than once in the list.
+    """
+    counts: Counter = Counter(_normalizePath(fname) for fname in fnames)
+    return {fname for fname, count in counts.items() if count > 1}
+
+
+def _normalizePath(fname: str) -> str:
+    return os.path.normcase(os.path.abspath(fname))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Runs the batch conversion.
+    :param argv: The command line arguments, None to take them from sys.argv
+    :return: Exit status: 0 if all files were converted, 1 if any file failed, 2 if there was nothing to convert
+    or the files could not be converted (e.g., an unreadable profile).
+    """
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="python -m batchConvert",
+        description="Converts excel files into ICES DOME litter csv files, using the settings of a conversion profile.")
+    parser.add_argument("profile", help="Conversion profile (.json, or .yaml/.yml if PyYAML is installed)")
+    parser.add_argument("inputs", nargs="+", help="Excel files or glob patterns to convert")
+    parser.add_argument("--output-dir", default=None,
+                        help="Directory for the csv files, by default they are written next to the excel files")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of files to convert in parallel processes (default: 1)")
+    args = parser.parse_args(argv)
+
+    try:
+        profile: Dict[str, Any] = readProfile(args.profile)
+    except (AssertionError, OSError, ValueError) as e:
+        print(f"Could not read profile {args.profile}: {e}", file=sys.stderr)
+        return 2
+
+    inputFiles: List[str] = getInputFiles(args.inputs)
+    if len(inputFiles) == 0:
+        print("No input files found.", file=sys.stderr)
+        return 2
+    if args.output_dir is not None:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    if args.workers < 1:
+        print("The number of workers has to be at least 1.", file=sys.stderr)
+        return 2
+
+    startTime: float = time.perf_counter()
+    try:
+        results: List[ConversionResult] = convertFiles(inputFiles, profile, args.output_dir, args.workers,
+                                                       resultCallback=_printResult)
+    except AssertionError as e:
+        print(e, file=sys.stderr)
+        return 2
+    _printSummary(results, time.perf_counter() - startTime)
+    return 0 if all(result.success for result in results) else 1
+
+
+def _printResult(result: ConversionResult) -> None:
+    if result.success:
+        print(f"OK      {result.inputFile} -> {result.outputFile} ({result.numParticles} particles)")
+    else:
+        print(f"FAILED  {result.inputFile}: {result.message}")
+
+
+def _printSummary(results: List[ConversionResult], totalSeconds: float) -> None:
+    """
+    Prints the wall time and throughput of every file and of the entire batch.
+    """
+    nameWidth: int = max([len(result.inputFile) for result in results] + [4])
+    print(f"\n{'File':<{nameWidth}}  {'Status':<6}  {'Time (s)':>9}  {'Particles':>10}  {'Particles/s':>12}")
+    for result in results:
+        status: str = "OK" if result.success else "FAILED"
+        print(f"{result.inputFile:<{nameWidth}}  {status:<6}  {result.seconds:>9.2f}  {result.numParticles:>10}  "
+              f"{result.getParticlesPerSecond():>12.0f}")
+
+    numConverted: int = sum(result.success for result in results)
+    numParticles: int = sum(result.numParticles for result in results)
+    particlesPerSecond: float = numParticles / totalSeconds if totalSeconds > 0 else 0.0
+    print(f"{numConverted} of {len(results)} files converted in {totalSeconds:.2f} s "
+          f"({numParticles} particles, {particlesPerSecond:.0f} particles/s).")
+
+
+def _getErrorMessage(error: Exception) -> str:
+    return str(error) if isinstance(error, AssertionError) else f"{type(error).__name__}: {error}"
+
+
+if __name__ == '__main__':
+    sys.exit(main())
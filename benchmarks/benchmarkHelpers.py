@@ -0,0 +1,117 @@
+"""
+DomeExcelConverter
+Copyright (C) 2021 Josef Brandt, University of Gothenburg <josef.brandt@gu.se>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program, see COPYING.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+import os
+import sys
+import time
+from typing import *
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # to find the modules of the app
+
+from dataimport.domeCodes import DomeCode
+from tableConverter import TableConverter
+
+
+colors: List[str] = ["White", "Black", "Green", "Blue", "Brown", "Yellow", "Grey"]
+shapes: List[str] = ["Triangle", "Oval", "Rectangle", "Square", "Fiber", "Irregular", "Circular"]
+polymTypes: List[str] = ["PE", "PP", "PS", "PET", "PA"]
+
+
+def createParticleSheet(numParticles: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Creates a dataframe resembling a particle sheet of an instrument export, with numParticles rows.
+    Empty entries are included in the label columns.
+    """
+    rng: np.random.Generator = np.random.default_rng(seed)
+    sheet: pd.DataFrame = pd.DataFrame({"Size": rng.uniform(5, 1000, numParticles),
+                                        "Colour": rng.choice(colors + [None], numParticles),
+                                        "Shape": rng.choice(shapes + [None], numParticles),
+                                        "Polymer": rng.choice(polymTypes + [None], numParticles)})
+    return sheet
+
+
+def setUpTableConverter(converter: TableConverter) -> None:
+    """
+    Fills all metadata tables and the particle column mapping of the given converter, matching the columns
+    of the sheets created with createParticleSheet.
+    """
+    idTable = converter.getIDTable()
+    idTable.setReportingLab(DomeCode("TestLab", "TestCode"))
+    idTable.setCruise(DomeCode("Summer Cruise", "TestCode"))
+    idTable.setStation(DomeCode("TestStation", "TestCode"))
+    idTable.setShipCode(DomeCode("NCC1701", "TestCode"))
+
+    locTable = converter.getLocationTable()
+    locTable.setLongitude(11.276)
+    locTable.setLatitude(58.146)
+    locTable.setStationName(DomeCode("TestStationName", "TestCode"))
+
+    converter.getTimeTable().setSamplingDate(DomeCode("20210810", "TestCode"))
+
+    sampleTable = converter.getSampleTable()
+    sampleTable.setDType(DomeCode("Test-DTYPE", "TestCode"))
+    sampleTable.setMatrix(DomeCode("Sediment", "TestCode"))
+    sampleTable.setSampleNumber(DomeCode("2", "TestCode"))
+    sampleTable.setSampleArea(100)
+
+    analysisTable = converter.getAnalysisTable()
+    analysisTable.setLab(DomeCode("TestLab", "TestCode"))
+    analysisTable.setMethodAnalysis(DomeCode("µFTIR", "TestCode"))
+    analysisTable.setMethPretreat(DomeCode("Digestion", "TestCode"))
+    analysisTable.setMethodPurification(DomeCode("Filtration", "TestCode"))
+
+    monitoringTable = converter.getMonitoringTable()
+    monitoringTable.setMonitoringPurpose(DomeCode("TestPurpose", "TestCode"))
+    monitoringTable.setProgramme(DomeCode("TestProgram", "TestCode"))
+
+    partColumns = converter.getParticleColumnAssignmentsTable()
+    partColumns.setSizeColumn(DomeCode("Size", "FakeCode"))
+    partColumns.setColorColumn(DomeCode("Colour", "FakeCode"))
+    partColumns.setShapeColumn(DomeCode("Shape", "FakeCode"))
+    partColumns.setPolymTypeColumn(DomeCode("Polymer", "FakeCode"))
+    partColumns.setColorMapping({color: DomeCode(color, "TestCode") for color in colors})
+    partColumns.setShapeMapping({shape: DomeCode(shape, "TestCode") for shape in shapes})
+    partColumns.setTypeMapping({polymType: DomeCode(polymType, "TestCode") for polymType in polymTypes})
+
+
+def createBenchmarkConverter(sheet: pd.DataFrame, sheetName: str = "Particles") -> TableConverter:
+    """
+    Returns a completely set up TableConverter with the given sheet as active particle sheet.
+    """
+    converter: TableConverter = TableConverter()
+    reader = converter.getXLSReader()
+    reader.readDataFrame(sheet, sheetName)
+    reader.setActiveSheet(sheetName)
+    setUpTableConverter(converter)
+    return converter
+
+
+def timeIt(func: Callable[[], Any], repeats: int = 3) -> float:
+    """
+    Returns the best wall time (in seconds) out of the given number of repeats.
+    """
+    times: List[float] = []
+    for _ in range(repeats):
+        t0: float = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return min(times)
@@ -0,0 +1,43 @@
+"""
+DomeExcelConverter
+Copyright (C) 2021 Josef Brandt, University of Gothenburg <josef.brandt@gu.se>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program, see COPYING.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+# Measures how the compilation of the final dataframe scales with the number of particles.
+# Run from the repository root with:  python -m benchmarks.compilationBenchmark
+
+from typing import *
+
+from benchmarks.benchmarkHelpers import createParticleSheet, createBenchmarkConverter, timeIt
+
+
+def runCompilationBenchmark(particleNumbers: List[int] = [1_000, 10_000, 100_000, 1_000_000]) -> Dict[int, float]:
+    """
+    Compiles the final dataframe for sheets of the given numbers of particles.
+    :return: Dictionary of number of particles: runtime in seconds
+    """
+    runtimes: Dict[int, float] = {}
+    for numParticles in particleNumbers:
+        converter = createBenchmarkConverter(createParticleSheet(numParticles))
+        runtimes[numParticles] = timeIt(converter.createFinalDataFrame, repeats=1 if numParticles >= 1_000_000 else 3)
+    return runtimes
+
+
+if __name__ == '__main__':
+    print(f"{'Particles':>10} {'Runtime (s)':>12} {'µs/particle':>12}")
+    for numParticles, runtime in runCompilationBenchmark().items():
+        print(f"{numParticles:>10} {runtime:>12.3f} {runtime / numParticles * 1e6:>12.2f}")
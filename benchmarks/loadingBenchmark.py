@@ -0,0 +1,79 @@
+"""
+DomeExcelConverter
+Copyright (C) 2021 Josef Brandt, University of Gothenburg <josef.brandt@gu.se>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program, see COPYING.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+# Measures the runtime and memory of loading particle sheets from excel, csv and parquet files. The results per cell
+# are the calibration constants of the sheet estimates in dataimport/sheetEstimate.py.
+# Run from the repository root with:  python -m benchmarks.loadingBenchmark
+
+import os
+import tempfile
+import zipfile
+from typing import *
+
+from benchmarks.benchmarkHelpers import createParticleSheet, timeIt
+from dataimport.readXLS import XLSReader
+from dataimport.sheetCache import parquetAvailable
+
+
+def runLoadingBenchmark(particleNumbers: List[int] = [10_000, 50_000, 200_000]
+                        ) -> Dict[Tuple[str, int], Dict[str, float]]:
+    """
+    Writes sheets of the given numbers of particles to files and loads them with the XLSReader.
+    :return: Dictionary of (file format, number of particles): {"seconds": ..., "secondsPerCell": ...,
+    "bytesPerCell": ..., "xmlBytesPerCell": ...}, the latter only for excel files.
+    """
+    formats: List[str] = ["xlsx", "csv"] + (["parquet"] if parquetAvailable else [])
+    results: Dict[Tuple[str, int], Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmpDir:
+        for numParticles in particleNumbers:
+            sheet = createParticleSheet(numParticles)
+            numCells: int = sheet.size
+            for fileFormat in formats:
+                fname: str = os.path.join(tmpDir, f"particles{numParticles}.{fileFormat}")
+                if fileFormat == "xlsx":
+                    sheet.to_excel(fname, index=False, sheet_name="Particles")
+                elif fileFormat == "csv":
+                    sheet.to_csv(fname, index=False)
+                else:
+                    sheet.to_parquet(fname)
+
+                reader: XLSReader = XLSReader()
+
+                def load() -> None:
+                    reader.readXlsFile(fname)
+                    reader.setActiveSheet(reader.getSheetNames()[0])
+                    reader.loadActiveSheet()
+
+                seconds: float = timeIt(load, repeats=1)
+                loaded = reader.getActiveSheet()
+                result: Dict[str, float] = {"seconds": seconds, "secondsPerCell": seconds / numCells,
+                                            "bytesPerCell": loaded.memory_usage(index=False, deep=True).sum() / numCells}
+                if fileFormat == "xlsx":
+                    with zipfile.ZipFile(fname) as archive:
+                        result["xmlBytesPerCell"] = archive.getinfo("xl/worksheets/sheet1.xml").file_size / numCells
+                results[(fileFormat, numParticles)] = result
+    return results
+
+
+if __name__ == '__main__':
+    print(f"{'Format':>8} {'Particles':>10} {'Runtime (s)':>12} {'µs/cell':>8} {'Bytes/cell':>11} {'XML bytes/cell':>15}")
+    for (fileFormat, numParticles), result in runLoadingBenchmark().items():
+        xmlBytes: str = f"{result['xmlBytesPerCell']:.1f}" if "xmlBytesPerCell" in result else "-"
+        print(f"{fileFormat:>8} {numParticles:>10} {result['seconds']:>12.3f} {result['secondsPerCell']*1e6:>8.2f} "
+              f"{result['bytesPerCell']:>11.1f} {xmlBytes:>15}")
@@ -0,0 +1,47 @@
+"""
+DomeExcelConverter
+Copyright (C) 2021 Josef Brandt, University of Gothenburg <josef.brandt@gu.se>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program, see COPYING.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+# Measures the memory of particle sheets before and after compacting their dtypes.
+# Run from the repository root with:  python -m benchmarks.memoryBenchmark
+
+from typing import *
+
+from benchmarks.benchmarkHelpers import createParticleSheet, timeIt
+from dataimport.dtypeCompaction import MemoryReport, compactDataFrame
+
+
+def runMemoryBenchmark(particleNumbers: List[int] = [1_000, 10_000, 100_000, 1_000_000]
+                       ) -> Dict[int, Tuple[MemoryReport, float]]:
+    """
+    Compacts sheets of the given numbers of particles.
+    :return: Dictionary of number of particles: (MemoryReport, runtime of the compaction in seconds)
+    """
+    results: Dict[int, Tuple[MemoryReport, float]] = {}
+    for numParticles in particleNumbers:
+        sheet = createParticleSheet(numParticles)
+        report: MemoryReport = compactDataFrame(sheet)[1]
+        results[numParticles] = report, timeIt(lambda: compactDataFrame(sheet), repeats=1)
+    return results
+
+
+if __name__ == '__main__':
+    print(f"{'Particles':>10} {'Before (MB)':>12} {'After (MB)':>11} {'Ratio':>6} {'Runtime (s)':>12}")
+    for numParticles, (report, runtime) in runMemoryBenchmark().items():
+        print(f"{numParticles:>10} {report.bytesBefore / 1024**2:>12.1f} {report.bytesAfter / 1024**2:>11.1f} "
+              f"{report.bytesAfter / report.bytesBefore:>6.2f} {runtime:>12.3f}")
@@ -0,0 +1,61 @@
+"""
+DomeExcelConverter
+Copyright (C) 2021 Josef Brandt, University of Gothenburg <josef.brandt@gu.se>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program, see COPYING.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+# Measures the time until the first window of the wizard is shown, and the time of opening the largest code selector.
+# Run from the repository root with:  python -m benchmarks.startupBenchmark
+# (set QT_QPA_PLATFORM=offscreen to run it without a display)
+
+import os
+import sys
+import time
+from typing import *
+
+from PyQt6 import QtWidgets
+
+# Not taken from benchmarkHelpers, which imports the app modules before they can be timed
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # to find the modules of the app
+
+
+def runStartupBenchmark() -> Dict[str, float]:
+    """
+    Imports and shows the wizard. Must run in a fresh process, otherwise the modules are already imported.
+    :return: Dictionary of step name: runtime in seconds
+    """
+    results: Dict[str, float] = {}
+    t0: float = time.perf_counter()
+    app: QtWidgets.QApplication = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    from gui.wizard import ParticleUploadWizard
+    results["Import modules"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    wizard: ParticleUploadWizard = ParticleUploadWizard()
+    wizard.show()
+    app.processEvents()
+    results["Create and show wizard"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    wizard._idPage._btnShip.getSelector()  # The ship codes are the largest vocabulary
+    results["Create ship code selector"] = time.perf_counter() - t0
+    wizard.close()
+    return results
+
+
+if __name__ == '__main__':
+    for step, seconds in runStartupBenchmark().items():
+        print(f"{step:<28} {seconds:>8.3f} s")
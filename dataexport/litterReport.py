@@ -0,0 +1,115 @@
+"""
+DomeExcelConverter
+Copyright (C) 2021 Josef Brandt, University of Gothenburg <josef.brandt@gu.se>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program, see COPYING.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+from dataclasses import dataclass, field
+from typing import *
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class LitterReport:
+    """
+    The compiled litter report. The metadata (ID, location, time, sample, analysis and monitoring codes) is the same
+    for every particle, so it is stored once per column and only expanded to full length when the report is written
+    or converted to a dataframe.
+    """
+    metaData: Dict[str, Union[str, float, int]] = field(default_factory=dict)  # Column name: Value of all rows
+    particleColumns: pd.DataFrame = field(default_factory=pd.DataFrame)  # One row per particle
+
+    lastColumn: ClassVar[str] = "MPROG"  # Somehow it has to be the last column....
+
+    def getNumRows(self) -> int:
+        return len(self.particleColumns)
+
+    def getColumnNames(self) -> List[str]:
+        """
+        Returns the column names in the order they are written.
+        """
+        columns: List[str] = list(self.metaData.keys()) + list(self.particleColumns.columns)
+        if self.lastColumn in columns:
+            columns.remove(self.lastColumn)
+            columns.append(self.lastColumn)
+        return columns
+
+    def toDataFrame(self) -> pd.DataFrame:
+        """
+        Returns the full report as dataframe. The constant metadata columns are categoricals, i.e., they only hold
+        one single-byte code per row.
+        """
+        numRows: int = self.getNumRows()
+        codes: np.ndarray = np.zeros(numRows, dtype=np.int8)
+        metaColumns: Dict[str, pd.Categorical] = {colName: pd.Categorical.from_codes(codes, categories=[entry])
+                                                  for colName, entry in self.metaData.items()}
+        dframe: pd.DataFrame = pd.concat([pd.DataFrame(metaColumns, index=self.particleColumns.index),
+                                          self.particleColumns], axis=1)
+        return dframe[self.getColumnNames()]
+
+    def aggregated(self) -> 'LitterReport':
+        """
+        Returns a report in which identical particle rows are collapsed into one row, with the number of
+        collapsed particles as VALUE. As the metadata is the same for all rows, grouping by the per-particle
+        columns groups by all columns.
+        """
+        return LitterReport(self.metaData, aggregateParticleColumns(self.particleColumns))
+
+    def writeCSV(self, fname: str, chunkSize: int = 100_000) -> None:
+        """
+        Writes the report into a csv file. The metadata columns are expanded chunk by chunk, so that they never
+        exist in full length in memory.
+        :param fname: The file to write to
+        :param chunkSize: Number of rows to write at once.
+        """
+        with open(fname, "w", newline="", encoding="utf-8") as fp:
+            self.appendToCSV(fp, writeHeader=True, chunkSize=chunkSize)
+
+    def appendToCSV(self, fp: TextIO, writeHeader: bool, chunkSize: int = 100_000) -> None:
+        """
+        Appends the rows of the report to an opened csv file.
+        :param fp: The opened file handle
+        :param writeHeader: Whether or not to write the header line before the first row.
+        :param chunkSize: Number of rows to write at once.
+        """
+        columns: List[str] = self.getColumnNames()
+        if writeHeader:
+            pd.DataFrame(columns=columns).to_csv(fp, index=False)
+
+        for start in range(0, self.getNumRows(), chunkSize):
+            chunk: pd.DataFrame = self.particleColumns.iloc[start:start+chunkSize]
+            chunk = pd.concat([pd.DataFrame(self.metaData, index=chunk.index), chunk], axis=1)
+            chunk[columns].to_csv(fp, index=False, header=False)
+
+
+def aggregateParticleColumns(particleColumns: pd.DataFrame, valueColumn: str = "VALUE") -> pd.DataFrame:
+    """
+    Collapses identical rows of per-particle columns into one row each. The values of the collapsed rows are summed
+    up, i.e., for rows with a VALUE of "1" it becomes the number of particles. The rows keep the order of
+    their first occurrence. Can be applied again to combine already aggregated results.
+    :param particleColumns: The per-particle columns, including the value column
+    :param valueColumn: Name of the column holding the number of items per row
+    :return: DataFrame with the same columns
+    """
+    keyColumns: List[str] = [colName for colName in particleColumns.columns if colName != valueColumn]
+    values: pd.Series = pd.to_numeric(particleColumns[valueColumn])
+    counts: pd.Series = values.groupby([particleColumns[colName] for colName in keyColumns],
+                                       sort=False, dropna=False).sum()
+    aggregated: pd.DataFrame = counts.reset_index()
+    aggregated[valueColumn] = aggregated[valueColumn].astype(str)
+    return aggregated[list(particleColumns.columns)]
@@ -0,0 +1,166 @@
+"""
+DomeExcelConverter
+Copyright (C) 2021 Josef Brandt, University of Gothenburg <josef.brandt@gu.se>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program, see COPYING.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import bisect
+import re
+from typing import *
+
+import numpy as np
+
+from dataimport.domeCodes import DomeCode
+
+
+# Ranks of the ways a code can match a query, the lower the better
+rankExactCode: int = 0
+rankCodePrefix: int = 1
+rankDescrWordPrefix: int = 2
+rankSubstring: int = 3  # The query is contained in the code or the description
+rankLongDescrWordPrefix: int = 4
+rankLongDescrSubstring: int = 5
+_noMatch: int = 127
+
+_defaultLongDescr: str = DomeCode.__dataclass_fields__["long_descr"].default  # Placeholder, not indexed
+_wordPattern: re.Pattern = re.compile(r"\w+")
+
+
+class CodeSearchIndex:
+    """
+    Search index over a list of Dome codes, matching the code, the description and the long description.
+    Built once per vocabulary, a query then takes well below a millisecond, even for the thousands of ship codes:
+    Prefixes of codes and of the words of the descriptions are looked up by bisection in sorted word lists (which
+    serve as prefix tree), substrings of at least three characters in a trigram inverted index. All matches are
+    ranked (see the rank constants), codes of the same rank keep their order in the vocabulary.
+    """
+    def __init__(self, codes: Sequence[DomeCode]):
+        self._codes: Sequence[DomeCode] = codes
+        lowerCodes: List[str] = [code.code.lower() for code in codes]
+        lowerDescrs: List[str] = [code.descr.lower() for code in codes]
+        lowerLongDescrs: List[str] = ["" if code.long_descr == _defaultLongDescr else code.long_descr.lower()
+                                      for code in codes]
+
+        self._codePrefixes: _PrefixIndex = _PrefixIndex([[code] for code in lowerCodes])
+        self._descrWords: _PrefixIndex = _PrefixIndex([_wordPattern.findall(descr) for descr in lowerDescrs])
+        self._longDescrWords: _PrefixIndex = _PrefixIndex([_wordPattern.findall(descr) for descr in lowerLongDescrs])
+        self._shortTexts: _TrigramIndex = _TrigramIndex([f"{code}\n{descr}" for code, descr in zip(lowerCodes, lowerDescrs)])
+        self._longTexts: _TrigramIndex = _TrigramIndex(lowerLongDescrs)
+
+    def getCodes(self) -> Sequence[DomeCode]:
+        return self._codes
+
+    def search(self, query: str) -> np.ndarray:
+        """
+        Returns the positions of the codes matching the query, the best matches first. Queries shorter than three
+        characters match prefixes only, longer queries also match anywhere in the code and the descriptions.
+        :param query: The search string, case-insensitive. If empty, all codes are returned in their order.
+        :return: Array of positions in the code list
+        """
+        query = query.strip().lower()
+        if len(query) == 0:
+            return np.arange(len(self._codes))
+
+        ranks: np.ndarray = np.full(len(self._codes), _noMatch, dtype=np.int8)
+        if len(query) >= 3:  # The worst ranks are assigned first, better ranks overwrite them
+            ranks[self._longTexts.find(query)] = rankLongDescrSubstring
+        ranks[self._longDescrWords.findPrefix(query)] = rankLongDescrWordPrefix
+        if len(query) >= 3:
+            ranks[self._shortTexts.find(query)] = rankSubstring
+        ranks[self._descrWords.findPrefix(query)] = rankDescrWordPrefix
+        ranks[self._codePrefixes.findPrefix(query)] = rankCodePrefix
+        ranks[self._codePrefixes.findPrefix(query, exact=True)] = rankExactCode
+
+        hits: np.ndarray = np.flatnonzero(ranks != _noMatch)
+        return hits[np.argsort(ranks[hits], kind="stable")]
+
+    def searchCodes(self, query: str) -> List[DomeCode]:
+        """
+        Returns the codes matching the query, the best matches first (see search).
+        """
+        return [self._codes[i] for i in self.search(query)]
+
+
+class _PrefixIndex:
+    """
+    Sorted list of words with the positions of the codes they belong to, for finding all words with a given prefix.
+    """
+    def __init__(self, wordsPerCode: List[List[str]]):
+        pairs: List[Tuple[str, int]] = sorted((word, i) for i, words in enumerate(wordsPerCode) for word in set(words))
+        self._words: List[str] = [word for word, _ in pairs]
+        self._positions: np.ndarray = np.array([i for _, i in pairs], dtype=np.int64)
+
+    def findPrefix(self, prefix: str, exact: bool = False) -> np.ndarray:
+        """
+        Returns the code positions of words starting with the prefix (or equal to it, if exact).
+        """
+        start: int = bisect.bisect_left(self._words, prefix)
+        end: int = bisect.bisect_right(self._words, prefix) if exact else bisect.bisect_left(self._words, prefix + "\U0010ffff")
+        return self._positions[start:end]
+
+
+class _TrigramIndex:
+    """
+    Inverted index from the trigrams of texts to the positions of the texts containing them.
+    It is built vectorized on the unicode code points of the concatenated texts.
+    """
+    _separator: str = "\0"
+
+    def __init__(self, texts: List[str]):
+        self._texts: List[str] = texts
+        joined: str = self._separator.join(texts) + self._separator
+        keys, positions = self._getTrigrams(joined)
+        textStarts: np.ndarray = np.cumsum([0] + [len(text) + 1 for text in texts[:-1]])
+        textIndices: np.ndarray = np.searchsorted(textStarts, positions, side="right") - 1
+
+        order: np.ndarray = np.lexsort((textIndices, keys))
+        keys, textIndices = keys[order], textIndices[order]
+        isNew: np.ndarray = np.ones(len(keys), dtype=bool)  # Drops repeated trigrams of the same text
+        isNew[1:] = (keys[1:] != keys[:-1]) | (textIndices[1:] != textIndices[:-1])
+        keys, self._postings = keys[isNew], textIndices[isNew]
+        self._keys, self._keyStarts = np.unique(keys, return_index=True)
+        self._keyEnds: np.ndarray = np.append(self._keyStarts[1:], len(keys))
+
+    def find(self, query: str) -> np.ndarray:
+        """
+        Returns the positions of the texts containing the query, which needs at least three characters.
+        """
+        candidates: Union[np.ndarray, None] = None
+        for key in sorted(set(self._getTrigrams(query)[0].tolist())):
+            pos: int = int(np.searchsorted(self._keys, key))
+            if pos == len(self._keys) or self._keys[pos] != key:
+                return np.array([], dtype=np.int64)
+            posting: np.ndarray = self._postings[self._keyStarts[pos]:self._keyEnds[pos]]
+            candidates = posting if candidates is None else np.intersect1d(candidates, posting, assume_unique=True)
+        if len(query) > 3:  # All trigrams occur in the text, but maybe not in sequence
+            candidates = np.array([i for i in candidates if query in self._texts[i]], dtype=np.int64)
+        return candidates
+
+    @classmethod
+    def _getTrigrams(cls, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the trigrams of the text (three code points, each of up to 21 bits, packed into an integer) and their
+        start positions. Trigrams containing the separator are omitted.
+        """
+        chars: np.ndarray = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.int64)
+        if len(chars) < 3:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+        keys: np.ndarray = (chars[:-2] << 42) | (chars[1:-1] << 21) | chars[2:]
+        separator: int = ord(cls._separator)
+        valid: np.ndarray = (chars[:-2] != separator) & (chars[1:-1] != separator) & (chars[2:] != separator)
+        positions: np.ndarray = np.flatnonzero(valid)
+        return keys[positions], positions
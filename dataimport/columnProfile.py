@@ -0,0 +1,121 @@
+"""
+DomeExcelConverter
+Copyright (C) 2021 Josef Brandt, University of Gothenburg <josef.brandt@gu.se>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program, see COPYING.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+from dataclasses import dataclass
+from typing import *
+
+import numpy as np
+import pandas as pd
+
+
+# Maps the types inferred by pandas to the kinds of content shown to the user
+_inferredKinds: Dict[str, str] = {"integer": "numeric",
+                                  "floating": "numeric",
+                                  "mixed-integer-float": "numeric",
+                                  "decimal": "numeric",
+                                  "string": "text",
+                                  "boolean": "boolean",
+                                  "datetime": "date",
+                                  "datetime64": "date",
+                                  "date": "date",
+                                  "empty": "empty"}
+
+
+@dataclass(frozen=True)
+class ColumnProfile:
+    """
+    Summary of the contents of a sheet column, so that the user can see what a column holds before assigning it.
+    """
+    name: str
+    kind: str  # One of "numeric", "text", "boolean", "date", "mixed" or "empty"
+    numRows: int
+    numEmpty: int
+    numDistinct: int  # Number of distinct non-empty entries
+    numNumeric: int  # Number of entries that can be read as numbers
+    minimum: Optional[float] = None  # Smallest numeric entry, None if there is no numeric entry
+    maximum: Optional[float] = None
+    topEntries: Tuple[Tuple[str, int], ...] = ()  # Most frequent entries with their counts
+
+    def isNumeric(self) -> bool:
+        """
+        Returns whether all non-empty entries can be read as numbers (and at least one is present).
+        """
+        return self.numNumeric > 0 and self.numNumeric == self.numRows - self.numEmpty
+
+    def getSummary(self) -> str:
+        """
+        Returns a one-line description of the column contents.
+        """
+        summary: str = f"{self.kind}, {self.numEmpty} of {self.numRows} empty, {self.numDistinct} distinct"
+        if self.minimum is not None:
+            summary += f", {self.minimum:g} to {self.maximum:g}"
+        return summary
+
+    def getDetails(self) -> str:
+        """
+        Returns the details not contained in the summary, i.e., the most frequent entries.
+        """
+        details: List[str] = []
+        if self.kind == "mixed":
+            details.append(f"{self.numNumeric} numeric entries")
+        if len(self.topEntries) > 0:
+            details.append("most frequent: " + ", ".join(f"{entry} ({count})" for entry, count in self.topEntries))
+        return "; ".join(details)
+
+
+def profileColumn(name: str, column: pd.Series, numTopEntries: int = 5) -> ColumnProfile:
+    """
+    Creates the profile of a column. The statistics are computed vectorized, so that even large sheets are profiled
+    within a fraction of a second per column.
+    :param name: The column name
+    :param column: The column contents
+    :param numTopEntries: Number of most frequent entries to include
+    :return: ColumnProfile
+    """
+    isEmpty: np.ndarray = column.isna().to_numpy()
+    numEmpty: int = int(isEmpty.sum())
+    values: Union[pd.Series, pd.Index] = column.cat.categories if isinstance(column.dtype, pd.CategoricalDtype) \
+        else column
+    kind: str = _inferredKinds.get(pd.api.types.infer_dtype(values, skipna=True), "mixed")
+    if numEmpty == len(column):
+        kind = "empty"
+
+    if kind == "numeric":
+        numbers: pd.Series = column[~isEmpty].astype(float)
+    elif kind == "mixed":
+        entries: pd.Series = column[~isEmpty]
+        isNumber: pd.Series = entries.map(lambda entry: isinstance(entry, (int, float, np.number))
+                                          and not isinstance(entry, (bool, np.bool_)))
+        numbers = entries[isNumber].astype(float)
+    else:
+        numbers = pd.Series([], dtype=float)
+
+    minimum, maximum = None, None
+    if len(numbers) > 0:
+        minimum, maximum = float(numbers.min()), float(numbers.max())
+
+    counts: pd.Series = column[~isEmpty].value_counts()
+    counts = counts[counts > 0]  # Unused categories of categorical columns are counted with zero
+    topEntries: Tuple[Tuple[str, int], ...] = ()
+    if len(counts) < len(column) - numEmpty:  # Not listed for columns of unique entries, e.g., particle IDs
+        topEntries = tuple((str(entry), int(count)) for entry, count in counts.head(numTopEntries).items())
+
+    return ColumnProfile(name=name, kind=kind, numRows=len(column), numEmpty=numEmpty, numDistinct=len(counts),
+                         numNumeric=len(numbers), minimum=minimum, maximum=maximum, topEntries=topEntries)
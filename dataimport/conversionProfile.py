@@ -0,0 +1,203 @@
+"""
+DomeExcelConverter
+Copyright (C) 2021 Josef Brandt, University of Gothenburg <josef.brandt@gu.se>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program, see COPYING.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import json
+import os
+from typing import *
+
+from dataimport.domeCodes import DomeCode, getPolymerTypes, getShapeParams, getLitterProperties
+
+if TYPE_CHECKING:
+    from tableConverter import TableConverter
+
+
+# A conversion profile holds everything the wizard would otherwise ask for, so that workbooks can be converted without
+# the user interface. It is stored as json (or yaml, if PyYAML is installed) and looks like:
+# {
+#     "sheet": "p3 unprocessed",  -> optional, the first sheet of the workbook is used otherwise. A list of sheets
+#                                    with identical columns is merged into one particle source.
+#     "tables": {"RLABO": "ZZ99", "CRUIS": "Summer Cruise", "LATIT": 58.146, ...},  -> keys are the DOME field codes
+#     "particleColumns": {"size": "Size", "type": "Polymer", "shape": "Shape", "color": "Colour"},
+#     "codeMappings": {"type": {"PE": "..."}, "shape": {"Fibre": "..."}, "color": {"Red": "..."}},
+#     "aggregateCounts": false  -> optional
+# }
+particleColumnKeys: List[str] = ["size", "type", "shape", "color"]
+codeMappingKeys: List[str] = ["type", "shape", "color"]
+
+
+def readProfile(fname: str) -> Dict[str, Any]:
+    """
+    Reads a conversion profile from a json or yaml file.
+    :param fname: The profile file. Files ending with .yaml or .yml are read as yaml, all other files as json.
+    :return: The profile dictionary
+    """
+    with open(fname, encoding="utf-8") as fp:
+        if os.path.splitext(fname)[1].lower() in [".yaml", ".yml"]:
+            try:
+                import yaml
+            except ImportError:
+                raise AssertionError("Reading yaml profiles requires PyYAML, please install it or use a json profile.")
+            profile: Dict[str, Any] = yaml.safe_load(fp)
+        else:
+            profile = json.load(fp)
+
+    assert type(profile) == dict, f"The profile {fname} does not contain a mapping of settings."
+    return profile
+
+
+def writeProfile(profile: Dict[str, Any], fname: str) -> None:
+    """
+    Writes the conversion profile into a json file.
+    :param profile: The profile dictionary
+    :param fname: The file name to write to
+    :return:
+    """
+    with open(fname, "w", encoding="utf-8") as fp:
+        json.dump(profile, fp, indent=4, ensure_ascii=False)
+
+
+def applyProfile(profile: Dict[str, Any], converter: 'TableConverter') -> None:
+    """
+    Sets up the tables, particle column assignments and code mappings of the converter from the profile.
+    Setting the active sheet is left to the caller, as it requires a loaded excel file.
+    :param profile: The profile dictionary
+    :param converter: The TableConverter to set up
+    :return:
+    """
+    unknownKeys: Set[str] = set(profile.keys()) - {"sheet", "tables", "particleColumns", "codeMappings",
+                                                   "aggregateCounts"}
+    assert len(unknownKeys) == 0, f"Unknown entries in profile: {sorted(unknownKeys)}"
+
+    fieldSetters: Dict[str, Callable[[Any], None]] = _getFieldSetters(converter)
+    for fieldCode, value in profile.get("tables", {}).items():
+        assert fieldCode in fieldSetters, f"Unknown table field {fieldCode} in profile. " \
+                                          f"Available fields are: {list(fieldSetters.keys())}"
+        fieldSetters[fieldCode](DomeCode(str(value), fieldCode))
+
+    columnMapping = converter.getParticleColumnAssignmentsTable()
+    columnSetters: Dict[str, Callable[[Union[DomeCode, None]], None]] = {
+        "size": columnMapping.setSizeColumn,
+        "type": columnMapping.setPolymTypeColumn,
+        "shape": columnMapping.setShapeColumn,
+        "color": columnMapping.setColorColumn}
+    for key, columnName in profile.get("particleColumns", {}).items():
+        assert key in columnSetters, f"Unknown particle column {key} in profile, use one of {particleColumnKeys}"
+        columnSetters[key](DomeCode(str(columnName), "FakeCode"))
+
+    mappingSetters: Dict[str, Callable[[Dict[str, DomeCode]], None]] = {
+        "type": columnMapping.setTypeMapping,
+        "shape": columnMapping.setShapeMapping,
+        "color": columnMapping.setColorMapping}
+    vocabularies: Dict[str, Callable[[], Sequence[DomeCode]]] = {
+        "type": getPolymerTypes,
+        "shape": getShapeParams,
+        "color": getLitterProperties}
+    for key, mapping in profile.get("codeMappings", {}).items():
+        assert key in mappingSetters, f"Unknown code mapping {key} in profile, use one of {codeMappingKeys}"
+        mappingSetters[key](_getCodeMapping(mapping, vocabularies[key]()))
+
+    converter.setAggregateCounts(bool(profile.get("aggregateCounts", False)))
+
+
+def createProfile(converter: 'TableConverter') -> Dict[str, Any]:
+    """
+    Creates a conversion profile from a completely set up converter, e.g., for reusing the settings made in the wizard.
+    :param converter: The TableConverter to read the settings from
+    :return: The profile dictionary
+    """
+    tables: Dict[str, str] = {}
+    for table in [converter.getIDTable(), converter.getLocationTable(), converter.getTimeTable(),
+                  converter.getSampleTable(), converter.getAnalysisTable(), converter.getMonitoringTable()]:
+        tables.update({fieldCode: str(value) for fieldCode, value in table.getCorrectlySetCodes().items()})
+
+    columnMapping = converter.getParticleColumnAssignmentsTable()
+    columns: Dict[str, Union[DomeCode, None]] = {"size": columnMapping.getSizeColumn(),
+                                                 "type": columnMapping.getPolymTypeColumn(),
+                                                 "shape": columnMapping.getShapeColumn(),
+                                                 "color": columnMapping.getColorColumn()}
+    mappings: Dict[str, Dict[str, DomeCode]] = {"type": columnMapping.getTypeMapping(),
+                                                "shape": columnMapping.getShapeMapping(),
+                                                "color": columnMapping.getColorMapping()}
+
+    sheetNames: List[str] = converter.getXLSReader().getActiveSheetNames()
+    return {"sheet": sheetNames[0] if len(sheetNames) == 1 else sheetNames,
+            "tables": tables,
+            "particleColumns": {key: code.code for key, code in columns.items() if code is not None},
+            "codeMappings": {key: {label: code.code for label, code in mapping.items()}
+                             for key, mapping in mappings.items() if columns[key] is not None},
+            "aggregateCounts": converter.getAggregateCounts()}
+
+
+def _getFieldSetters(converter: 'TableConverter') -> Dict[str, Callable[[DomeCode], None]]:
+    """
+    Returns the setter functions of all table fields, with the DOME field codes as keys.
+    """
+    idTable, locTable = converter.getIDTable(), converter.getLocationTable()
+    timeTable, sampleTable = converter.getTimeTable(), converter.getSampleTable()
+    analysisTable, monitoringTable = converter.getAnalysisTable(), converter.getMonitoringTable()
+    return {"RLABO": idTable.setReportingLab,
+            "MYEAR": idTable.setYear,
+            "SHIPC": idTable.setShipCode,
+            "CRUIS": idTable.setCruise,
+            "STNNO": idTable.setStation,
+            "LATIT": lambda code: locTable.setLatitude(code.code),
+            "LONGI": lambda code: locTable.setLongitude(code.code),
+            "POSYS": locTable.setPosSystem,
+            "STATN": locTable.setStationName,
+            "WADEP": locTable.setWaterDepth,
+            "MNDEP": locTable.setMinDepth,
+            "MXDEP": locTable.setMaxDepth,
+            "SUBST": locTable.setSubstrateType,
+            "PRSUB": locTable.setPercentCovered,
+            "SDATE": timeTable.setSamplingDate,
+            "EDATE": timeTable.setSamplingEndDate,
+            "STIME": timeTable.setSamplingTime,
+            "ATIME": timeTable.setActualTime,
+            "ETIME": timeTable.setEndTime,
+            "DTYPE": sampleTable.setDType,
+            "SMPNO": sampleTable.setSampleNumber,
+            "MATRX": sampleTable.setMatrix,
+            "SAREA": lambda code: sampleTable.setSampleArea(code.code),
+            "NOAGG": sampleTable.setNumberAggregations,
+            "FINFL": sampleTable.setInfluencingFactors,
+            "SUBNO": sampleTable.setSubsampleNumber,
+            "ALABO": analysisTable.setLab,
+            "REFSK": analysisTable.setRefSource,
+            "METPT": analysisTable.setMethPretreat,
+            "METPS": analysisTable.setMethodPurification,
+            "METOA": analysisTable.setMethodAnalysis,
+            "LTREF": analysisTable.setLitterRefList,
+            "PURPM": monitoringTable.setMonitoringPurpose,
+            "MPROG": monitoringTable.setProgramme}
+
+
+def _getCodeMapping(mapping: Dict[str, str], vocabulary: Sequence[DomeCode]) -> Dict[str, DomeCode]:
+    """
+    Converts a mapping of excel entries to code strings into a mapping to the DomeCodes of the vocabulary.
+    :param mapping: Dictionary with excel entries as keys and code strings as values
+    :param vocabulary: The Dome Codes that may be mapped to
+    :return: Dictionary with excel entries as keys and DomeCodes as values
+    """
+    codesByName: Dict[str, DomeCode] = {code.code: code for code in vocabulary}
+    codeMapping: Dict[str, DomeCode] = {}
+    for label, codeName in mapping.items():
+        assert str(codeName) in codesByName, f"The code {codeName} (mapped from {label}) is not in the vocabulary."
+        codeMapping[str(label)] = codesByName[str(codeName)]
+    return codeMapping
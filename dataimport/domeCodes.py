@@ -23,13 +23,18 @@ from dataclasses import dataclass
 import numpy as np
 import os
 import csv
+import sqlite3
+import threading
+from logging import getLogger
+
+from dataimport.vocabularyStore import VocabularyStore
 
 if os.getcwd().endswith("tests"):
     os.chdir(os.path.dirname(os.getcwd()))  # switch to parent directory to be able to find code files
-codeFolder: str = os.path.join(os.getcwd(), "data", "DOME codes")
+codeFolder: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "DOME codes")
 
 
-@dataclass
+@dataclass(frozen=True)
 class DomeCode:
     """
     Dataclass for storing the info fields from the Dome Vocabulary.
@@ -39,106 +44,191 @@ class DomeCode:
     long_descr: str = "No further infos available"  # Long Description
 
 
-def getLitterSource() -> List[DomeCode]:
-    dframe: pd.DataFrame = pd.read_excel(os.path.join(codeFolder, "1382_LTSRC.xlsx"))
-    sources: List[DomeCode] = []
-    codes, desc, longdesc = dframe["Code"], dframe["Description"], dframe["LongDescription"]
-    for i in range(len(codes)):
-        name, descr, longdescr = codes[i], desc[i], longdesc[i]
-        if type(longdescr) == float:
-            assert np.isnan(longdescr)
-            longdescr = "No further details available."
+class VocabularyRegistry:
+    """
+    Process-wide store of the Dome vocabularies. Each code list is read only once, when it is first
+    requested. All callers then share the same immutable tuple of (frozen) DomeCodes.
+    The code lists are read from the compiled vocabulary store, if given, otherwise (or if the store can not be
+    used) they are parsed from their files.
+    Objects derived from the vocabularies (e.g., compiled lookup tables) can be kept here as well.
+    """
+    def __init__(self, store: Optional[VocabularyStore] = None):
+        self._entries: Dict[str, Any] = {}
+        self._lock: threading.RLock = threading.RLock()
+        self._store: Optional[VocabularyStore] = store
 
-        assert all([type(i) == str for i in [name, descr, longdescr]])
-        sources.append(DomeCode(name, descr, longdescr))
+    def setStore(self, store: Optional[VocabularyStore]) -> None:
+        """
+        Sets the vocabulary store to read from, None to parse the files directly. Loaded vocabularies are kept.
+        """
+        self._store = store
 
-    return sources
+    def getStore(self) -> Optional[VocabularyStore]:
+        return self._store
+
+    def getCodes(self, fileName: str) -> Tuple[DomeCode, ...]:
+        """
+        Returns the codes of the given vocabulary file.
+        :param fileName: filename relative to the domeCodeFolder, either a .csv or .xlsx file
+        :return: Tuple of DomeCodes
+        """
+        return self.getOrCreate(fileName, lambda: tuple(self._readCodes(fileName)))
+
+    def getOrCreate(self, key: str, factory: Callable[[], Any]) -> Any:
+        """
+        Returns the entry stored under the given key. It is created with the factory function on first access.
+        """
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = factory()
+            return self._entries[key]
+
+    def clear(self) -> None:
+        """
+        Removes all loaded vocabularies, they are read again on next access.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def _readCodes(self, fileName: str) -> List[DomeCode]:
+        if self._store is not None:
+            try:
+                return self._store.getCodes(fileName)
+            except (OSError, sqlite3.Error) as e:  # e.g., the store directory is not writable
+                getLogger("VocabularyRegistry").warning(f"Could not read {fileName} from the vocabulary store: {e}")
+        return createCodesFromFile(fileName)
+
+
+_registry: VocabularyRegistry = VocabularyRegistry(VocabularyStore(codeFolder))
+
+
+def getVocabularyRegistry() -> VocabularyRegistry:
+    return _registry
+
+
+def getLitterSource() -> Tuple[DomeCode, ...]:
+    return _registry.getCodes("1382_LTSRC.xlsx")
 
 
-def getPositioningSystems() -> List[DomeCode]:
-    return _createCodesFromCSV("Posys.csv")
+def getPositioningSystems() -> Tuple[DomeCode, ...]:
+    return _registry.getCodes("Posys.csv")
 
 
-def getLabCode() -> List[DomeCode]:
-    return _createCodesFromCSV("LabCode.csv")
+def getLabCode() -> Tuple[DomeCode, ...]:
+    return _registry.getCodes("LabCode.csv")
 
 
-def getShipCode() -> List[DomeCode]:
-    return _createCodesFromCSV("ShipCode.csv")
+def getShipCode() -> Tuple[DomeCode, ...]:
+    return _registry.getCodes("ShipCode.csv")
 
 
-def getSubstrateTypes() -> List[DomeCode]:
-    return _createCodesFromCSV("SubstrateTypes.csv")
+def getSubstrateTypes() -> Tuple[DomeCode, ...]:
+    return _registry.getCodes("SubstrateTypes.csv")
 
 
-def getSampleDTypes() -> List[DomeCode]:
-    return _createCodesFromCSV("SampleDType.csv")
+def getSampleDTypes() -> Tuple[DomeCode, ...]:
+    return _registry.getCodes("SampleDType.csv")
 
 
-def getInfluencingFactors() -> List[DomeCode]:
-    return _createCodesFromCSV("InflFactors.csv")
+def getInfluencingFactors() -> Tuple[DomeCode, ...]:
+    return _registry.getCodes("InflFactors.csv")
 
 
-def getMatrices() -> List[DomeCode]:
-    return _createCodesFromCSV("Matrix.csv")
+def getMatrices() -> Tuple[DomeCode, ...]:
+    return _registry.getCodes("Matrix.csv")
 
 
-def getRefSources() -> List[DomeCode]:
-    return _createCodesFromCSV("RefSources.csv")
+def getRefSources() -> Tuple[DomeCode, ...]:
+    return _registry.getCodes("RefSources.csv")
 
 
-def getPretreatments() -> List[DomeCode]:
-    return _createCodesFromCSV("MethPretreat.csv")
+def getPretreatments() -> Tuple[DomeCode, ...]:
+    return _registry.getCodes("MethPretreat.csv")
 
 
-def getPurifications() -> List[DomeCode]:
-    return _createCodesFromCSV("MethPurSep.csv")
+def getPurifications() -> Tuple[DomeCode, ...]:
+    return _registry.getCodes("MethPurSep.csv")
 
 
-def getAnalyses() -> List[DomeCode]:
-    return _createCodesFromCSV("MethAnalysis.csv")
+def getAnalyses() -> Tuple[DomeCode, ...]:
+    return _registry.getCodes("MethAnalysis.csv")
 
 
-def getLitterProperties() -> List[DomeCode]:
-    return _createCodesFromCSV("LitterProp.csv")
+def getLitterProperties() -> Tuple[DomeCode, ...]:
+    return _registry.getCodes("LitterProp.csv")
 
 
-def getPolymerTypes() -> List[DomeCode]:
-    return _createCodesFromCSV("PolymType.csv")
+def getPolymerTypes() -> Tuple[DomeCode, ...]:
+    return _registry.getCodes("PolymType.csv")
 
 
-def getShapeParams() -> List[DomeCode]:
-    return _createCodesFromCSV("ShapeParam.csv")
+def getShapeParams() -> Tuple[DomeCode, ...]:
+    return _registry.getCodes("ShapeParam.csv")
 
 
-def getLitterSizes() -> List[DomeCode]:
-    return _createCodesFromCSV("LitterSize.csv")
+def getLitterSizes() -> Tuple[DomeCode, ...]:
+    return _registry.getCodes("LitterSize.csv")
 
 
-def getMonitoringPurposes() -> List[DomeCode]:
-    return _createCodesFromCSV("MonitoringPurposes.csv")
+def getMonitoringPurposes() -> Tuple[DomeCode, ...]:
+    return _registry.getCodes("MonitoringPurposes.csv")
 
 
-def getMonitoringProgrammes() -> List[DomeCode]:
-    return _createCodesFromCSV("MonitoringProgrammes.csv")
+def getMonitoringProgrammes() -> Tuple[DomeCode, ...]:
+    return _registry.getCodes("MonitoringProgrammes.csv")
 
 
-def getLitterRefLists() -> List[DomeCode]:
-    return _createCodesFromCSV("LitterRef.csv")
+def getLitterRefLists() -> Tuple[DomeCode, ...]:
+    return _registry.getCodes("LitterRef.csv")
 
 
-def _createCodesFromCSV(csvFileName) -> List[DomeCode]:
+def createCodesFromFile(fileName: str, folder: str = codeFolder) -> List[DomeCode]:
+    """
+    Parses a vocabulary file.
+    :param fileName: filename relative to the folder, either a .csv or .xlsx file
+    :param folder: The folder of the vocabulary files
+    :return: List of DomeCodes
+    """
+    if fileName.endswith(".xlsx"):
+        return _createCodesFromXLSX(fileName, folder)
+    return _createCodesFromCSV(fileName, folder)
+
+
+def _createCodesFromCSV(csvFileName: str, folder: str = codeFolder) -> List[DomeCode]:
     """
     Reads a CSV file and returns a list of dome codes for each element.
     ASSUMES: First line is header
     ASSUMES: Of each other line: 2nd entry is the code, 3rd entry is the description
-    :param csvFileName: filename relative to the domeCodeFolder
+    :param csvFileName: filename relative to the folder
+    :param folder: The folder of the vocabulary files
     :return: List of DomeCodes
     """
-    with open(os.path.join(codeFolder, csvFileName)) as fp:
+    with open(os.path.join(folder, csvFileName)) as fp:
         csvReader = csv.reader(fp)
         codeList: List[DomeCode] = []
         for i, row in enumerate(csvReader):
             if i > 0:  # First line is header
                 codeList.append(DomeCode(row[1], row[2]))
     return codeList
+
+
+def _createCodesFromXLSX(xlsxFileName: str, folder: str = codeFolder) -> List[DomeCode]:
+    """
+    Reads an excel file with "Code", "Description" and "LongDescription" columns and returns a list of dome codes.
+    :param xlsxFileName: filename relative to the folder
+    :param folder: The folder of the vocabulary files
+    :return: List of DomeCodes
+    """
+    dframe: pd.DataFrame = pd.read_excel(os.path.join(folder, xlsxFileName))
+    sources: List[DomeCode] = []
+    codes, desc, longdesc = dframe["Code"], dframe["Description"], dframe["LongDescription"]
+    for i in range(len(codes)):
+        name, descr, longdescr = codes[i], desc[i], longdesc[i]
+        if type(longdescr) == float:
+            assert np.isnan(longdescr)
+            longdescr = "No further details available."
+
+        assert all([type(i) == str for i in [name, descr, longdescr]])
+        sources.append(DomeCode(name, descr, longdescr))
+
+    return sources
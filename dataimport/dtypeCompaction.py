@@ -0,0 +1,79 @@
+"""
+DomeExcelConverter
+Copyright (C) 2021 Josef Brandt, University of Gothenburg <josef.brandt@gu.se>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program, see COPYING.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+from dataclasses import dataclass
+from typing import *
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class MemoryReport:
+    """
+    Memory of a dataframe before and after compacting its dtypes, in bytes.
+    """
+    bytesBefore: int
+    bytesAfter: int
+
+    def __add__(self, other: 'MemoryReport') -> 'MemoryReport':
+        return MemoryReport(self.bytesBefore + other.bytesBefore, self.bytesAfter + other.bytesAfter)
+
+    def getSummary(self) -> str:
+        before, after = self.bytesBefore / 1024**2, self.bytesAfter / 1024**2
+        percentage: float = 100 * self.bytesAfter / self.bytesBefore if self.bytesBefore > 0 else 100.0
+        return f"{after:.1f} MB instead of {before:.1f} MB ({percentage:.0f} %)"
+
+
+def compactDataFrame(dframe: pd.DataFrame, maxCategoryFraction: float = 0.5) -> Tuple[pd.DataFrame, MemoryReport]:
+    """
+    Converts the columns of the dataframe to more compact dtypes, without changing any value:
+    String columns with few distinct entries become categoricals, integer columns are downcast to the smallest integer
+    type and float columns to float32, if all their values are exactly representable in it.
+    :param dframe: The dataframe to compact
+    :param maxCategoryFraction: String columns are made categorical if the number of distinct entries is at most
+    this fraction of the non-empty entries.
+    :return: Tuple (compacted dataframe, MemoryReport)
+    """
+    bytesBefore: int = int(dframe.memory_usage(deep=True).sum())
+    compacted: pd.DataFrame = pd.DataFrame({name: _compactColumn(dframe[name], maxCategoryFraction)
+                                            for name in dframe.columns}, index=dframe.index)
+    compacted.columns = dframe.columns
+    return compacted, MemoryReport(bytesBefore, int(compacted.memory_usage(deep=True).sum()))
+
+
+def _compactColumn(column: pd.Series, maxCategoryFraction: float) -> pd.Series:
+    """
+    Returns the compacted column, or the given column, if it can not be compacted.
+    """
+    if pd.api.types.is_bool_dtype(column.dtype):
+        return column
+    elif pd.api.types.is_integer_dtype(column.dtype):
+        return pd.to_numeric(column, downcast="integer")
+    elif column.dtype == np.float64:
+        values: np.ndarray = column.to_numpy()
+        singleValues: np.ndarray = values.astype(np.float32)
+        if np.array_equal(singleValues.astype(np.float64), values, equal_nan=True):
+            return pd.Series(singleValues, index=column.index, name=column.name)
+    elif column.dtype == object and pd.api.types.infer_dtype(column, skipna=True) == "string":
+        numEntries: int = int(column.notna().sum())
+        if column.nunique() <= maxCategoryFraction * numEntries:
+            return column.astype("category")
+    return column
@@ -18,27 +18,241 @@ If not, see <https://www.gnu.org/licenses/>.
 """
 
 
+import csv
+import os
+import tempfile
+import zipfile
 from typing import *
 
 import numpy as np
 import pandas as pd
+from pandas.io.parsers import TextParser
+
+from dataimport.columnProfile import ColumnProfile, profileColumn
+from dataimport.dtypeCompaction import MemoryReport, compactDataFrame
+from dataimport.sheetCache import SheetCache, parquetAvailable
+from dataimport.sheetEstimate import SheetEstimate, secondsPerCell, xmlBytesPerCell
+
+
+# File extensions of the supported non-excel formats. Such files contain one table, which is used as only sheet.
+textFileFormats: Dict[str, str] = {".csv": "csv", ".tsv": "tsv", ".txt": "tsv"}
+columnarFileFormats: Dict[str, str] = {".parquet": "parquet", ".feather": "feather"}
+supportedFileExtensions: List[str] = [".xlsx", ".xls"] + list(textFileFormats.keys()) + list(columnarFileFormats.keys())
 
 
 class XLSReader:
     """
     Class for reading excel files and associating excel contents to the database structures.
     """
+    _bytesPerCellEstimate: int = 100  # Memory of a parsed cell, used when a sheet is not in memory.
+    sourceColumnName: str = "Source Sheet"  # Column of merged sheets, holding the sheet each row comes from
+
     def __init__(self):
-        self._dataframes: Union[dict[str, pd.DataFrame], None] = None  # Dict with keys: Sheet names, values: data frames
+        self._dataframes: Union[dict[str, pd.DataFrame], None] = None  # Dict with keys: Sheet names, values: data frames of the sheets held in memory, least recently used first
+        self._sheetBytes: Dict[str, int] = {}  # Memory of the sheets in self._dataframes
+        self._maxMemoryMB: float = 2048.0  # Memory budget of the parsed sheets held in memory
+        self._spilledSheets: Dict[str, str] = {}  # Evicted sheets that were written to a spill file, with the file name
+        self._spillDir: Union[tempfile.TemporaryDirectory, None] = None
+        self._sheetNames: List[str] = []  # Names of all sheets in the currently loaded file
+        self._excelFile: Union[pd.ExcelFile, None] = None  # The opened excel file, sheets are parsed from it on demand
+        self._columnNames: Dict[str, List[str]] = {}  # Column names of sheets, read from their header rows
+        self._columnFrames: Dict[str, pd.DataFrame] = {}  # Individually read columns of sheets that are not parsed completely
+        self._uniqueEntries: Dict[Tuple[str, str], Dict[str, int]] = {}  # Counted entries per (sheet, column)
+        self._columnProfiles: Dict[str, Dict[str, ColumnProfile]] = {}  # Column profiles per sheet
         self._activeSheet: str = ""  # Name of the sheet to use for reading in particle data
+        self._fname: str = ""  # The currently loaded file
+        self._sheetCache: SheetCache = SheetCache()  # Persistent cache of parsed sheets
+        self._useCache: bool = False
+        self._fileHash: str = ""  # Content key of the currently loaded file, empty if the cache is not used
+        self._fileKey: str = ""  # Cache key of the currently loaded file, see _getCacheKey
+        self._fileFormat: str = "excel"  # Format of the currently loaded file, "excel", "dataframe" or one of the other file formats
+        self._csvOptions: Dict[str, str] = {}  # Delimiter and encoding of the currently loaded text file
+        self._compactSheets: bool = False  # Whether parsed sheets are converted to memory-compact dtypes
+        self._memoryReports: Dict[str, MemoryReport] = {}  # Memory before and after compaction per sheet
+        self._otherReaders: List['XLSReader'] = []  # Readers of further files, whose sheets can be merged
+        self._mergedSheets: Dict[str, List[Tuple['XLSReader', str, str]]] = {}  # Merged sheet name: (reader, sheet, label) of the merged parts
+
+    def setUseCache(self, useCache: bool) -> None:
+        """
+        Sets whether parsed sheets are stored in and read from the persistent sheet cache. Takes effect when the
+        next file is read.
+        :param useCache: If False, the cache is bypassed.
+        :return:
+        """
+        self._useCache = useCache
+
+    def getUseCache(self) -> bool:
+        return self._useCache
+
+    def setSheetCache(self, sheetCache: SheetCache) -> None:
+        self._sheetCache = sheetCache
+
+    def getSheetCache(self) -> SheetCache:
+        return self._sheetCache
+
+    def setMaxMemory(self, megaBytes: float) -> None:
+        """
+        Sets the memory budget of the parsed sheets. If the sheets held in memory exceed it, the least recently used
+        sheets (except the active one) are evicted. Evicted sheets are taken from the sheet cache or a temporary spill
+        file when they are accessed again, or parsed again if neither is available.
+        :param megaBytes: The budget in MB
+        :return:
+        """
+        assert megaBytes > 0, "The memory budget has to be positive."
+        self._maxMemoryMB = megaBytes
+        self._evictSheets()
+
+    def getMaxMemory(self) -> float:
+        return self._maxMemoryMB
+
+    def getMemoryUsageMB(self) -> float:
+        """
+        Returns the memory of the parsed sheets held in memory (not counting individually read columns).
+        """
+        if self._dataframes is None:
+            return 0.0
+        return sum(self._getSheetBytes(sheetName) for sheetName in self._dataframes.keys()) / 1024**2
+
+    def setCompactSheets(self, compact: bool) -> None:
+        """
+        Sets whether parsed sheets are converted to memory-compact dtypes (categorical string columns, downcast
+        numbers, see dtypeCompaction). The values are not changed by that. Takes effect for sheets parsed afterwards.
+        :param compact: If True, sheets are compacted.
+        :return:
+        """
+        self._compactSheets = compact
+        if self._fileHash:  # Compacted and uncompacted sheets are cached separately
+            self._fileKey = self._getCacheKey()
+            self._sheetCache.setSheetNames(self._fileKey, [sheetName for sheetName in self._sheetNames
+                                                           if sheetName not in self._mergedSheets.keys()])
+
+    def getCompactSheets(self) -> bool:
+        return self._compactSheets
+
+    def getMemoryReport(self, sheetName: str) -> Union[MemoryReport, None]:
+        """
+        Returns the memory of the (read columns of the) sheet before and after compaction, None if it was not compacted.
+        """
+        return self._memoryReports.get(sheetName)
 
     def readXlsFile(self, fname: str) -> None:
         """
-        Reads the indicated file.
-        :param fname: absolute path to xls file
+        Opens the indicated file. Only the sheet names are read from the workbook, each sheet is parsed when its
+        contents are first needed. If the file is in the sheet cache, the workbook is only opened when data
+        is needed that was not cached.
+        Csv, tsv, Parquet and Feather files are read with the native pandas readers instead. They contain only one
+        table, which is available as sheet named like the file.
+        :param fname: absolute path to xls file (or csv, tsv, parquet, feather file)
+        :return:
+        """
+        extension: str = os.path.splitext(fname)[1].lower()
+        fileFormat: str = textFileFormats.get(extension, columnarFileFormats.get(extension, "excel"))
+        if fileFormat == "excel":
+            self._openExcelFile(fname)
+        else:
+            assert os.path.exists(fname), f"The file {fname} does not exist."
+            if fileFormat in columnarFileFormats.values():
+                assert parquetAvailable, f"Reading {fileFormat} files requires pyarrow, please install it."
+            if self._excelFile is not None:
+                self._excelFile.close()
+            self._excelFile = None
+            self._fileHash = ""
+            self._fileKey = ""
+            self._csvOptions = _getTextFileOptions(fname, fileFormat) if fileFormat in textFileFormats.values() else {}
+            self._sheetNames = [os.path.splitext(os.path.basename(fname))[0]]
+
+        self._fileFormat = fileFormat
+        self._clearSheets()
+        self._fname = fname
+
+    def readDataFrame(self, dframe: pd.DataFrame, sheetName: str = "Sheet1") -> None:
+        """
+        Uses the given dataframe as only sheet, like a file containing one table that is already parsed. The sheet is
+        compacted (if enabled) and held in memory like a parsed sheet, e.g., for data that was not read from a file.
+        :param dframe: The sheet contents
+        :param sheetName: The name of the sheet
+        :return:
+        """
+        if self._excelFile is not None:
+            self._excelFile.close()
+        self._excelFile = None
+        self._fileHash = ""
+        self._fileKey = ""
+        self._csvOptions = {}
+        self._sheetNames = [sheetName]
+        self._fileFormat = "dataframe"
+        self._clearSheets()
+        self._fname = ""
+        self._storeSheet(sheetName, self._compact(sheetName, dframe))
+
+    def _clearSheets(self) -> None:
+        """
+        Removes all sheets and the data derived from them, when another file is read.
+        """
+        self._dataframes = {}
+        self._sheetBytes = {}
+        self._spilledSheets = {}
+        if self._spillDir is not None:
+            self._spillDir.cleanup()
+            self._spillDir = None
+        self._columnNames = {}
+        self._columnFrames = {}
+        self._uniqueEntries = {}
+        self._columnProfiles = {}
+        self._memoryReports = {}
+        self._otherReaders = []
+        self._mergedSheets = {}
+        self._activeSheet = ""
+
+    def readXlsFiles(self, fnames: List[str]) -> None:
+        """
+        Opens the indicated files, e.g., the files of one sample measured on several filters. The sheet names are
+        taken from the first file, the according sheets of all files can be merged with setActiveSheets.
+        :param fnames: paths to the files, see readXlsFile for the supported formats
         :return:
         """
-        self._dataframes = pd.read_excel(fname, sheet_name=None)
+        assert len(fnames) > 0, "No file to read given."
+        self.readXlsFile(fnames[0])
+        for fname in fnames[1:]:
+            reader: XLSReader = XLSReader()
+            reader.setUseCache(self._useCache)
+            reader.setSheetCache(self._sheetCache)
+            reader.readXlsFile(fname)
+            self._otherReaders.append(reader)
+
+    def getFileNames(self) -> List[str]:
+        """
+        Returns the names of the currently loaded files.
+        """
+        return [self._fname] + [reader._fname for reader in self._otherReaders]
+
+    def _openExcelFile(self, fname: str) -> None:
+        """
+        Opens the excel file, or takes its sheet names from the sheet cache.
+        """
+        self._fileHash = SheetCache.getFileKey(fname) if self._useCache else ""
+        fileKey: str = self._getCacheKey()
+        cachedSheetNames: Union[List[str], None] = self._sheetCache.getSheetNames(fileKey) if fileKey else None
+        excelFile: Union[pd.ExcelFile, None] = pd.ExcelFile(fname) if cachedSheetNames is None else None
+        if self._excelFile is not None:
+            self._excelFile.close()
+        self._excelFile = excelFile
+        if cachedSheetNames is not None:
+            self._sheetNames = cachedSheetNames
+        else:
+            self._sheetNames = list(excelFile.sheet_names)
+            if fileKey:
+                self._sheetCache.setSheetNames(fileKey, self._sheetNames)
+        self._fileKey = fileKey
+
+    def _getCacheKey(self) -> str:
+        """
+        Returns the key of the loaded file in the sheet cache, empty if the cache is not used. The cache stores the
+        sheets as they are held in memory, hence the key includes whether the sheets are compacted.
+        """
+        if not self._fileHash:
+            return ""
+        return self._fileHash + ("-compacted" if self._compactSheets else "")
 
     def setActiveSheet(self, sheetName: str) -> None:
         """
@@ -46,51 +260,775 @@ class XLSReader:
         :param sheetName:
         :return:
         """
-        assert sheetName in self._dataframes.keys(), f"Sheet {sheetName} not existent in available sheets: {self._dataframes.keys()}"
+        assert sheetName in self._sheetNames, f"Sheet {sheetName} not existent in available sheets: {self._sheetNames}"
         self._activeSheet = sheetName
+        self._evictSheets()  # The previously active sheet may be evicted now
+
+    def setActiveSheets(self, sheetNames: List[str]) -> None:
+        """
+        Merges the given sheets (of all loaded files) into one particle source and sets it as active sheet. The sheets
+        need to have the same columns. They are concatenated when their contents are first needed, a column named
+        XLSReader.sourceColumnName is added, holding the sheet (and file) each row comes from.
+        Files that contain only one sheet (e.g., csv files) contribute this sheet, regardless of its name.
+        :param sheetNames: Names of the sheets (of the first file) to merge
+        :return:
+        """
+        assert len(sheetNames) > 0, "No sheet to activate given."
+        for sheetName in sheetNames:
+            assert sheetName in self._sheetNames, f"Sheet {sheetName} not existent in available sheets: " \
+                                                  f"{self._sheetNames}"
+        parts: List[Tuple[XLSReader, str, str]] = self._getMergeParts(sheetNames)
+        if len(parts) == 1:
+            self.setActiveSheet(sheetNames[0])
+            return
+
+        columnNames: List[str] = self._getColumnNames(sheetNames[0])
+        for reader, sheetName, label in parts[1:]:
+            assert sorted(map(str, reader._getColumnNames(sheetName))) == sorted(map(str, columnNames)), \
+                f"The columns of {label} differ from the columns of {parts[0][2]}, the sheets can not be merged."
+        assert self.sourceColumnName not in columnNames, f"The sheets already contain a column {self.sourceColumnName}."
+
+        mergedName: str = "Merged: " + ", ".join(label for _, _, label in parts)
+        self._mergedSheets[mergedName] = parts
+        self._columnNames[mergedName] = list(columnNames) + [self.sourceColumnName]
+        if mergedName not in self._sheetNames:
+            self._sheetNames.append(mergedName)
+        self.setActiveSheet(mergedName)
+
+    def _getMergeParts(self, sheetNames: List[str]) -> List[Tuple['XLSReader', str, str]]:
+        """
+        Returns (reader, sheet name, label) of the sheets of all loaded files that are merged for the given sheets.
+        """
+        multipleFiles: bool = len(self._otherReaders) > 0
+        parts: List[Tuple[XLSReader, str, str]] = []
+        for reader in [self] + self._otherReaders:
+            fileLabel: str = f"{os.path.basename(reader._fname)}: " if multipleFiles else ""
+            readerSheets: List[str] = reader.getSheetNames()
+            for sheetName in sheetNames:
+                if sheetName not in readerSheets:
+                    assert len(readerSheets) == 1, f"Sheet {sheetName} not existent in file {reader._fname}."
+                    sheetName = readerSheets[0]
+                parts.append((reader, sheetName, fileLabel + sheetName))
+        return parts
+
+    def getActiveSheetName(self) -> str:
+        return self._activeSheet
+
+    def getActiveSheetNames(self) -> List[str]:
+        """
+        Returns the names of the sheets that form the active sheet: the merged sheet names (of the first file), if
+        sheets were merged with setActiveSheets, otherwise only the name of the active sheet.
+        """
+        if self._activeSheet in self._mergedSheets.keys():
+            return [sheetName for reader, sheetName, _ in self._mergedSheets[self._activeSheet] if reader is self]
+        return [self._activeSheet] if self._activeSheet else []
 
     def getSheetNames(self) -> List[str]:
         """
         Returns the sheet names of the currently loaded excel sheet.
         :return:
         """
-        return list(self._dataframes.keys())
+        return list(self._sheetNames)
 
     def getColumnsOfActiveSheet(self) -> List[str]:
         """
-        Returns the column names of the indicated sheet.
+        Returns the column names of the indicated sheet. If the sheet was not yet parsed, only its header row is read.
         :return: list of column names
         """
         assert self._activeSheet != "", "Active sheet not yet set!"
-        return list(self._dataframes[self._activeSheet].columns)
+        if self.isSheetLoaded(self._activeSheet):
+            return list(self._dataframes[self._activeSheet].columns)
+        return self._getColumnNames(self._activeSheet)
+
+    def _getColumnNames(self, sheetName: str) -> List[str]:
+        """
+        Returns the column names of the sheet, from the sheet cache or read from its header row.
+        """
+        if sheetName not in self._columnNames.keys():
+            columnNames: Union[List[str], None] = None
+            if self._fileKey:
+                columnNames = self._sheetCache.getColumnNames(self._fileKey, sheetName)
+            if columnNames is None:
+                columnNames = self._readColumnNames(sheetName)
+                if self._fileKey:
+                    self._sheetCache.setColumnNames(self._fileKey, sheetName, columnNames)
+            self._columnNames[sheetName] = columnNames
+        return list(self._columnNames[sheetName])
+
+    def getActiveSheetColumns(self, columns: List[str]) -> pd.DataFrame:
+        """
+        Returns the given columns of the active sheet. If the sheet was not yet parsed, only these columns are read
+        (with the same dtypes as when parsing the entire sheet) and kept for later calls.
+        :param columns: The names of the columns to return
+        :return: pd.DataFrame with the given columns
+        """
+        assert self._activeSheet != "", "Active sheet not yet set!"
+        if self.isSheetLoaded(self._activeSheet):
+            return self._dataframes[self._activeSheet][columns]
+
+        if self._activeSheet not in self._columnFrames.keys():
+            self._restoreSheet(self._activeSheet)
+            if self.isSheetLoaded(self._activeSheet):
+                return self._dataframes[self._activeSheet][columns]
+
+        readColumns: Union[pd.DataFrame, None] = self._columnFrames.get(self._activeSheet)
+        missingColumns: List[str] = [col for col in columns if readColumns is None or col not in readColumns.columns]
+        if len(missingColumns) > 0:
+            availableColumns: List[str] = self.getColumnsOfActiveSheet()
+            for colName in missingColumns:
+                assert colName in availableColumns, f"Column {colName} does not exist in sheet {self._activeSheet}."
+            newColumns: pd.DataFrame = self._compact(self._activeSheet, self._parseSheet(self._activeSheet,
+                                                                                         missingColumns))
+            readColumns = newColumns if readColumns is None else pd.concat([readColumns, newColumns], axis=1)
+            self._columnFrames[self._activeSheet] = readColumns
+            if self._fileKey:
+                self._sheetCache.putSheet(self._fileKey, self._activeSheet, readColumns, complete=False)
+        return readColumns[columns]
 
     def getUniqueColumnContentsAsString(self, colName: str) -> Set[str]:
         """
-        Returns a list of (string) entries of the indicated column (of the active sheet).
+        Returns a set of the (string) entries of the indicated column (of the active sheet).
         Empty entries in the dataframe are "nan", these are included as "Empty".
         Other numberic entries are skipped.
         :return:
         """
-        assert self._activeSheet != "", "Active sheet not yet set!"
-        uniqueEntries: List[str] = []
-        for entry in self._dataframes[self._activeSheet][colName]:
-            if type(entry) == float:
-                if np.isnan(np.float(entry)):
-                    uniqueEntries.append("Empty")
-            elif type(entry) == str:
-                uniqueEntries.append(entry)
+        return set(self.getUniqueColumnContentsWithCounts(colName).keys())
 
-        return set(uniqueEntries)
+    def getUniqueColumnContentsWithCounts(self, colName: str) -> Dict[str, int]:
+        """
+        Returns the (string) entries of the indicated column (of the active sheet) with their number of occurrences,
+        ordered from the most to the least frequent entry (equally frequent entries in order of appearance).
+        Empty entries are counted as "Empty", other numeric entries are skipped.
+        The result is cached per sheet and column until another file is read.
+        :return: Dictionary with entries as keys and their counts as values
+        """
+        assert self._activeSheet != "", "Active sheet not yet set!"
+        cacheKey: Tuple[str, str] = (self._activeSheet, colName)
+        if cacheKey not in self._uniqueEntries.keys():
+            column: pd.Series = self.getActiveSheetColumns([colName])[colName]
+            codes, uniques = pd.factorize(column)
+            counts: np.ndarray = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            entryCounts: Dict[str, int] = {}
+            for entry, count in zip(uniques, counts):
+                if type(entry) == str:
+                    entryCounts[entry] = int(count)
+            numEmpty: int = int(np.count_nonzero(codes < 0))
+            if numEmpty > 0:
+                entryCounts["Empty"] = entryCounts.get("Empty", 0) + numEmpty
+            self._uniqueEntries[cacheKey] = dict(sorted(entryCounts.items(), key=lambda item: -item[1]))
+        return dict(self._uniqueEntries[cacheKey])
 
     def getSheet(self, sheetName: str) -> pd.DataFrame:
         """
-        Returns the dataframe of the given sheet name.
+        Returns the dataframe of the given sheet name. The sheet is parsed on first access and kept for later calls.
         :param sheetName: Name of the datasheet
         :return: pd.DataFrame
         """
-        assert sheetName in self._dataframes.keys(), f"Sheet {sheetName} does not exist in opened file."
-        return self._dataframes[sheetName]
+        assert sheetName in self._sheetNames, f"Sheet {sheetName} does not exist in opened file."
+        if sheetName in self._dataframes.keys():
+            sheet: pd.DataFrame = self._dataframes.pop(sheetName)  # Reinserted as most recently used sheet
+            self._dataframes[sheetName] = sheet
+            return sheet
+
+        restoredSheet: Union[pd.DataFrame, None] = self._restoreSheet(sheetName)
+        if restoredSheet is not None:
+            return restoredSheet  # Returned directly, as it may have been evicted again if exceeding the budget
+
+        self._columnFrames.pop(sheetName, None)
+        self._memoryReports.pop(sheetName, None)
+        sheet = self._compact(sheetName, self._parseSheet(sheetName))
+        if self._fileKey:
+            self._sheetCache.putSheet(self._fileKey, sheetName, sheet, complete=True)
+        self._storeSheet(sheetName, sheet)
+        return sheet
 
     def getActiveSheet(self) -> pd.DataFrame:
-        assert self._activeSheet in self._dataframes.keys()
-        return self._dataframes[self._activeSheet]
+        assert self._activeSheet != "", "Active sheet not yet set!"
+        return self.getSheet(self._activeSheet)
+
+    def loadActiveSheet(self, progressCallback: Optional[Callable[[int], bool]] = None,
+                        progressInterval: int = 1000) -> bool:
+        """
+        Parses the entire active sheet (if not yet in memory), so that all later accesses are served from memory.
+        Excel sheets are read row by row and the progress is reported to the callback, which can cancel the loading.
+        :param progressCallback: Called with the number of rows read so far. Loading is cancelled if it returns False.
+        :param progressInterval: Number of rows between calls of the progress callback
+        :return: True, if the sheet was loaded, False if loading was cancelled.
+        """
+        assert self._activeSheet != "", "Active sheet not yet set!"
+        if not self.isSheetLoaded(self._activeSheet):
+            self._restoreSheet(self._activeSheet)
+        if self.isSheetLoaded(self._activeSheet):
+            return True
+
+        if self._activeSheet in self._mergedSheets.keys():
+            sheet: Union[pd.DataFrame, None] = self._parseMergedSheet(self._activeSheet, None, progressCallback,
+                                                                      progressInterval)
+        elif self._fileFormat != "excel" or self._getExcelFile().engine != "openpyxl":
+            self.getActiveSheet()
+            return True
+        else:
+            sheet = _readExcelSheet(self._fname, self._activeSheet, progressCallback, progressInterval)
+        if sheet is None:
+            return False
+
+        self._columnFrames.pop(self._activeSheet, None)
+        self._memoryReports.pop(self._activeSheet, None)
+        sheet = self._compact(self._activeSheet, sheet)
+        if self._fileKey:
+            self._sheetCache.putSheet(self._fileKey, self._activeSheet, sheet, complete=True)
+        self._storeSheet(self._activeSheet, sheet)
+        return True
+
+    def profileActiveSheet(self, numTopEntries: int = 5) -> Dict[str, ColumnProfile]:
+        """
+        Computes the profiles of all columns of the active sheet, parsing it if not yet in memory. The profiles are
+        stored, so that they are computed only once per sheet.
+        :param numTopEntries: Number of most frequent entries to include in each profile
+        :return: Dictionary with column names as keys and ColumnProfiles as values
+        """
+        assert self._activeSheet != "", "Active sheet not yet set!"
+        if self._activeSheet not in self._columnProfiles.keys():
+            sheet: pd.DataFrame = self.getActiveSheet()
+            self._columnProfiles[self._activeSheet] = {str(name): profileColumn(str(name), sheet[name], numTopEntries)
+                                                       for name in sheet.columns}
+        return self._columnProfiles[self._activeSheet]
+
+    def getColumnProfiles(self) -> Dict[str, ColumnProfile]:
+        """
+        Returns the column profiles of the active sheet, or an empty dictionary, if it was not yet profiled.
+        """
+        return self._columnProfiles.get(self._activeSheet, {})
+
+    def isSheetLoaded(self, sheetName: str) -> bool:
+        """
+        Returns whether the sheet was already parsed and is held in memory.
+        """
+        return self._dataframes is not None and sheetName in self._dataframes.keys()
+
+    def _getExcelFile(self) -> pd.ExcelFile:
+        """
+        Returns the opened excel file. It is opened here, if the sheet names were taken from the sheet cache.
+        """
+        if self._excelFile is None:
+            self._excelFile = pd.ExcelFile(self._fname)
+        return self._excelFile
+
+    def _parseSheet(self, sheetName: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Parses the sheet from the file.
+        :param sheetName: The sheet to parse
+        :param columns: The columns to read, None for all columns. Only these columns are parsed.
+        :return: pd.DataFrame
+        """
+        if sheetName in self._mergedSheets.keys():
+            dframe: pd.DataFrame = self._parseMergedSheet(sheetName, columns)
+        elif self._fileFormat == "excel":
+            dframe = self._getExcelFile().parse(sheetName, usecols=columns)
+        elif self._fileFormat == "parquet":
+            dframe = pd.read_parquet(self._fname, columns=columns)
+        elif self._fileFormat == "feather":
+            dframe = pd.read_feather(self._fname, columns=columns)
+        else:
+            dframe = pd.read_csv(self._fname, usecols=columns, **self._csvOptions)
+        return dframe
+
+    def _parseMergedSheet(self, sheetName: str, columns: Optional[List[str]] = None,
+                          progressCallback: Optional[Callable[[int], bool]] = None,
+                          progressInterval: int = 1000) -> Union[pd.DataFrame, None]:
+        """
+        Parses the parts of a merged sheet and concatenates them once, adding the source sheet column.
+        :param sheetName: The merged sheet to parse
+        :param columns: The columns to read, None for all columns.
+        :param progressCallback: Called with the number of rows read so far, when reading entire excel sheets.
+        Parsing is cancelled if it returns False.
+        :param progressInterval: Number of rows between calls of the progress callback
+        :return: pd.DataFrame, None if parsing was cancelled.
+        """
+        partColumns: Optional[List[str]] = None
+        if columns is not None:
+            partColumns = [col for col in columns if col != self.sourceColumnName]
+        frames: List[pd.DataFrame] = []
+        numRowsBefore: int = 0
+        for reader, partName, _ in self._mergedSheets[sheetName]:
+            if progressCallback is not None and partColumns is None and reader._fileFormat == "excel" \
+                    and reader._getExcelFile().engine == "openpyxl":
+                frame: Union[pd.DataFrame, None] = _readExcelSheet(
+                    reader._fname, partName, lambda numRows: progressCallback(numRowsBefore + numRows),
+                    progressInterval)
+                if frame is None:
+                    return None
+            else:
+                frame = reader._parseSheet(partName, partColumns)
+            frames.append(frame)
+            numRowsBefore += len(frame)
+
+        dframe: pd.DataFrame = pd.concat(frames, ignore_index=True, sort=False, copy=False)
+        if columns is None or self.sourceColumnName in columns:
+            dframe[self.sourceColumnName] = self._getSourceColumn(sheetName, [len(frame) for frame in frames])
+        return dframe if columns is None else dframe[columns]
+
+    def _getSourceColumn(self, sheetName: str, partLengths: List[int], start: int = 0) -> pd.Categorical:
+        """
+        Returns the source sheet column of a merged sheet, as categorical of the part labels.
+        :param sheetName: The merged sheet
+        :param partLengths: Number of rows of each part
+        :param start: Index of the first part
+        """
+        labels: List[str] = [label for _, _, label in self._mergedSheets[sheetName]]
+        codes: np.ndarray = np.repeat(np.arange(start, start + len(partLengths), dtype=np.int32), partLengths)
+        return pd.Categorical.from_codes(codes, categories=labels)
+
+    def _restoreSheet(self, sheetName: str) -> Union[pd.DataFrame, None]:
+        """
+        Takes the sheet back into memory from its spill file, if it was evicted, or from the sheet cache.
+        :return: The restored sheet, None if the complete sheet is neither spilled nor cached.
+        """
+        if sheetName in self._spilledSheets.keys():
+            sheet: pd.DataFrame = pd.read_pickle(self._spilledSheets[sheetName])
+            self._storeSheet(sheetName, sheet)
+            return sheet
+        elif self._fileKey:
+            return self._loadFromCache(sheetName)
+        return None
+
+    def _loadFromCache(self, sheetName: str) -> Union[pd.DataFrame, None]:
+        """
+        Takes the sheet (or the columns of it read so far) from the sheet cache, if available.
+        :return: The sheet, if it is stored completely in the cache, otherwise None
+        """
+        cachedSheet: Union[pd.DataFrame, None] = self._sheetCache.getSheet(self._fileKey, sheetName)
+        if cachedSheet is not None:
+            cachedSheet = self._compact(sheetName, cachedSheet)
+            if self._sheetCache.getStoredColumns(self._fileKey, sheetName)[1]:
+                self._storeSheet(sheetName, cachedSheet)
+                return cachedSheet
+            else:
+                self._columnFrames[sheetName] = cachedSheet
+        return None
+
+    def _storeSheet(self, sheetName: str, sheet: pd.DataFrame) -> None:
+        """
+        Keeps the parsed sheet in memory as most recently used sheet and evicts other sheets, if the memory budget
+        is exceeded.
+        """
+        self._dataframes.pop(sheetName, None)
+        self._dataframes[sheetName] = sheet
+        self._sheetBytes[sheetName] = int(sheet.memory_usage(deep=True).sum())
+        self._evictSheets()
+
+    def _evictSheets(self) -> None:
+        """
+        Removes the least recently used sheets from memory, until the memory budget is met. The active sheet is kept
+        in any case. Evicted sheets are written to a spill file, unless they are stored in the sheet cache.
+        """
+        if self._dataframes is None:
+            return
+        totalBytes: int = sum(self._getSheetBytes(sheetName) for sheetName in self._dataframes.keys())
+        for sheetName in list(self._dataframes.keys()):
+            if totalBytes <= self._maxMemoryMB * 1024**2:
+                break
+            if sheetName != self._activeSheet:
+                self._spillSheet(sheetName)
+                totalBytes -= self._getSheetBytes(sheetName)
+                del self._dataframes[sheetName]
+                del self._sheetBytes[sheetName]
+
+    def _spillSheet(self, sheetName: str) -> None:
+        """
+        Writes the sheet to a temporary spill file, so that it can be restored faster than parsing it again.
+        """
+        if sheetName in self._spilledSheets.keys():
+            return  # Spilled before and not changed since
+        if self._fileKey and self._sheetCache.getStoredColumns(self._fileKey, sheetName)[1]:
+            return  # Restored from the sheet cache
+        if self._spillDir is None:
+            self._spillDir = tempfile.TemporaryDirectory(prefix="domeConverterSpill")
+        fname: str = os.path.join(self._spillDir.name, f"sheet{self._sheetNames.index(sheetName)}.pkl")
+        self._dataframes[sheetName].to_pickle(fname)
+        self._spilledSheets[sheetName] = fname
+
+    def _getSheetBytes(self, sheetName: str) -> int:
+        if sheetName not in self._sheetBytes.keys():
+            self._sheetBytes[sheetName] = int(self._dataframes[sheetName].memory_usage(deep=True).sum())
+        return self._sheetBytes[sheetName]
+
+    def _compact(self, sheetName: str, dframe: pd.DataFrame) -> pd.DataFrame:
+        """
+        Compacts the dtypes of the parsed (part of the) sheet, if enabled, and adds up its memory report.
+        """
+        if not self._compactSheets:
+            return dframe
+        compacted, report = compactDataFrame(dframe)
+        if sheetName in self._memoryReports.keys():
+            report = self._memoryReports[sheetName] + report
+        self._memoryReports[sheetName] = report
+        return compacted
+
+    def _readColumnNames(self, sheetName: str) -> List[str]:
+        """
+        Reads the column names from the header row of the sheet, without parsing the remaining rows.
+        """
+        if self._fileFormat in textFileFormats.values():
+            return list(pd.read_csv(self._fname, nrows=0, **self._csvOptions).columns)
+        elif self._fileFormat in columnarFileFormats.values():
+            import pyarrow.parquet
+            import pyarrow.ipc
+            if self._fileFormat == "parquet":
+                return list(pyarrow.parquet.read_schema(self._fname).names)
+            return list(pyarrow.ipc.open_file(self._fname).schema.names)
+
+        excelFile: pd.ExcelFile = self._getExcelFile()
+        if excelFile.engine == "openpyxl":
+            worksheet = excelFile.book[sheetName]
+            dimensions: Optional[Tuple[int, int]] = _getDeclaredDimensions(worksheet)
+            worksheet.reset_dimensions()
+            rows: Iterator[tuple] = worksheet.iter_rows(max_row=1, values_only=True)
+            return _getColumnNamesOfHeader(next(rows, ()), None if dimensions is None else dimensions[1])
+        else:
+            return list(excelFile.parse(sheetName, nrows=0).columns)
+
+    def _getSheetInMemory(self, columns: Optional[List[str]] = None) -> Union[pd.DataFrame, None]:
+        """
+        Returns the given columns of the active sheet, if they are held in memory (or in the sheet cache),
+        otherwise None.
+        :param columns: The columns to return, None for all columns.
+        """
+        if not self.isSheetLoaded(self._activeSheet) and self._activeSheet not in self._columnFrames.keys():
+            self._restoreSheet(self._activeSheet)
+
+        if self.isSheetLoaded(self._activeSheet):
+            sheet: pd.DataFrame = self._dataframes[self._activeSheet]
+            return sheet if columns is None else sheet[columns]
+
+        readColumns: Union[pd.DataFrame, None] = self._columnFrames.get(self._activeSheet)
+        if columns is not None and readColumns is not None and all(col in readColumns.columns for col in columns):
+            return readColumns[columns]
+        return None
+
+    def iterActiveSheetChunks(self, chunkSize: int, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Yields the rows of the active sheet in chunks. The row index continues across the chunks.
+        If the columns were not yet read, they are streamed from the excel (or text) file, so that only one chunk at a
+        time is held in memory.
+        :param chunkSize: Maximum number of rows per chunk
+        :param columns: The columns to return, None for all columns.
+        :return: Iterator over the chunk dataframes
+        """
+        assert self._activeSheet != "", "Active sheet not yet set!"
+        sheet: Union[pd.DataFrame, None] = self._getSheetInMemory(columns)
+        if sheet is not None:
+            for start in range(0, len(sheet), chunkSize):
+                yield sheet.iloc[start:start+chunkSize]
+        else:
+            yield from self._iterSheetChunks(self._activeSheet, chunkSize, columns)
+
+    def _iterSheetChunks(self, sheetName: str, chunkSize: int,
+                         columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Streams the rows of the sheet from the file in chunks, see iterActiveSheetChunks. The parts of merged sheets
+        are streamed one after the other.
+        """
+        if sheetName in self._mergedSheets.keys():
+            partColumns: Optional[List[str]] = None
+            if columns is not None:
+                partColumns = [col for col in columns if col != self.sourceColumnName]
+            numRowsBefore: int = 0
+            for partIndex, (reader, partName, _) in enumerate(self._mergedSheets[sheetName]):
+                for chunk in reader._iterSheetChunks(partName, chunkSize, partColumns):
+                    chunk = chunk.set_axis(pd.RangeIndex(numRowsBefore, numRowsBefore + len(chunk)), axis=0)
+                    if columns is None or self.sourceColumnName in columns:
+                        chunk[self.sourceColumnName] = self._getSourceColumn(sheetName, [len(chunk)], partIndex)
+                    numRowsBefore += len(chunk)
+                    yield chunk if columns is None else chunk[columns]
+        elif self._fileFormat in columnarFileFormats.values():
+            sheet: pd.DataFrame = self._parseSheet(sheetName, columns)  # Columnar files read fast enough per column
+            for start in range(0, len(sheet), chunkSize):
+                yield sheet.iloc[start:start+chunkSize]
+        elif self._fileFormat in textFileFormats.values():
+            with pd.read_csv(self._fname, usecols=columns, chunksize=chunkSize, **self._csvOptions) as reader:
+                for chunk in reader:
+                    yield chunk if columns is None else chunk[columns]
+        else:
+            yield from _iterExcelSheetChunks(self._fname, sheetName, chunkSize, columns)
+
+    def estimateBytesPerRow(self, columns: Optional[List[str]] = None, numProbeRows: int = 1000) -> float:
+        """
+        Estimates the memory needed per row of the active sheet when loading the given columns.
+        :param columns: The columns to consider, None for all columns.
+        :param numProbeRows: Number of rows to determine the memory usage from.
+        :return: Number of bytes per row
+        """
+        sheet: Union[pd.DataFrame, None] = self._getSheetInMemory(columns)
+        if sheet is not None:
+            probe: pd.DataFrame = sheet.iloc[:numProbeRows]
+            bytesPerRow: float = probe.memory_usage(index=False, deep=True).sum() / max(len(probe), 1)
+        else:
+            numColumns: int = len(columns) if columns is not None else len(self.getColumnsOfActiveSheet())
+            bytesPerRow = numColumns * self._bytesPerCellEstimate
+        return max(bytesPerRow, 1.0)
+
+    def estimateSheets(self, sheetNames: List[str]) -> SheetEstimate:
+        """
+        Estimates the size of the given sheets, merged over all loaded files (see setActiveSheets), and the memory and
+        runtime of loading them, without parsing them. Only the dimension info of excel sheets (or the metadata of
+        the other file formats) is read.
+        :param sheetNames: Names of the sheets (of the first file)
+        :return: SheetEstimate
+        """
+        estimate: Union[SheetEstimate, None] = None
+        for reader, sheetName, _ in self._getMergeParts(sheetNames):
+            partEstimate: SheetEstimate = reader.estimateSheet(sheetName)
+            estimate = partEstimate if estimate is None else estimate + partEstimate
+        return estimate
+
+    def estimateSheet(self, sheetName: str) -> SheetEstimate:
+        """
+        Estimates the size of the sheet and the memory and runtime of loading it, without parsing it.
+        The number of rows and columns are read from the dimension info of excel sheets (with openpyxl in read-only
+        mode), memory and runtime are derived from the number of cells with the calibration constants of
+        dataimport/sheetEstimate.py. Sheets in memory (or in the sheet cache) are reported with their actual size.
+        :param sheetName: The name of the sheet
+        :return: SheetEstimate
+        """
+        assert sheetName in self._sheetNames, f"Sheet {sheetName} not existent in available sheets: {self._sheetNames}"
+        if sheetName in self._mergedSheets.keys():
+            return self.estimateSheets([sheetName for reader, sheetName, _ in self._mergedSheets[sheetName]
+                                        if reader is self])
+
+        if self.isSheetLoaded(sheetName):
+            sheet: pd.DataFrame = self._dataframes[sheetName]
+            return SheetEstimate(len(sheet), len(sheet.columns), self._getSheetBytes(sheetName) / 1024**2, 0.0,
+                                 inMemory=True)
+
+        numRows, numColumns = self._readSheetDimensions(sheetName)
+        numCells: int = numRows * numColumns
+        if self._fileFormat in textFileFormats.values():
+            fileCategory: str = "text"
+        elif self._fileFormat in columnarFileFormats.values():
+            fileCategory = "columnar"
+        else:
+            fileCategory = "excel"
+        inMemory: bool = sheetName in self._spilledSheets.keys() or \
+            (self._fileKey != "" and self._sheetCache.getStoredColumns(self._fileKey, sheetName)[1])
+        return SheetEstimate(numRows, numColumns, numCells * self._bytesPerCellEstimate / 1024**2,
+                             0.0 if inMemory else numCells * secondsPerCell[fileCategory], inMemory)
+
+    def _readSheetDimensions(self, sheetName: str) -> Tuple[int, int]:
+        """
+        Returns the number of rows (below the header row) and columns of the sheet, read from its metadata.
+        Excel sheets without (or with a single cell) dimension info and text files are estimated from the file size.
+        """
+        if self._fileFormat in textFileFormats.values():
+            numColumns: int = len(self._getColumnNames(sheetName))
+            with open(self._fname, "rb") as fp:
+                sample: bytes = fp.read(2**16)
+            numLines: int = sample.count(b"\n") + (0 if sample.endswith(b"\n") else 1)
+            fileSize: int = os.path.getsize(self._fname)
+            if len(sample) < fileSize:
+                numLines = round(fileSize / (len(sample) / max(numLines, 1)))
+            return max(numLines - 1, 0), numColumns
+        elif self._fileFormat == "parquet":
+            import pyarrow.parquet
+            metadata = pyarrow.parquet.read_metadata(self._fname)
+            return metadata.num_rows, metadata.num_columns
+        elif self._fileFormat == "feather":
+            import pyarrow.dataset
+            import pyarrow.ipc
+            numRows: int = pyarrow.dataset.dataset(self._fname, format="feather").count_rows()  # From the batch metadata
+            return numRows, len(pyarrow.ipc.open_file(self._fname).schema.names)
+
+        excelFile: pd.ExcelFile = self._getExcelFile()
+        if excelFile.engine != "openpyxl":
+            sheet = excelFile.book.sheet_by_name(sheetName)  # xlrd reads the entire workbook anyway
+            return max(sheet.nrows - 1, 0), sheet.ncols
+
+        worksheet = excelFile.book[sheetName]
+        dimensions: Optional[Tuple[int, int]] = _getDeclaredDimensions(worksheet)  # Also if the worksheet was reset
+        if dimensions is not None:
+            return max(dimensions[0] - 1, 0), dimensions[1]
+        numColumns = len(self._getColumnNames(sheetName))  # The sheet xml lacks reliable dimension info
+        with zipfile.ZipFile(self._fname) as archive:
+            xmlSize: int = archive.getinfo(worksheet._worksheet_path).file_size
+        return max(round(xmlSize / xmlBytesPerCell / max(numColumns, 1)) - 1, 0), numColumns
+
+
+def _getTextFileOptions(fname: str, fileFormat: str, numSampleBytes: int = 2**16) -> Dict[str, str]:
+    """
+    Determines the encoding and delimiter of a csv or tsv file from its beginning. Files that are not valid utf-8
+    are read as latin-1 (as often written by Windows software), the delimiter of csv files is detected among
+    comma, semicolon and tab.
+    :param fname: The text file
+    :param fileFormat: "csv" or "tsv"
+    :param numSampleBytes: Number of bytes at the beginning of the file to use
+    :return: Dictionary of keyword arguments for pd.read_csv
+    """
+    with open(fname, "rb") as fp:
+        sample: bytes = fp.read(numSampleBytes)
+    if len(sample) == numSampleBytes and b"\n" in sample:
+        sample = sample[:sample.rindex(b"\n")]  # Do not cut a multi-byte character
+    try:
+        text: str = sample.decode("utf-8-sig")
+        encoding: str = "utf-8-sig"
+    except UnicodeDecodeError:
+        text = sample.decode("latin-1")
+        encoding = "latin-1"
+
+    delimiter: str = "\t"
+    if fileFormat == "csv":
+        try:
+            delimiter = csv.Sniffer().sniff(text, delimiters=",;\t").delimiter
+        except csv.Error:
+            delimiter = ","
+    return {"sep": delimiter, "encoding": encoding}
+
+
+def _iterExcelSheetChunks(fname: str, sheetName: str, chunkSize: int,
+                          columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """
+    Streams the rows of an excel sheet (using openpyxl in read-only mode) and yields them as dataframes of at most
+    chunkSize rows. The result is the same as from pd.read_excel: The first row is the header, blank rows at the
+    end of the sheet are dropped and empty cells are nan. Only columns named in the header row can be read.
+    :param fname: path to the excel file
+    :param sheetName: Name of the sheet to read
+    :param chunkSize: Maximum number of rows per chunk
+    :param columns: The columns to return, None for all columns.
+    :return: Iterator over the chunk dataframes
+    """
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(fname, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheetName]
+        dimensions: Optional[Tuple[int, int]] = _getDeclaredDimensions(worksheet)
+        worksheet.reset_dimensions()  # Otherwise, all rows are cut at a stale declared width
+        rows: Iterator[tuple] = worksheet.iter_rows(values_only=True)
+        allColumns: List[str] = _getColumnNamesOfHeader(next(rows, ()), None if dimensions is None else dimensions[1])
+        if columns is None:
+            columns = allColumns
+        for colName in columns:
+            assert colName in allColumns, f"Column {colName} does not exist in sheet {sheetName}."
+        positions: List[int] = [allColumns.index(colName) for colName in columns]
+
+        chunkRows: List[list] = []
+        numBlankRows: int = 0  # blank rows are only kept if they are followed by a non-blank row
+        firstRowIndex: int = 0
+        for row in rows:
+            if all(value is None for value in row):
+                numBlankRows += 1
+                continue
+            chunkRows += [[""]*len(positions)]*numBlankRows
+            numBlankRows = 0
+            cells: List = _convertCellValues(row)
+            chunkRows.append([cells[pos] if pos < len(cells) else "" for pos in positions])
+            while len(chunkRows) >= chunkSize:
+                yield _rowsToDataFrame(chunkRows[:chunkSize], columns, firstRowIndex)
+                firstRowIndex += chunkSize
+                chunkRows = chunkRows[chunkSize:]
+        if len(chunkRows) > 0:
+            yield _rowsToDataFrame(chunkRows, columns, firstRowIndex)
+    finally:
+        workbook.close()
+
+
+def _readExcelSheet(fname: str, sheetName: str, progressCallback: Optional[Callable[[int], bool]] = None,
+                    progressInterval: int = 1000) -> Union[pd.DataFrame, None]:
+    """
+    Reads an entire excel sheet row by row (using openpyxl in read-only mode), reporting the progress. The cells are
+    converted and parsed like in pd.read_excel, so that the result is the same.
+    :param fname: path to the excel file
+    :param sheetName: Name of the sheet to read
+    :param progressCallback: Called with the number of rows read so far. Reading is cancelled if it returns False.
+    :param progressInterval: Number of rows between calls of the progress callback
+    :return: The dataframe of the sheet, None if reading was cancelled.
+    """
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(fname, read_only=True, data_only=True)
+    try:
+        data: List[list] = []
+        lastRowWithData: int = -1
+        worksheet = workbook[sheetName]
+        worksheet.reset_dimensions()  # Otherwise, all rows are cut at a stale declared width
+        for rowIndex, row in enumerate(worksheet.iter_rows(values_only=True)):
+            cells: List = _convertCellValues(row)
+            while len(cells) > 0 and cells[-1] == "":
+                cells.pop()
+            if len(cells) > 0:
+                lastRowWithData = rowIndex
+            data.append(cells)
+            if progressCallback is not None and len(data) % progressInterval == 0 and not progressCallback(len(data)):
+                return None
+    finally:
+        workbook.close()
+
+    data = data[:lastRowWithData+1]
+    if len(data) > 0:
+        maxWidth: int = max(len(cells) for cells in data)
+        data = [cells + [""]*(maxWidth - len(cells)) for cells in data]
+    return TextParser(data, header=0, skip_blank_lines=False).read()
+
+
+def _convertCellValues(row: tuple) -> List:
+    """
+    Converts the cell values of a sheet row read with openpyxl like pd.read_excel does, before they are parsed by
+    pandas' TextParser: empty cells become "", error cells (e.g., #DIV/0!) nan and integral floats int.
+    """
+    from openpyxl.cell.cell import ERROR_CODES
+
+    return ["" if value is None else
+            int(value) if type(value) == float and value.is_integer() else
+            np.nan if type(value) == str and value in ERROR_CODES else value
+            for value in row]
+
+
+def _getDeclaredDimensions(worksheet) -> Optional[Tuple[int, int]]:
+    """
+    Returns the number of rows and columns declared in the dimension info of a read-only openpyxl worksheet. Some
+    writers leave a stale single cell dimension (e.g., "A1") regardless of the contents, which is treated as unknown.
+    The info is parsed from the sheet xml, as the dimensions of the worksheet object may already have been reset.
+    :param worksheet: The openpyxl ReadOnlyWorksheet
+    :return: Tuple (numRows, numColumns), including the header row, None if the dimension is missing or a single cell
+    """
+    from openpyxl.worksheet._reader import WorkSheetParser
+
+    source = worksheet._get_source()
+    try:
+        boundaries: Optional[Tuple[int, int, int, int]] = WorkSheetParser(source, []).parse_dimensions()
+    finally:
+        source.close()
+    if boundaries is None or None in boundaries:
+        return None
+    minColumn, minRow, maxColumn, maxRow = boundaries
+    if minColumn == maxColumn and minRow == maxRow:
+        return None
+    return maxRow, maxColumn
+
+
+def _getColumnNamesOfHeader(headerRow: tuple, numColumns: Optional[int] = None) -> List[str]:
+    """
+    Returns the column names of the given header row, named like pd.read_excel does (i.e., empty cells become
+    "Unnamed: i" and duplicate names get a numbered suffix).
+    :param headerRow: The cell values of the header row
+    :param numColumns: The width of the sheet (from its dimension info). Columns with data but an empty header cell
+    are named as well, also after the last non-empty header cell. A wider header row is not cut, as the dimension info
+    may be stale. If None, the width of the header row is used.
+    :return: List of column names
+    """
+    cells: List = list(headerRow)
+    while len(cells) > 0 and cells[-1] is None:
+        cells.pop()
+    if numColumns is not None:
+        cells += [None]*(numColumns - len(cells))
+    cells = ["" if value is None else value for value in cells]
+    return list(TextParser([cells], header=0).read().columns)
+
+
+def _rowsToDataFrame(rows: List[list], columns: List[str], firstRowIndex: int) -> pd.DataFrame:
+    """
+    Converts rows of cell values (see _convertCellValues) into a dataframe. Like in pd.read_excel, the values are
+    parsed by pandas' TextParser, so that numbers, numbers stored as text and empty cells end up in the same dtypes.
+    """
+    dframe: pd.DataFrame = TextParser(rows, names=columns, header=None, skip_blank_lines=False).read()
+    dframe.index = pd.RangeIndex(firstRowIndex, firstRowIndex + len(rows))
+    return dframe
@@ -0,0 +1,234 @@
+"""
+DomeExcelConverter
+Copyright (C) 2021 Josef Brandt, University of Gothenburg <josef.brandt@gu.se>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program, see COPYING.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import hashlib
+import json
+import os
+import shutil
+from logging import getLogger
+from typing import *
+
+import pandas as pd
+
+try:
+    import pyarrow
+    parquetAvailable = True
+except ImportError:
+    parquetAvailable = False
+
+
+cacheDirVariable: str = "DOMECONVERTER_CACHE_DIR"  # Environment variable to set another cache directory
+
+
+def getDefaultCacheDir() -> str:
+    """
+    Returns the directory of the persistent caches (the sheet cache and the vocabulary store): the directory set in the
+    environment variable DOMECONVERTER_CACHE_DIR, otherwise .domeConverterCache in the home directory.
+    """
+    return os.environ.get(cacheDirVariable) or os.path.join(os.path.expanduser("~"), ".domeConverterCache")
+
+
+class SheetCache:
+    """
+    Persistent cache of parsed excel sheets, so that reopening a workbook does not require parsing it again.
+    Every workbook gets an entry directory, named by a hash of the file content and its modification time. It holds
+    a manifest (sheet names, column names, which columns of which sheet are stored) and one file per stored sheet,
+    in Parquet format if pyarrow is available, otherwise pickled. If the total size of the cache exceeds the limit,
+    the least recently used entries are removed.
+    """
+    manifestName: str = "manifest.json"
+    formatVersion: int = 2  # Part of the file keys, increase it when the stored sheets or column names change
+
+    def __init__(self, directory: Optional[str] = None, maxSizeMB: float = 1024.0):
+        """
+        :param directory: The cache directory, None for the default directory (see getDefaultCacheDir)
+        :param maxSizeMB: The size limit of the cache
+        """
+        self._directory: str = directory if directory is not None else getDefaultCacheDir()
+        self._maxSizeMB: float = maxSizeMB
+
+    def getDirectory(self) -> str:
+        return self._directory
+
+    def setMaxSize(self, megaBytes: float) -> None:
+        assert megaBytes > 0, "The cache size has to be positive."
+        self._maxSizeMB = megaBytes
+
+    @staticmethod
+    def getFileKey(fname: str) -> str:
+        """
+        Returns the cache key of the given file, made from its content, its modification time and the format version.
+        """
+        fileHash = hashlib.sha1()
+        with open(fname, "rb") as fp:
+            for block in iter(lambda: fp.read(2**20), b""):
+                fileHash.update(block)
+        fileHash.update(str(os.stat(fname).st_mtime_ns).encode())
+        fileHash.update(f"v{SheetCache.formatVersion}".encode())
+        return fileHash.hexdigest()
+
+    def getSheetNames(self, fileKey: str) -> Union[List[str], None]:
+        """
+        Returns the sheet names of the cached workbook, or None, if the workbook is not cached.
+        """
+        manifest: Union[dict, None] = self._readManifest(fileKey)
+        if manifest is None:
+            return None
+        self._touch(fileKey)
+        return manifest["sheetNames"]
+
+    def setSheetNames(self, fileKey: str, sheetNames: List[str]) -> None:
+        """
+        Creates the entry of a workbook, if not yet existent.
+        """
+        if self._readManifest(fileKey) is None:
+            os.makedirs(self._getEntryDir(fileKey), exist_ok=True)
+            self._writeManifest(fileKey, {"sheetNames": list(sheetNames), "columnNames": {}, "sheets": {}})
+
+    def getColumnNames(self, fileKey: str, sheetName: str) -> Union[List[str], None]:
+        manifest: Union[dict, None] = self._readManifest(fileKey)
+        if manifest is None:
+            return None
+        return manifest["columnNames"].get(sheetName)
+
+    def setColumnNames(self, fileKey: str, sheetName: str, columnNames: List[str]) -> None:
+        manifest: Union[dict, None] = self._readManifest(fileKey)
+        if manifest is not None and all(type(name) == str for name in columnNames):
+            manifest["columnNames"][sheetName] = list(columnNames)
+            self._writeManifest(fileKey, manifest)
+
+    def getStoredColumns(self, fileKey: str, sheetName: str) -> Tuple[List[str], bool]:
+        """
+        Returns the names of the stored columns of the sheet and whether the entire sheet is stored.
+        """
+        manifest: Union[dict, None] = self._readManifest(fileKey)
+        if manifest is None or sheetName not in manifest["sheets"]:
+            return [], False
+        sheetInfo: dict = manifest["sheets"][sheetName]
+        return sheetInfo["columns"], sheetInfo["complete"]
+
+    def getSheet(self, fileKey: str, sheetName: str) -> Union[pd.DataFrame, None]:
+        """
+        Returns the stored (part of the) sheet, or None, if it is not cached.
+        """
+        manifest: Union[dict, None] = self._readManifest(fileKey)
+        if manifest is None or sheetName not in manifest["sheets"]:
+            return None
+        fname: str = os.path.join(self._getEntryDir(fileKey), manifest["sheets"][sheetName]["file"])
+        try:
+            if fname.endswith(".parquet"):
+                dframe: pd.DataFrame = pd.read_parquet(fname)
+            else:
+                dframe = pd.read_pickle(fname)
+        except Exception as e:
+            getLogger("SheetCache").warning(f"Could not read cached sheet {sheetName}: {e}")
+            return None
+        self._touch(fileKey)
+        return dframe
+
+    def putSheet(self, fileKey: str, sheetName: str, dframe: pd.DataFrame, complete: bool) -> None:
+        """
+        Stores the sheet in the cache and removes least recently used entries, if the cache grows too large.
+        :param fileKey: The key of the workbook, as from getFileKey.
+        :param sheetName: The name of the sheet
+        :param dframe: The (part of the) sheet to store
+        :param complete: Whether the dataframe contains all columns of the sheet
+        :return:
+        """
+        manifest: Union[dict, None] = self._readManifest(fileKey)
+        if manifest is None or sheetName not in manifest["sheetNames"]:
+            return
+        baseName: str = f"sheet{manifest['sheetNames'].index(sheetName)}"
+        fname: str = os.path.join(self._getEntryDir(fileKey), baseName)
+        for oldFile in [fname + ".parquet", fname + ".pkl"]:
+            if os.path.exists(oldFile):
+                os.remove(oldFile)
+
+        storedName: str = baseName + ".pkl"
+        if parquetAvailable and all(type(name) == str for name in dframe.columns):
+            try:
+                dframe.to_parquet(fname + ".parquet")
+                storedName = baseName + ".parquet"
+            except Exception:  # e.g., object columns with mixed types
+                if os.path.exists(fname + ".parquet"):
+                    os.remove(fname + ".parquet")
+        if storedName.endswith(".pkl"):
+            dframe.to_pickle(fname + ".pkl")
+
+        manifest["sheets"][sheetName] = {"file": storedName, "columns": list(dframe.columns), "complete": complete}
+        self._writeManifest(fileKey, manifest)
+        self._evictLeastRecentlyUsed(keepKey=fileKey)
+
+    def getSizeMB(self) -> float:
+        return sum(self._getEntrySize(key) for key in self._getEntryKeys()) / 1024**2
+
+    def clear(self) -> None:
+        for key in self._getEntryKeys():
+            shutil.rmtree(self._getEntryDir(key), ignore_errors=True)
+
+    def _evictLeastRecentlyUsed(self, keepKey: str) -> None:
+        """
+        Removes the least recently used entries until the cache is within its size limit. The entry of the given
+        key is only removed if it exceeds the limit by itself.
+        """
+        keys: List[str] = sorted(self._getEntryKeys(), key=self._getLastUsed)
+        sizes: Dict[str, int] = {key: self._getEntrySize(key) for key in keys}
+        totalSize: int = sum(sizes.values())
+        maxSize: float = self._maxSizeMB * 1024**2
+        for key in [key for key in keys if key != keepKey] + [keepKey]:
+            if totalSize <= maxSize:
+                break
+            shutil.rmtree(self._getEntryDir(key), ignore_errors=True)
+            totalSize -= sizes.get(key, 0)
+
+    def _getEntryKeys(self) -> List[str]:
+        if not os.path.isdir(self._directory):
+            return []
+        return [name for name in os.listdir(self._directory)
+                if os.path.exists(os.path.join(self._directory, name, self.manifestName))]
+
+    def _getEntryDir(self, fileKey: str) -> str:
+        return os.path.join(self._directory, fileKey)
+
+    def _getEntrySize(self, fileKey: str) -> int:
+        entryDir: str = self._getEntryDir(fileKey)
+        if not os.path.isdir(entryDir):
+            return 0
+        return sum(os.path.getsize(os.path.join(entryDir, name)) for name in os.listdir(entryDir))
+
+    def _getLastUsed(self, fileKey: str) -> float:
+        return os.path.getmtime(os.path.join(self._getEntryDir(fileKey), self.manifestName))
+
+    def _touch(self, fileKey: str) -> None:
+        os.utime(os.path.join(self._getEntryDir(fileKey), self.manifestName))
+
+    def _readManifest(self, fileKey: str) -> Union[dict, None]:
+        manifestPath: str = os.path.join(self._getEntryDir(fileKey), self.manifestName)
+        if not os.path.exists(manifestPath):
+            return None
+        try:
+            with open(manifestPath, encoding="utf-8") as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            return None
+
+    def _writeManifest(self, fileKey: str, manifest: dict) -> None:
+        with open(os.path.join(self._getEntryDir(fileKey), self.manifestName), "w", encoding="utf-8") as fp:
+            json.dump(manifest, fp)
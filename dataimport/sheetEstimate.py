@@ -0,0 +1,68 @@
+"""
+DomeExcelConverter
+Copyright (C) 2021 Josef Brandt, University of Gothenburg <josef.brandt@gu.se>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program, see COPYING.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+from dataclasses import dataclass
+from typing import *
+
+
+# Calibration constants, measured with benchmarks/loadingBenchmark.py (rerun it after changing the loading code).
+# Runtime of loading one cell, per file format. Columnar files are at most as slow as text files, which is used as
+# estimate for them.
+secondsPerCell: Dict[str, float] = {"excel": 19e-6, "text": 0.4e-6, "columnar": 0.4e-6}
+xmlBytesPerCell: float = 55.0  # Size of the uncompressed sheet xml per cell, for workbooks without dimension info
+
+largeSheetSeconds: float = 10.0  # Sheets estimated to take longer are marked as large in the sheet chooser
+
+
+@dataclass(frozen=True)
+class SheetEstimate:
+    """
+    Size of a sheet and the expected memory and runtime of loading it, determined without parsing the sheet.
+    """
+    numRows: int  # Number of rows below the header row
+    numColumns: int
+    megaBytes: float
+    seconds: float
+    inMemory: bool = False  # Whether the sheet is already loaded (or in the sheet cache), so that loading is instant
+
+    def __add__(self, other: 'SheetEstimate') -> 'SheetEstimate':
+        """
+        Returns the estimate of merging both sheets.
+        """
+        return SheetEstimate(self.numRows + other.numRows, max(self.numColumns, other.numColumns),
+                             self.megaBytes + other.megaBytes, self.seconds + other.seconds,
+                             self.inMemory and other.inMemory)
+
+    def isLarge(self) -> bool:
+        return not self.inMemory and self.seconds > largeSheetSeconds
+
+    def getSummary(self) -> str:
+        summary: str = f"~{self.numRows} rows x {self.numColumns} columns, ~{self.megaBytes:.1f} MB"
+        if self.inMemory:
+            return summary + ", already loaded or cached"
+        return summary + f", loads in {_formatSeconds(self.seconds)}"
+
+
+def _formatSeconds(seconds: float) -> str:
+    if seconds < 1.0:
+        return "< 1 s"
+    elif seconds < 120:
+        return f"~{seconds:.0f} s"
+    return f"~{seconds / 60:.0f} min"
@@ -0,0 +1,151 @@
+"""
+DomeExcelConverter
+Copyright (C) 2021 Josef Brandt, University of Gothenburg <josef.brandt@gu.se>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program, see COPYING.
+If not, see <https://www.gnu.org/licenses/>.
+
+Compiles the Dome vocabulary files into an SQLite database. Run from the repository root to build it explicitly:
+    python -m dataimport.vocabularyStore
+"""
+
+
+import hashlib
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import *
+
+from dataimport.sheetCache import getDefaultCacheDir
+
+if TYPE_CHECKING:
+    from dataimport.domeCodes import DomeCode
+
+
+storeFileName: str = "vocabularies.sqlite"  # Name of the store in the cache directory
+vocabularyExtensions: List[str] = [".csv", ".xlsx"]
+
+
+class VocabularyStore:
+    """
+    Indexed store of the Dome vocabularies, compiled from the csv and xlsx files of the code folder into one SQLite
+    database. Reading a vocabulary is then a single indexed query instead of parsing its file. The store records
+    the hash of every source file; before the first read, files that were added, changed or removed since
+    they were compiled are compiled again.
+    """
+    def __init__(self, codeFolder: str, storePath: Optional[str] = None):
+        """
+        :param codeFolder: The folder of the vocabulary files
+        :param storePath: The database file, None for a file in the cache directory (see getDefaultCacheDir). Its
+        location is then determined when the store is first accessed.
+        """
+        self._codeFolder: str = codeFolder
+        self._storePath: Union[str, None] = storePath
+        self._upToDate: bool = False  # Whether the source files were checked since the store was created
+        self._lock: threading.Lock = threading.Lock()
+
+    def getStorePath(self) -> str:
+        if self._storePath is None:
+            return os.path.join(getDefaultCacheDir(), storeFileName)
+        return self._storePath
+
+    def getCodes(self, fileName: str) -> List['DomeCode']:
+        """
+        Returns the codes of the given vocabulary file, in the order of the file.
+        :param fileName: filename relative to the code folder, either a .csv or .xlsx file
+        :return: List of DomeCodes
+        """
+        from dataimport.domeCodes import DomeCode
+
+        self.update()
+        with self._connect() as connection:
+            compiled: Union[tuple, None] = connection.execute("SELECT 1 FROM sources WHERE fileName = ?",
+                                                              (fileName,)).fetchone()
+            assert compiled is not None, f"The vocabulary {fileName} does not exist in {self._codeFolder}."
+            rows: List[tuple] = connection.execute("SELECT code, descr, long_descr FROM codes WHERE fileName = ? "
+                                                   "ORDER BY position", (fileName,)).fetchall()
+        return [DomeCode(*row) for row in rows]
+
+    def update(self, force: bool = False) -> List[str]:
+        """
+        Compiles the vocabulary files that are new or changed since they were compiled and removes the vocabularies of
+        deleted files. Unless forced, the files are only checked once per store object.
+        :param force: If True, the files are checked again.
+        :return: The names of the compiled files
+        """
+        with self._lock:
+            if self._upToDate and not force:
+                return []
+            os.makedirs(os.path.dirname(os.path.abspath(self.getStorePath())), exist_ok=True)
+            sourceHashes: Dict[str, str] = {fileName: _getFileHash(os.path.join(self._codeFolder, fileName))
+                                            for fileName in sorted(os.listdir(self._codeFolder))
+                                            if os.path.splitext(fileName)[1].lower() in vocabularyExtensions}
+            with self._connect() as connection:
+                connection.execute("CREATE TABLE IF NOT EXISTS sources (fileName TEXT PRIMARY KEY, hash TEXT)")
+                connection.execute("CREATE TABLE IF NOT EXISTS codes (fileName TEXT, position INTEGER, code TEXT, "
+                                   "descr TEXT, long_descr TEXT, PRIMARY KEY (fileName, position))")
+                storedHashes: Dict[str, str] = dict(connection.execute("SELECT fileName, hash FROM sources"))
+                for fileName in set(storedHashes.keys()) - set(sourceHashes.keys()):
+                    self._removeVocabulary(connection, fileName)
+
+                compiledFiles: List[str] = [fileName for fileName, fileHash in sourceHashes.items()
+                                            if storedHashes.get(fileName) != fileHash]
+                for fileName in compiledFiles:
+                    self._compileVocabulary(connection, fileName, sourceHashes[fileName])
+            self._upToDate = True
+            return compiledFiles
+
+    def _compileVocabulary(self, connection: sqlite3.Connection, fileName: str, fileHash: str) -> None:
+        from dataimport.domeCodes import createCodesFromFile
+
+        self._removeVocabulary(connection, fileName)
+        codes: List['DomeCode'] = createCodesFromFile(fileName, self._codeFolder)
+        connection.executemany("INSERT INTO codes VALUES (?, ?, ?, ?, ?)",
+                               [(fileName, position, code.code, code.descr, code.long_descr)
+                                for position, code in enumerate(codes)])
+        connection.execute("INSERT INTO sources VALUES (?, ?)", (fileName, fileHash))
+
+    @staticmethod
+    def _removeVocabulary(connection: sqlite3.Connection, fileName: str) -> None:
+        connection.execute("DELETE FROM codes WHERE fileName = ?", (fileName,))
+        connection.execute("DELETE FROM sources WHERE fileName = ?", (fileName,))
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        Opens a connection for one transaction, which is committed (or rolled back on errors) and closed afterwards.
+        A connection per access allows reading the vocabularies from any thread.
+        """
+        connection: sqlite3.Connection = sqlite3.connect(self.getStorePath(), timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+
+def _getFileHash(fname: str) -> str:
+    fileHash = hashlib.sha1()
+    with open(fname, "rb") as fp:
+        fileHash.update(fp.read())
+    return fileHash.hexdigest()
+
+
+if __name__ == '__main__':
+    from dataimport.domeCodes import codeFolder
+
+    store: VocabularyStore = VocabularyStore(codeFolder)
+    compiled: List[str] = store.update()
+    print(f"Compiled {len(compiled)} vocabularies into {store.getStorePath()}: {', '.join(compiled)}")
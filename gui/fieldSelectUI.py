@@ -18,10 +18,14 @@ If not, see <https://www.gnu.org/licenses/>.
 """
 
 
-from PyQt6 import QtWidgets, QtCore, QtGui
+from PyQt6 import QtWidgets, QtCore
 from typing import *
 import sys
+import weakref
 
+import numpy as np
+
+from dataimport.codeSearch import CodeSearchIndex
 from dataimport.domeCodes import DomeCode
 
 testRunning: bool = "pytest" in sys.modules
@@ -32,65 +36,132 @@ class SelectorPushButton(QtWidgets.QPushButton):
     Pushbutton variation, tied closely together to the Field Selector.
     When clicking, a FieldSelectorDialog is shown. After clicking an entry in there, the dialog closes and the
     button takes the clicked text element as text. It also connects to a function to retrieve the new entry.
-    :param codeList: List of codes to display.
+    The dialog is taken from the SelectorRegistry when it is first shown: all buttons of a vocabulary share one
+    dialog, so that creating the button is cheap, even for large vocabularies and many buttons. Each button only
+    holds its selected code.
+    :param codeList: List of codes to display, or a function returning them (called when the dialog is first shown).
     :param setCodeFunc: Function to connect to the CodeSelected signal.
     :param connectedSignal: Signal that is emitted when an entry was selected.
     :param allowMultiSelect: If True, the user can select multiple entries to be combined in a code.
     :param hideDescriptions: If True, only the code buttons are shown, headers and code descriptions are hidden
+    :param showCodeOnly: If True, the button shows only the selected code, without its description
     """
     DefaultText: str = "Select Entry"
 
-    def __init__(self, codeList: List['DomeCode'], setCodeFunc: Callable[[Union[None, DomeCode]], None],
+    def __init__(self, codeList: Union[Sequence['DomeCode'], Callable[[], Sequence['DomeCode']]],
+                 setCodeFunc: Callable[[Union[None, DomeCode]], None],
                  connectedSignal: Union[None, QtCore.pyqtSignal] = None, allowMultiSelect: bool = False,
-                 hideDescriptions: bool = False) -> None:
+                 hideDescriptions: bool = False, showCodeOnly: bool = False) -> None:
         """
-        :param codeList: List of codes to display.
+        :param codeList: List of codes to display, or a function returning them (called when the dialog is first shown).
         :param setCodeFunc: Function to connect to the CodeSelected signal.
         :param connectedSignal: Signal that is emitted when an entry was selected.
         :param allowMultiSelect: If True, the user can select multiple entries to be combined in a code.
         :param hideDescriptions: If True, only the code buttons are shown, headers and code descriptions are hidden
+        :param showCodeOnly: If True, the button shows only the selected code, without its description
         """
         super(SelectorPushButton, self).__init__("Select Entry")
-        self._selector: CodeSelector = CodeSelector(codeList, allowMultiSelect, hideDescriptions)
+        self._codeList: Union[Sequence['DomeCode'], Callable[[], Sequence['DomeCode']]] = codeList
+        self._selector: Union[None, CodeSelector] = None  # Taken from the registry on first use, see getSelector
+        self._selectedCode: Union[None, DomeCode] = None
+        self._allowMultiSelect: bool = allowMultiSelect
+        self._hideDescriptions: bool = hideDescriptions
         self._setCodeFunc: Callable[[Union[None, DomeCode]], None] = setCodeFunc
-        self._hideDescription: bool = hideDescriptions
+        self._connectedSignal: Union[None, QtCore.pyqtSignal] = connectedSignal
+        self._hideDescription: bool = hideDescriptions or showCodeOnly
         if not testRunning:
-            self.pressed.connect(self._selector.show)
+            self.pressed.connect(self._showSelector)
 
-        self._selector.CodeSelected.connect(self._setBtnText)
-        self._selector.CodeSelected.connect(setCodeFunc)
-        self._selector.CodeResetted.connect(self._reset)
-        if connectedSignal is not None:
-            self._selector.CodeSelected.connect(lambda: connectedSignal.emit())
-            self._selector.CodeResetted.connect(lambda: connectedSignal.emit())
+    def getSelectedCode(self) -> Union[None, DomeCode]:
+        return self._selectedCode
+
+    def getSelector(self) -> 'CodeSelector':
+        """
+        Returns the selector dialog of the vocabulary, with this button as receiver of the selected code. The codes
+        are loaded on first call. The dialog is shared with the other buttons of the vocabulary, hence it has to be
+        retrieved again each time it is shown.
+        """
+        if self._selector is None:
+            codes: Sequence['DomeCode'] = self._codeList() if callable(self._codeList) else self._codeList
+            self._selector = getSelectorRegistry().getSelector(codes, self._allowMultiSelect, self._hideDescriptions)
+        self._selector.setReceiver(self._codeSelected, self._reset)
+        return self._selector
+
+    @QtCore.pyqtSlot()
+    def _showSelector(self) -> None:
+        self.getSelector().show()
 
     @QtCore.pyqtSlot(DomeCode)
-    def _setBtnText(self, code: DomeCode) -> None:
+    def _codeSelected(self, code: DomeCode) -> None:
+        self._selectedCode = code
         if self._hideDescription:
             self.setText(f"{code.code}")
         else:
             self.setText(f"{code.code} ({code.descr})")
+        self._setCodeFunc(code)
+        if self._connectedSignal is not None:
+            self._connectedSignal.emit()
 
     @QtCore.pyqtSlot()
     def _reset(self) -> None:
+        self._selectedCode = None
         self.setText(self.DefaultText)
         self._setCodeFunc(None)
-        
+        if self._connectedSignal is not None:
+            self._connectedSignal.emit()
+
+
+class SelectorRegistry:
+    """
+    Shares one CodeSelector between all buttons of the same vocabulary (and with the same display options).
+    The selectors are created on first request and only kept while any button uses them.
+    """
+    def __init__(self) -> None:
+        self._selectors: weakref.WeakValueDictionary = weakref.WeakValueDictionary()
+
+    def getSelector(self, codes: Sequence['DomeCode'], allowMultiSelect: bool = False,
+                    hideDescriptions: bool = False) -> 'CodeSelector':
+        """
+        Returns the selector of the given code list, which is identified by the list object. Vocabularies from the
+        VocabularyRegistry are the same object for all callers, lists of codes are shared by passing the same list.
+        :param codes: The codes to select from
+        :param allowMultiSelect: If True, the user can select multiple entries to be combined in a code.
+        :param hideDescriptions: If True, only the codes are shown, headers and code descriptions are hidden.
+        :return: The CodeSelector
+        """
+        key: Tuple[int, bool, bool] = (id(codes), allowMultiSelect, hideDescriptions)  # The selector keeps the codes alive
+        selector: Union[None, CodeSelector] = self._selectors.get(key)
+        if selector is None:
+            selector = CodeSelector(codes, allowMultiSelect, hideDescriptions)
+            self._selectors[key] = selector
+        return selector
+
+    def getNumSelectors(self) -> int:
+        return len(self._selectors)
+
+
+_selectorRegistry: SelectorRegistry = SelectorRegistry()
+
+
+def getSelectorRegistry() -> SelectorRegistry:
+    return _selectorRegistry
+
 
 class CodeSelector(QtWidgets.QDialog):
     """
     Dialog field for selecting an enrty from a list of codes.
+    The codes are shown in a table view, which only renders the visible rows, so that even the largest vocabularies
+    can be browsed completely. The search bar filters and ranks them (see CodeSearchIndex).
     """
     CodeSelected: QtCore.pyqtSignal = QtCore.pyqtSignal(DomeCode)  # Emitted with the code when clicking an entry
     CodeResetted: QtCore.pyqtSignal = QtCore.pyqtSignal()
 
-    def __init__(self, codes: List['DomeCode'], allowMultiSelect: bool = False, hideDescriptions: bool = False,
-                 maxNumToShow: int = 500) -> None:
+    def __init__(self, codes: Sequence['DomeCode'], allowMultiSelect: bool = False,
+                 hideDescriptions: bool = False) -> None:
         """
         :param codes: List of codes to display.
         :param allowMultiSelect: If True, the user can select multiple entries to be combined in a code.
-        :param hideDescriptions: If True, only the code buttons are shown, headers and code descriptions are hidden.
-        :param maxNumToShow: Maximum number of codes to show simultaneously.
+        :param hideDescriptions: If True, only the codes are shown, headers and code descriptions are hidden.
         """
         super(CodeSelector, self).__init__()
         self.setWindowTitle("Select Entry")
@@ -104,29 +175,35 @@ class CodeSelector(QtWidgets.QDialog):
         self._btnReset.setMaximumWidth(170)
         self._btnReset.pressed.connect(self._reset)
 
-        self._codes: List['DomeCode'] = codes
+        self._codes: Sequence['DomeCode'] = codes
         self._allowMultiSelect: bool = allowMultiSelect
-        self._maxNumToShow: int = maxNumToShow
         self._hideDescriptions: bool = hideDescriptions
+        self._receiver: Union[None, Tuple[Callable[['DomeCode'], None], Callable[[], None]]] = None
 
-        self._btns: List[QtWidgets.QPushButton] = []
-        self._checkboxes: List[QtWidgets.QCheckBox] = []
-        self._selectedCodes: Set[str] = set()
+        self._model: CodeTableModel = CodeTableModel(codes, allowMultiSelect)
+        self._model.dataChanged.connect(self._enableDisableSelectionButton)
+        self._proxyModel: CodeSearchProxyModel = CodeSearchProxyModel(CodeSearchIndex(codes))
+        self._proxyModel.setSourceModel(self._model)
 
         self._searchBar: QtWidgets.QLineEdit = QtWidgets.QLineEdit()
-        self._searchBar.setPlaceholderText("Type for refining selection.")
-        self._searchBar.textEdited.connect(self._displayBtns)
-
-        self._btnGroup: QtWidgets.QGroupBox = QtWidgets.QGroupBox()
-        self._btnGroup.setStyleSheet("QGroupBox {border: 0px}")
-        self._btnLayout: QtWidgets.QGridLayout = QtWidgets.QGridLayout()
-        self._btnGroup.setLayout(self._btnLayout)
-
-        self._scrollArea: QtWidgets.QScrollArea = QtWidgets.QScrollArea()
-
-        self._displayBtns("")  # i.e., display all buttons.
-        self._scrollArea.setWidget(self._btnGroup)
-        self._scrollArea.setWidgetResizable(True)
+        self._searchBar.setPlaceholderText("Type to search codes and descriptions.")
+        self._searchBar.textEdited.connect(self._applySearch)
+
+        self._codeTable: QtWidgets.QTableView = QtWidgets.QTableView()
+        self._codeTable.setModel(self._proxyModel)
+        self._codeTable.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
+        self._codeTable.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.SingleSelection)
+        self._codeTable.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self._codeTable.setWordWrap(False)
+        self._codeTable.verticalHeader().hide()
+        self._codeTable.verticalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeMode.Fixed)
+        self._codeTable.horizontalHeader().setStretchLastSection(True)
+        self._codeTable.horizontalHeader().setResizeContentsPrecision(100)  # Sizes the columns from the first rows only
+        self._codeTable.resizeColumnsToContents()
+        if hideDescriptions:
+            self._codeTable.horizontalHeader().hide()
+            self._codeTable.hideColumn(self._model.getDescriptionColumn())
+        self._codeTable.clicked.connect(self._codeClicked)
         self._enableDisableSelectionButton()
 
         layout: QtWidgets.QVBoxLayout = QtWidgets.QVBoxLayout()
@@ -135,122 +212,218 @@ class CodeSelector(QtWidgets.QDialog):
             infoTxt += "Check multiple checkboxes and click on 'Use Code Selection' to select multiple entries."
         infoTxt += "Hover mouse over description for more info."
         layout.addWidget(QtWidgets.QLabel(infoTxt))
-
-        if len(codes) > self._maxNumToShow:
-            boldFont: QtGui.QFont = QtGui.QFont()
-            boldFont.setBold(True)
-            warnLbl: QtWidgets.QLabel = QtWidgets.QLabel(f"Warning, large number of items ({len(codes)}), "
-                                                         f"only showing the first {self._maxNumToShow} hits. Please use searchbar for refining.")
-            warnLbl.setFont(boldFont)
-            layout.addWidget(warnLbl)
-
         layout.addWidget(self._searchBar)
-        layout.addWidget(self._scrollArea)
+        layout.addWidget(self._codeTable)
         if self._allowMultiSelect:
             layout.addWidget(self._btnUseSelection)
         layout.addWidget(self._btnReset)
         self.setLayout(layout)
 
+    def setReceiver(self, onSelected: Callable[['DomeCode'], None], onReset: Callable[[], None]) -> None:
+        """
+        Sets the functions that are called when a code is selected or resetted, replacing the previous ones.
+        The selector is shared between buttons, the button about to show it sets itself as receiver. For a new
+        receiver, the search and the checked codes are cleared.
+        :param onSelected: Function to connect to the CodeSelected signal
+        :param onReset: Function to connect to the CodeResetted signal
+        """
+        if self._receiver == (onSelected, onReset):
+            return
+        if self._receiver is not None:
+            try:
+                self.CodeSelected.disconnect(self._receiver[0])
+                self.CodeResetted.disconnect(self._receiver[1])
+            except TypeError:  # The previous receiver was already deleted, which removed its connections
+                pass
+        self._receiver = (onSelected, onReset)
+        self.CodeSelected.connect(onSelected)
+        self.CodeResetted.connect(onReset)
+        self._searchBar.clear()
+        self._applySearch("")
+        self._model.clearSelectedCodes()
+
+    def getShownCodes(self) -> List['DomeCode']:
+        """
+        Returns the codes matching the current search, in the order shown.
+        """
+        return [self._codes[row] for row in self._proxyModel.getSourceRows()]
+
     @QtCore.pyqtSlot(str)
-    def _displayBtns(self, pattern: str, minPatternLength: int = 3) -> None:
+    def _applySearch(self, pattern: str) -> None:
         """
-        Creates and displays button for the codes of this instance. Only codes that have a description containing the
-        given filter pattern are shown.
-        All codes are displayed if the pattern is shorter
+        Shows only the codes matching the given search pattern (in the code, the description or the long
+        description), the best matches first. All codes are shown if the pattern is empty.
         :param pattern: The string to search for
-        :param minPatternLength: Minimum length of the pattern. If the pattern is shorter, all entries are shown
         :return:
         """
-        showAll: bool = len(pattern) < minPatternLength
-        if len(pattern) >= minPatternLength or showAll:
-            self._clearBtnLayout()
-            self._btns = []
-            self._checkboxes = []
-            pattern = pattern.lower()
-            if not self._hideDescriptions:
-                if self._allowMultiSelect:
-                    self._btnLayout.addWidget(QtWidgets.QLabel("Select"), 0, 0)
-                self._btnLayout.addWidget(QtWidgets.QLabel("Code"), 0, 1)
-                self._btnLayout.addWidget(QtWidgets.QLabel("Description"), 0, 2)
-            row: int = 0 if self._hideDescriptions else 1
-            for code in self._codes:
-                if len(self._btns) < self._maxNumToShow:
-                    if code.descr.lower().find(pattern) != -1 or showAll:
-                        self._addSelectableCode(code, row)
-                        row += 1
-                else:
-                    break
-
-        self._btnLayout.setRowStretch(row, 1)
-        self._scrollArea.verticalScrollBar().setSliderPosition(0)
-
-    def _addSelectableCode(self, code: 'DomeCode', row: int) -> None:
-        newBtn: QtWidgets.QPushButton = self._getPushButton(code)
-        newLbl: QtWidgets.QLabel = QtWidgets.QLabel(code.descr)
-        newLbl.setToolTip(f"{code.descr}, ({code.long_descr})")
-        self._btns.append(newBtn)
-
-        if self._allowMultiSelect:
-            newCheckBox: QtWidgets.QCheckBox = QtWidgets.QCheckBox()
-            newCheckBox.setChecked(code.code in self._selectedCodes)
-            newCheckBox.stateChanged.connect(self._makeSelectLambda(newCheckBox, code))
-            self._checkboxes.append(newCheckBox)
-            self._btnLayout.addWidget(newCheckBox, row, 0)
+        self._proxyModel.setSearchPattern(pattern)
+        self._codeTable.scrollToTop()
 
-        self._btnLayout.addWidget(newBtn, row, 1)
-        if not self._hideDescriptions:
-            self._btnLayout.addWidget(newLbl, row, 2)
+    @QtCore.pyqtSlot(QtCore.QModelIndex)
+    def _codeClicked(self, index: QtCore.QModelIndex) -> None:
+        if index.column() != self._model.getSelectColumn():  # Clicking the checkbox only changes the selection
+            self._emitAndClose(self._codes[self._proxyModel.mapToSource(index).row()])
 
     def _reset(self) -> None:
         self.CodeResetted.emit()
         self.close()
 
-    def _clearBtnLayout(self) -> None:
-        for btn in self._btns:
-            btn.pressed.disconnect()
-        for box in self._checkboxes:
-            box.stateChanged.disconnect()
-        for i in reversed(range(self._btnLayout.count())):
-            item = self._btnLayout.itemAt(i)
-            if item.widget() is not None:
-                self._btnLayout.removeWidget(item.widget())
-            else:
-                self._btnLayout.removeItem(item)
-
-    def _getPushButton(self, code: 'DomeCode') -> QtWidgets.QPushButton:
-        newBtn: QtWidgets.QPushButton = QtWidgets.QPushButton(code.code)
-        newBtn.pressed.connect(self._makeEmitLambda(code))
-        return newBtn
-
-    def _makeEmitLambda(self, code: 'DomeCode') -> Callable:
-        return lambda: self._emitAndClose(code)
-
     def _emitAndClose(self, code: 'DomeCode') -> None:
         self.CodeSelected.emit(code)
         self.close()
 
-    def _makeSelectLambda(self, checkbox: QtWidgets.QCheckBox, code: 'DomeCode') -> Callable:
-        return lambda: self._addRemoveFromSelection(checkbox, code)
-
-    def _addRemoveFromSelection(self, checkbox: QtWidgets.QCheckBox, code: 'DomeCode') -> None:
-        if checkbox.isChecked():
-            self._selectedCodes.add(code.code)
-        else:
-            self._selectedCodes.remove(code.code)
-        self._enableDisableSelectionButton()
-
     def _enableDisableSelectionButton(self) -> None:
-        self._btnUseSelection.setEnabled(len(self._selectedCodes) >= 2)
+        self._btnUseSelection.setEnabled(len(self._model.getSelectedCodes()) >= 2)
 
     def _selectMultipleCodes(self) -> None:
         """
         Creates a combined DomeCode with multiple entries, according the checkbox selctions.
         :return:
         """
-        if len(self._selectedCodes) < 2:
+        selectedCodes: Set[str] = self._model.getSelectedCodes()
+        if len(selectedCodes) < 2:
             QtWidgets.QMessageBox.about(self, "Info", "Less than codes selected.\n"
                                                       "To select an individual code, just click the resepctive button.")
         else:
-            codeString: str = "~".join(self._selectedCodes)
+            codeString: str = "~".join(selectedCodes)
             combinedCode: DomeCode = DomeCode(codeString, "combination")
             self._emitAndClose(combinedCode)
+
+
+class CodeTableModel(QtCore.QAbstractTableModel):
+    """
+    Table model of a list of codes, with a column of checkboxes for selecting multiple codes, if allowed.
+    """
+    def __init__(self, codes: Sequence['DomeCode'], allowMultiSelect: bool = False) -> None:
+        super(CodeTableModel, self).__init__()
+        self._codes: Sequence['DomeCode'] = codes
+        self._columnNames: List[str] = (["Select"] if allowMultiSelect else []) + ["Code", "Description"]
+        self._selectedCodes: Set[str] = set()
+
+    def getSelectColumn(self) -> int:
+        """
+        Returns the index of the checkbox column, -1 if multiple codes can not be selected.
+        """
+        return 0 if self._columnNames[0] == "Select" else -1
+
+    def getDescriptionColumn(self) -> int:
+        return self._columnNames.index("Description")
+
+    def getSelectedCodes(self) -> Set[str]:
+        return set(self._selectedCodes)
+
+    def clearSelectedCodes(self) -> None:
+        if len(self._selectedCodes) > 0:
+            self._selectedCodes.clear()
+            self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, 0),
+                                  [QtCore.Qt.ItemDataRole.CheckStateRole])
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._codes)
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._columnNames)
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        code: 'DomeCode' = self._codes[index.row()]
+        columnName: str = self._columnNames[index.column()]
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return {"Code": code.code, "Description": code.descr}.get(columnName)
+        elif role == QtCore.Qt.ItemDataRole.ToolTipRole and columnName == "Description":
+            return f"{code.descr}, ({code.long_descr})"
+        elif role == QtCore.Qt.ItemDataRole.CheckStateRole and columnName == "Select":
+            return QtCore.Qt.CheckState.Checked if code.code in self._selectedCodes else QtCore.Qt.CheckState.Unchecked
+        return None
+
+    def setData(self, index: QtCore.QModelIndex, value: Any, role: int = QtCore.Qt.ItemDataRole.EditRole) -> bool:
+        if not index.isValid() or role != QtCore.Qt.ItemDataRole.CheckStateRole \
+                or index.column() != self.getSelectColumn():
+            return False
+        code: str = self._codes[index.row()].code
+        if value in (QtCore.Qt.CheckState.Checked, QtCore.Qt.CheckState.Checked.value):
+            self._selectedCodes.add(code)
+        else:
+            self._selectedCodes.discard(code)
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def flags(self, index: QtCore.QModelIndex) -> QtCore.Qt.ItemFlag:
+        if index.column() == self.getSelectColumn():
+            return QtCore.Qt.ItemFlag.ItemIsEnabled | QtCore.Qt.ItemFlag.ItemIsUserCheckable
+        return QtCore.Qt.ItemFlag.ItemIsEnabled | QtCore.Qt.ItemFlag.ItemIsSelectable
+
+    def headerData(self, section: int, orientation: QtCore.Qt.Orientation,
+                   role: int = QtCore.Qt.ItemDataRole.DisplayRole) -> Any:
+        if orientation == QtCore.Qt.Orientation.Horizontal and role == QtCore.Qt.ItemDataRole.DisplayRole:
+            return self._columnNames[section]
+        return None
+
+
+class CodeSearchProxyModel(QtCore.QAbstractProxyModel):
+    """
+    Proxy model showing only the rows of the source model matching a search pattern, in the ranked order of the
+    search index. The rows are mapped through the array of search results, instead of filtering and sorting row by
+    row, so that updating the search takes about as long as the search itself.
+    """
+    def __init__(self, searchIndex: CodeSearchIndex) -> None:
+        super(CodeSearchProxyModel, self).__init__()
+        self._searchIndex: CodeSearchIndex = searchIndex
+        self._sourceRows: np.ndarray = searchIndex.search("")  # Source row of each proxy row
+        self._proxyRows: np.ndarray = self._sourceRows.copy()  # Proxy row of each source row, -1 if not shown
+
+    def setSourceModel(self, sourceModel: QtCore.QAbstractItemModel) -> None:
+        super(CodeSearchProxyModel, self).setSourceModel(sourceModel)
+        sourceModel.dataChanged.connect(self._forwardDataChanged)
+
+    def setSearchPattern(self, pattern: str) -> None:
+        self.beginResetModel()
+        self._sourceRows = self._searchIndex.search(pattern)
+        self._proxyRows = np.full(len(self._searchIndex.getCodes()), -1, dtype=np.int64)
+        self._proxyRows[self._sourceRows] = np.arange(len(self._sourceRows))
+        self.endResetModel()
+
+    def getSourceRows(self) -> np.ndarray:
+        return self._sourceRows
+
+    def index(self, row: int, column: int, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> QtCore.QModelIndex:
+        if parent.isValid() or not (0 <= row < self.rowCount() and 0 <= column < self.columnCount()):
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index: Optional[QtCore.QModelIndex] = None) -> Union[QtCore.QModelIndex, QtCore.QObject]:
+        if index is None:  # QObject.parent()
+            return super(CodeSearchProxyModel, self).parent()
+        return QtCore.QModelIndex()
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._sourceRows)
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() or self.sourceModel() is None else self.sourceModel().columnCount()
+
+    def mapToSource(self, proxyIndex: QtCore.QModelIndex) -> QtCore.QModelIndex:
+        if not proxyIndex.isValid():
+            return QtCore.QModelIndex()
+        return self.sourceModel().index(int(self._sourceRows[proxyIndex.row()]), proxyIndex.column())
+
+    def mapFromSource(self, sourceIndex: QtCore.QModelIndex) -> QtCore.QModelIndex:
+        if not sourceIndex.isValid() or self._proxyRows[sourceIndex.row()] < 0:
+            return QtCore.QModelIndex()
+        return self.createIndex(int(self._proxyRows[sourceIndex.row()]), sourceIndex.column())
+
+    def headerData(self, section: int, orientation: QtCore.Qt.Orientation,
+                   role: int = QtCore.Qt.ItemDataRole.DisplayRole) -> Any:
+        return self.sourceModel().headerData(section, orientation, role)
+
+    def _forwardDataChanged(self, topLeft: QtCore.QModelIndex, bottomRight: QtCore.QModelIndex,
+                            roles: List[int] = []) -> None:
+        """
+        Emits one dataChanged signal for the range of shown rows that covers the changed source rows.
+        """
+        proxyRows: np.ndarray = self._proxyRows[topLeft.row():bottomRight.row() + 1]
+        proxyRows = proxyRows[proxyRows >= 0]
+        if len(proxyRows) > 0:
+            self.dataChanged.emit(self.index(int(proxyRows.min()), topLeft.column()),
+                                  self.index(int(proxyRows.max()), bottomRight.column()), roles)
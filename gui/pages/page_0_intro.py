@@ -18,11 +18,49 @@ If not, see <https://www.gnu.org/licenses/>.
 """
 
 import os
+import sys
 from typing import *
 from PyQt6 import QtWidgets, QtCore
 
+from dataimport.readXLS import supportedFileExtensions
+
 if TYPE_CHECKING:
     from dataimport.readXLS import XLSReader
+    from dataimport.dtypeCompaction import MemoryReport
+    from dataimport.sheetEstimate import SheetEstimate
+
+
+testRunning: bool = "pytest" in sys.modules
+
+
+class LoadingTask(QtCore.QObject):
+    """
+    Runs a loading function in a worker thread. The function receives a progress callback, which it calls with the
+    number of rows read so far, and which returns False once the task was cancelled.
+    """
+    Progress: QtCore.pyqtSignal = QtCore.pyqtSignal(int)
+    Finished: QtCore.pyqtSignal = QtCore.pyqtSignal(bool)  # True if completed, False if cancelled
+    Failed: QtCore.pyqtSignal = QtCore.pyqtSignal(str)
+
+    def __init__(self, loadFunc: Callable[[Callable[[int], bool]], bool]):
+        super(LoadingTask, self).__init__()
+        self._loadFunc: Callable[[Callable[[int], bool]], bool] = loadFunc
+        self._cancelled: bool = False
+
+    def cancel(self) -> None:
+        self._cancelled = True
+
+    def run(self) -> None:
+        try:
+            completed: bool = self._loadFunc(self._reportProgress)
+        except Exception as e:
+            self.Failed.emit(str(e))
+        else:
+            self.Finished.emit(completed and not self._cancelled)
+
+    def _reportProgress(self, numRows: int) -> bool:
+        self.Progress.emit(numRows)
+        return not self._cancelled
 
 
 class IntroPage(QtWidgets.QWizardPage):
@@ -39,8 +77,20 @@ class IntroPage(QtWidgets.QWizardPage):
 
         self._xlsReader: 'XLSReader' = xlsReader
         self._xlsLoaded: bool = False
+        self._sheetEstimates: Dict[str, 'SheetEstimate'] = {}  # Estimated size of the sheets of the opened files
         self._lblXLSLoaded: QtWidgets.QLabel = QtWidgets.QLabel("No File selected.")
 
+        self._loadingTask: Union[None, LoadingTask] = None
+        self._loadingThread: Union[None, QtCore.QThread] = None
+        self._onTaskFinished: Union[None, Callable[[], None]] = None  # Next step after the current task completed
+        self._progressBar: QtWidgets.QProgressBar = QtWidgets.QProgressBar()
+        self._progressBar.setRange(0, 0)
+        self._progressBar.setFormat("")
+        self._btnCancel: QtWidgets.QPushButton = QtWidgets.QPushButton("Cancel")
+        self._btnCancel.setMaximumWidth(150)
+        self._btnCancel.pressed.connect(self._cancelLoading)
+        self._setLoadingWidgetsVisible(False)
+
         layout: QtWidgets.QVBoxLayout = QtWidgets.QVBoxLayout()
         self.setLayout(layout)
 
@@ -48,45 +98,242 @@ class IntroPage(QtWidgets.QWizardPage):
         self._btnLoadXLS.pressed.connect(self._loadXLSFile)
         self._btnLoadXLS.setMaximumWidth(150)
 
+        self._checkUseCache: QtWidgets.QCheckBox = QtWidgets.QCheckBox("Cache parsed sheets for faster reopening")
+        self._checkUseCache.setToolTip(f"Parsed sheets are stored in {xlsReader.getSheetCache().getDirectory()}")
+        self._checkUseCache.toggled.connect(self._xlsReader.setUseCache)
+        self._checkUseCache.setChecked(True)
+        self._xlsReader.setUseCache(self._checkUseCache.isChecked())
+
+        self._checkCompact: QtWidgets.QCheckBox = QtWidgets.QCheckBox("Compact memory of loaded sheets")
+        self._checkCompact.setToolTip("Stores repetitive text columns as categories and numbers in smaller types, "
+                                      "without changing any value. Recommended for very large sheets.")
+        self._checkCompact.setChecked(self._xlsReader.getCompactSheets())
+        self._checkCompact.toggled.connect(self._xlsReader.setCompactSheets)
+
         layout.addWidget(QtWidgets.QLabel("Please load the excel file and connect to the database."))
         layout.addWidget(self._btnLoadXLS)
         layout.addWidget(self._lblXLSLoaded)
+        layout.addWidget(self._progressBar)
+        layout.addWidget(self._btnCancel)
+        layout.addWidget(self._checkUseCache)
+        layout.addWidget(self._checkCompact)
 
     def isComplete(self) -> bool:
         return self._xlsLoaded
 
     def _loadXLSFile(self, preferredSheetName: str = "") -> None:
         """
-        Loads the excel file that is going to be used as source for the particle data.
+        Loads the excel file(s) that are going to be used as source for the particle data. The files are opened and
+        the chosen sheets are parsed in a worker thread. Only afterwards the active sheet is set and the page is
+        complete. If multiple sheets or files are chosen, they are merged into one source.
         :param preferredSheetName: Can be provided to directly set this sheet as active sheet. Used for unit-testing
         :return:
         """
-        fname: str = self._getXLSFileName()
-        if fname:
-            assert os.path.exists(fname), f'The specified file {fname} was not found.'
-            self._xlsReader.readXlsFile(fname)
-            sheetNames: List[str] = self._xlsReader.getSheetNames()
-            if preferredSheetName:
-                assert preferredSheetName in sheetNames
-                self._setActiveSheet(preferredSheetName, fname)
+        fnames: List[str] = self._getXLSFileNames()
+        if len(fnames) > 0:
+            for fname in fnames:
+                assert os.path.exists(fname), f'The specified file {fname} was not found.'
+            fileDescription: str = f"file '{os.path.basename(fnames[0])}'" if len(fnames) == 1 \
+                else f"{len(fnames)} files"
+            self._xlsLoaded = False
+            self.completeChanged.emit()
+            self._lblXLSLoaded.setText(f"Opening {fileDescription}...")
+            self._runLoadingTask(lambda _: self._openFiles(fnames),
+                                 lambda: self._chooseSheet(fileDescription, preferredSheetName))
+
+    def _openFiles(self, fnames: List[str]) -> bool:
+        """
+        Opens the files and estimates the size of their sheets from the sheet metadata, before any sheet is parsed.
+        """
+        self._xlsReader.readXlsFiles(fnames)
+        self._sheetEstimates = {}
+        for sheetName in self._xlsReader.getSheetNames():
+            try:
+                self._sheetEstimates[sheetName] = self._xlsReader.estimateSheets([sheetName])
+            except AssertionError:  # The sheet is missing in one of the other files, it can not be chosen anyway
+                pass
+        return True
+
+    def _chooseSheet(self, fileDescription: str, preferredSheetName: str) -> None:
+        sheetNames: List[str] = self._xlsReader.getSheetNames()
+        if preferredSheetName:
+            assert preferredSheetName in sheetNames
+            self._loadSheets([preferredSheetName], fileDescription)
+        elif len(sheetNames) == 1:  # e.g., csv files
+            self._loadSheets(sheetNames, fileDescription)
+        else:
+            chooser: SheetChooser = SheetChooser(sheetNames, self._sheetEstimates, self)
+            if chooser.exec() == QtWidgets.QDialog.DialogCode.Accepted and len(chooser.getSelectedSheets()) > 0:
+                self._loadSheets(chooser.getSelectedSheets(), fileDescription)
             else:
-                sheet, ok = QtWidgets.QInputDialog.getItem(self, "Choose datasheet",
-                                                           "Choose which sheets to use as data source",
-                                                           sheetNames)
-                if ok and sheet:
-                    self._setActiveSheet(sheet, fname)
+                self._lblXLSLoaded.setText("No File selected.")
 
-    def _setActiveSheet(self, sheetName: str, fname: str) -> None:
+    def _loadSheets(self, sheetNames: List[str], fileDescription: str) -> None:
+        try:
+            self._xlsReader.setActiveSheets(sheetNames)
+        except AssertionError as e:  # e.g., the sheets to merge have different columns
+            self._loadingTaskFailed(str(e))
+            return
+        sheetName: str = self._xlsReader.getActiveSheetName()
+        self._lblXLSLoaded.setText(f"Reading sheet '{sheetName}'...")
+        self._runLoadingTask(self._loadAndProfileActiveSheet, lambda: self._setActiveSheet(sheetName, fileDescription))
+
+    def _loadAndProfileActiveSheet(self, progressCallback: Callable[[int], bool]) -> bool:
+        """
+        Parses the active sheet and profiles its columns, the profiles are shown when assigning the particle columns.
+        """
+        loaded: bool = self._xlsReader.loadActiveSheet(progressCallback)
+        if loaded:
+            self._xlsReader.profileActiveSheet()
+        return loaded
+
+    def _setActiveSheet(self, sheetName: str, fileDescription: str) -> None:
         self._xlsReader.setActiveSheet(sheetName)
         self._xlsLoaded = True
-        self._lblXLSLoaded.setText(f"Loaded sheet '{sheetName}' of file '{os.path.basename(fname)}'.")
+        loadedText: str = f"Loaded sheet '{sheetName}' of {fileDescription}."
+        memoryReport: Union[None, 'MemoryReport'] = self._xlsReader.getMemoryReport(sheetName)
+        if memoryReport is not None:
+            loadedText += f"\nCompacted memory: {memoryReport.getSummary()}"
+        self._lblXLSLoaded.setText(loadedText)
         self.ActiveSheetSet.emit()
         self.completeChanged.emit()
 
-    def _getXLSFileName(self) -> str:
+    def _runLoadingTask(self, loadFunc: Callable[[Callable[[int], bool]], bool],
+                        onFinished: Callable[[], None]) -> None:
         """
-        Prompts for the excel file name.
+        Runs the loading function in a worker thread, showing the progress, and calls onFinished afterwards,
+        unless loading was cancelled or failed. During unit tests, the task runs directly in the calling thread.
+        :param loadFunc: The loading function, receiving a progress callback (see LoadingTask)
+        :param onFinished: The function to call once loading completed.
         :return:
         """
-        fname, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Select the Excel file", filter="*xlsx *xls")
-        return fname
+        self._onTaskFinished = onFinished
+        self._loadingTask = LoadingTask(loadFunc)
+        self._loadingTask.Progress.connect(self._showProgress)
+        self._loadingTask.Finished.connect(self._loadingTaskFinished)
+        self._loadingTask.Failed.connect(self._loadingTaskFailed)
+        self._btnLoadXLS.setDisabled(True)
+        self._progressBar.setRange(0, 0)
+        self._progressBar.setFormat("")
+        self._setLoadingWidgetsVisible(True)
+
+        if testRunning:
+            self._loadingTask.run()
+        else:
+            self._loadingThread = QtCore.QThread()
+            self._loadingTask.moveToThread(self._loadingThread)
+            self._loadingThread.started.connect(self._loadingTask.run)
+            self._loadingThread.start()
+
+    def _showProgress(self, numRows: int) -> None:
+        self._progressBar.setFormat(f"{numRows} rows read")
+
+    def _cancelLoading(self) -> None:
+        if self._loadingTask is not None:
+            self._loadingTask.cancel()
+            self._btnCancel.setDisabled(True)
+
+    def _loadingTaskFinished(self, completed: bool) -> None:
+        self._endLoadingTask()
+        if completed:
+            self._onTaskFinished()
+        else:
+            self._lblXLSLoaded.setText("Loading was cancelled.")
+
+    def _loadingTaskFailed(self, errMsg: str) -> None:
+        self._endLoadingTask()
+        self._lblXLSLoaded.setText("No File selected.")
+        msg: str = f"Loading the file failed with error:\n{errMsg}"
+        if not testRunning:
+            QtWidgets.QMessageBox.about(self, "Error", msg)
+        else:
+            print(f"\n{msg}")
+
+    def _endLoadingTask(self) -> None:
+        if self._loadingThread is not None:
+            self._loadingThread.quit()
+            self._loadingThread.wait()
+        self._loadingThread = None
+        self._loadingTask = None
+        self._btnLoadXLS.setDisabled(False)
+        self._btnCancel.setDisabled(False)
+        self._setLoadingWidgetsVisible(False)
+
+    def _setLoadingWidgetsVisible(self, visible: bool) -> None:
+        self._progressBar.setVisible(visible)
+        self._btnCancel.setVisible(visible)
+
+    def _getXLSFileNames(self) -> List[str]:
+        """
+        Prompts for the excel file names. Multiple files are merged, e.g., the files of the filters of one sample.
+        :return:
+        """
+        fileFilter: str = " ".join(f"*{extension}" for extension in supportedFileExtensions)
+        fnames, _ = QtWidgets.QFileDialog.getOpenFileNames(self, "Select the Excel file(s)",
+                                                           filter=f"Particle Data ({fileFilter});;All Files (*)")
+        return fnames
+
+
+class SheetChooser(QtWidgets.QDialog):
+    """
+    Dialog for choosing the sheet(s) to use as particle data source. Selecting multiple sheets merges them.
+    The estimated size and loading time of the sheets are shown, so that large sheets can be recognized before
+    loading them.
+    """
+    def __init__(self, sheetNames: List[str], sheetEstimates: Optional[Dict[str, 'SheetEstimate']] = None,
+                 parent: Optional[QtWidgets.QWidget] = None):
+        super(SheetChooser, self).__init__(parent)
+        self.setWindowTitle("Choose datasheet")
+        self._sheetEstimates: Dict[str, 'SheetEstimate'] = sheetEstimates if sheetEstimates is not None else {}
+        self._sheetList: QtWidgets.QListWidget = QtWidgets.QListWidget()
+        self._sheetList.setSelectionMode(QtWidgets.QAbstractItemView.SelectionMode.ExtendedSelection)
+        for sheetName in sheetNames:
+            item: QtWidgets.QListWidgetItem = QtWidgets.QListWidgetItem(sheetName)
+            item.setData(QtCore.Qt.ItemDataRole.UserRole, sheetName)
+            if sheetName in self._sheetEstimates.keys():
+                item.setText(f"{sheetName}   ({self._sheetEstimates[sheetName].getSummary()})")
+            self._sheetList.addItem(item)
+        self._sheetList.itemDoubleClicked.connect(self.accept)
+        self._sheetList.itemSelectionChanged.connect(self._updateEstimate)
+        self._lblEstimate: QtWidgets.QLabel = QtWidgets.QLabel()
+        self._lblEstimate.setWordWrap(True)
+        self._sheetList.setCurrentRow(0)
+
+        buttons: QtWidgets.QDialogButtonBox = QtWidgets.QDialogButtonBox(
+            QtWidgets.QDialogButtonBox.StandardButton.Ok | QtWidgets.QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        layout: QtWidgets.QVBoxLayout = QtWidgets.QVBoxLayout()
+        self.setLayout(layout)
+        layout.addWidget(QtWidgets.QLabel("Choose which sheets to use as data source.\n"
+                                          "Select multiple sheets (with Ctrl or Shift) to merge sheets with "
+                                          "identical columns, e.g., one sheet per filter."))
+        layout.addWidget(self._sheetList)
+        layout.addWidget(self._lblEstimate)
+        layout.addWidget(buttons)
+        self._updateEstimate()
+
+    def getSelectedSheets(self) -> List[str]:
+        """
+        Returns the selected sheet names, in the order of the sheets.
+        """
+        return [self._sheetList.item(row).data(QtCore.Qt.ItemDataRole.UserRole)
+                for row in range(self._sheetList.count()) if self._sheetList.item(row).isSelected()]
+
+    def _updateEstimate(self) -> None:
+        """
+        Shows the estimated size of the selected sheets, with a hint for sheets that take long to load.
+        """
+        selectedSheets: List[str] = self.getSelectedSheets()
+        if len(selectedSheets) == 0 or any(sheetName not in self._sheetEstimates for sheetName in selectedSheets):
+            self._lblEstimate.setText("")
+            return
+        estimate: 'SheetEstimate' = self._sheetEstimates[selectedSheets[0]]
+        for sheetName in selectedSheets[1:]:
+            estimate = estimate + self._sheetEstimates[sheetName]
+        text: str = f"Selection: {estimate.getSummary()}."
+        if estimate.isLarge():
+            text += "\nThis is a large selection. Caching parsed sheets avoids parsing it again when reopening " \
+                    "the file, compacting the memory reduces the memory needed for it."
+        self._lblEstimate.setText(text)
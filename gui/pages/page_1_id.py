@@ -40,7 +40,7 @@ class IDPage(QtWidgets.QWizardPage):
 
         self._tableItem: 'IdentificationTable' = tableItem
 
-        self._btnRLABO: SelectorPushButton = SelectorPushButton(getLabCode(),
+        self._btnRLABO: SelectorPushButton = SelectorPushButton(getLabCode,
                                                                 self._tableItem.setReportingLab,
                                                                 self.completeChanged)
 
@@ -49,7 +49,7 @@ class IDPage(QtWidgets.QWizardPage):
         self._inpYEAR.setToolTip("Will be created from SDATE if blank.")
         self._inpYEAR.editingFinished.connect(self._checkYearInput)
 
-        self._btnShip: SelectorPushButton = SelectorPushButton(getShipCode(),
+        self._btnShip: SelectorPushButton = SelectorPushButton(getShipCode,
                                                                self._tableItem.setShipCode,
                                                                self.completeChanged)
         self._btnShip.setToolTip("""Search for "Unspecified" when ships are not used.  Minimum requirement is an "AA.." code.""")
@@ -62,7 +62,7 @@ class LocationPage(QtWidgets.QWizardPage):
         self._tableItem.setLongitude(self._spinLong.value())
         self._tableItem.setLatitude(self._spinLat.value())
 
-        self._btnPOSYS: SelectorPushButton = SelectorPushButton(getPositioningSystems(), self._tableItem.setPosSystem,
+        self._btnPOSYS: SelectorPushButton = SelectorPushButton(getPositioningSystems, self._tableItem.setPosSystem,
                                                                 self.completeChanged)
         self._lineEditStatName: QtWidgets.QLineEdit = QtWidgets.QLineEdit(self)
         self._lineEditStatName.editingFinished.connect(self._checkStationName)
@@ -87,7 +87,7 @@ class LocationPage(QtWidgets.QWizardPage):
         self._spinMinDepth.Changed.connect(self._minDepthChanged)
         self._spinMaxDepth.Changed.connect(self._maxDepthChanged)
 
-        self._btnSubstrType: SelectorPushButton = SelectorPushButton(getSubstrateTypes(), self._tableItem.setSubstrateType,
+        self._btnSubstrType: SelectorPushButton = SelectorPushButton(getSubstrateTypes, self._tableItem.setSubstrateType,
                                                                      self.completeChanged)
         self._spinPercCovered: CheckableSpinBox = CheckableSpinBox()
         self._spinPercCovered.setMinimum(0)
@@ -43,15 +43,15 @@ class SamplePage(QtWidgets.QWizardPage):
 
         self._tableItem: 'SampleTable' = tableItem
 
-        self._btnDType: SelectorPushButton = SelectorPushButton(getSampleDTypes(), self._tableItem.setDType,
+        self._btnDType: SelectorPushButton = SelectorPushButton(getSampleDTypes, self._tableItem.setDType,
                                                                 self.completeChanged)
         self._editSampleNo: QtWidgets.QLineEdit = QtWidgets.QLineEdit()
         self._editSampleNo.setPlaceholderText("Any character 0–9, A–Z etc.")
         self._editSampleNo.setToolTip("Sample number / Sample identification for haul or group of individuals/cores/bottles collected at that time/place")
         self._editSampleNo.textChanged.connect(self._sampleNumberChanged)
-        self._btnInfFac: SelectorPushButton = SelectorPushButton(getInfluencingFactors(), self._tableItem.setInfluencingFactors,
+        self._btnInfFac: SelectorPushButton = SelectorPushButton(getInfluencingFactors, self._tableItem.setInfluencingFactors,
                                                                  self.completeChanged, allowMultiSelect=True)
-        self._btnMatrix: SelectorPushButton = SelectorPushButton(getMatrices(), self._tableItem.setMatrix,
+        self._btnMatrix: SelectorPushButton = SelectorPushButton(getMatrices, self._tableItem.setMatrix,
                                                                  self.completeChanged)
 
         self._spinSampleArea: QtWidgets.QSpinBox = QtWidgets.QSpinBox()
@@ -41,17 +41,17 @@ class AnalysisPage(QtWidgets.QWizardPage):
                          "Entries marked with * are mandatory.")
 
         self._tableItem: 'AnalysisTable' = tableItem
-        # self._btnLitRef: SelectorPushButton = SelectorPushButton(getLitterRefLists(), self._tableItem.setLitterRefList,
+        # self._btnLitRef: SelectorPushButton = SelectorPushButton(getLitterRefLists, self._tableItem.setLitterRefList,
         #                                                          self.completeChanged)  # Currently fixed, but might be needed to be exposed to UI again?
-        self._btnAnaltyicLab: SelectorPushButton = SelectorPushButton(getLabCode(), self._tableItem.setLab,
+        self._btnAnaltyicLab: SelectorPushButton = SelectorPushButton(getLabCode, self._tableItem.setLab,
                                                                       self.completeChanged)
-        self._btnRefSource: SelectorPushButton = SelectorPushButton(getRefSources(), self._tableItem.setRefSource,
+        self._btnRefSource: SelectorPushButton = SelectorPushButton(getRefSources, self._tableItem.setRefSource,
                                                                    self.completeChanged)
-        self._btnMethPretreat: SelectorPushButton = SelectorPushButton(getPretreatments(), self._tableItem.setMethPretreat,
+        self._btnMethPretreat: SelectorPushButton = SelectorPushButton(getPretreatments, self._tableItem.setMethPretreat,
                                                                    self.completeChanged, allowMultiSelect=True)
-        self._btnMethPuri: SelectorPushButton = SelectorPushButton(getPurifications(), self._tableItem.setMethodPurification,
+        self._btnMethPuri: SelectorPushButton = SelectorPushButton(getPurifications, self._tableItem.setMethodPurification,
                                                                    self.completeChanged)
-        self._btnMethAnal: SelectorPushButton = SelectorPushButton(getAnalyses(), self._tableItem.setMethodAnalysis,
+        self._btnMethAnal: SelectorPushButton = SelectorPushButton(getAnalyses, self._tableItem.setMethodAnalysis,
                                                                    self.completeChanged)
         layout: QtWidgets.QFormLayout = QtWidgets.QFormLayout()
         self.setLayout(layout)
@@ -42,9 +42,9 @@ class MonitoringPage(QtWidgets.QWizardPage):
 
         self._tableItem: 'MonitoringTable' = tableItem
 
-        self._btnPurpose: SelectorPushButton = SelectorPushButton(getMonitoringPurposes(), self._tableItem.setMonitoringPurpose,
+        self._btnPurpose: SelectorPushButton = SelectorPushButton(getMonitoringPurposes, self._tableItem.setMonitoringPurpose,
                                                                    self.completeChanged, allowMultiSelect=True)
-        self._btnProgramme: SelectorPushButton = SelectorPushButton(getMonitoringProgrammes(), self._tableItem.setProgramme,
+        self._btnProgramme: SelectorPushButton = SelectorPushButton(getMonitoringProgrammes, self._tableItem.setProgramme,
                                                                    self.completeChanged, allowMultiSelect=True)
         layout: QtWidgets.QFormLayout = QtWidgets.QFormLayout()
         self.setLayout(layout)
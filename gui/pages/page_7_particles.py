@@ -28,7 +28,7 @@ from gui.fieldSelectUI import SelectorPushButton
 if TYPE_CHECKING:
     from tables.table_7_particle import ParticleColumnMapping, CodeMappings
     from dataimport.readXLS import XLSReader
-    import pandas as pd
+    from dataimport.columnProfile import ColumnProfile
 
 
 testRunning: bool = "pytest" in sys.modules
@@ -40,8 +40,8 @@ class ParticlesPage(QtWidgets.QWizardPage):
     """
     elementWidth: int = 100
 
-    def __init__(self, tableItem: 'ParticleColumnMapping', createDFrameFunc: Callable[[], 'pd.DataFrame'],
-                 excelReader: 'XLSReader'):
+    def __init__(self, tableItem: 'ParticleColumnMapping', exportFunc: Callable[[str], None],
+                 excelReader: 'XLSReader', setAggregateFunc: Optional[Callable[[bool], None]] = None):
         super(ParticlesPage, self).__init__()
         self.setTitle("Analysis Information")
         self.setSubTitle("Please select which columns from the excel sheet to use for which database field.\n"
@@ -49,7 +49,7 @@ class ParticlesPage(QtWidgets.QWizardPage):
 
         self._tableItem: 'ParticleColumnMapping' = tableItem
         self._excelReader: XLSReader = excelReader
-        self._createDFrameFunc: Callable[[], pd.DataFrame] = createDFrameFunc
+        self._exportFunc: Callable[[str], None] = exportFunc  # Compiles all data and writes it to the given file
 
         self.setButtonText(QtWidgets.QWizard.WizardButton.FinishButton,
                            "Create And Save Litter Report File")
@@ -71,6 +71,18 @@ class ParticlesPage(QtWidgets.QWizardPage):
         for btn in [self._btnMapString2Shape, self._btnMapString2Type, self._btnMapString2Color]:
             btn.setDisabled(True)
 
+        self._lblSizeWarning: QtWidgets.QLabel = QtWidgets.QLabel()
+        self._lblSizeWarning.setStyleSheet("QLabel {color: red}")
+        self._lblSizeWarning.setWordWrap(True)
+
+        self._checkAggregate: QtWidgets.QCheckBox = QtWidgets.QCheckBox("Aggregate identical particles into counts")
+        self._checkAggregate.setToolTip("If checked, particles with identical size class, shape, type and color are "
+                                        "reported in one row, with the number of particles as VALUE.")
+        if setAggregateFunc is not None:
+            self._checkAggregate.toggled.connect(setAggregateFunc)
+        else:
+            self._checkAggregate.setDisabled(True)
+
         self.completeChanged.connect(self._columnAssignmentChanged)
 
     def validatePage(self) -> bool:
@@ -85,11 +97,7 @@ class ParticlesPage(QtWidgets.QWizardPage):
                 saveName += ".csv"
             try:
                 assert self.isComplete(), 'Error: The Particle Page is not yet completed.'
-                dframe: 'pd.DataFrame' = self._createDFrameFunc()
-                if "MPROG" in dframe.columns:
-                    colMprog: 'pd.Series' = dframe.pop("MPROG")  # remove mprog column
-                    dframe.insert(len(dframe.columns), "MPROG", colMprog)  # add to the end of the sheet. Somehow it has to be the last column....
-                dframe.to_csv(saveName, index=False)
+                self._exportFunc(saveName)
                 success = True
             except AssertionError as e:
                 errmsg: str = f"Data compilation failed with error:\n{e}"
@@ -112,17 +120,30 @@ class ParticlesPage(QtWidgets.QWizardPage):
         return fname
 
     def setupToAvailableColumns(self) -> None:
+        """
+        Creates the column selectors for the columns of the active sheet. If the columns were profiled when loading
+        the sheet, the selectors show a summary of the contents of each column.
+        :return:
+        """
         availableColumns = self._excelReader.getColumnsOfActiveSheet()
-        columnNameCodes: List[DomeCode] = [DomeCode(name, "FakeCode") for name in availableColumns]
+        profiles: Dict[str, 'ColumnProfile'] = self._excelReader.getColumnProfiles()
+        columnNameCodes: List[DomeCode] = []
+        for name in availableColumns:
+            if str(name) in profiles.keys():
+                profile: 'ColumnProfile' = profiles[str(name)]
+                columnNameCodes.append(DomeCode(name, profile.getSummary(), profile.getDetails()))
+            else:
+                columnNameCodes.append(DomeCode(name, "FakeCode"))
+        hideDescriptions: bool = len(profiles) == 0
 
         self._btnShape = SelectorPushButton(columnNameCodes, self._tableItem.setShapeColumn, self.completeChanged,
-                                            hideDescriptions=True)
+                                            hideDescriptions=hideDescriptions, showCodeOnly=True)
         self._btnSize = SelectorPushButton(columnNameCodes, self._tableItem.setSizeColumn, self.completeChanged,
-                                           hideDescriptions=True)
+                                           hideDescriptions=hideDescriptions, showCodeOnly=True)
         self._btnType = SelectorPushButton(columnNameCodes, self._tableItem.setPolymTypeColumn, self.completeChanged,
-                                           hideDescriptions=True)
+                                           hideDescriptions=hideDescriptions, showCodeOnly=True)
         self._btnColor = SelectorPushButton(columnNameCodes, self._tableItem.setColorColumn, self.completeChanged,
-                                            hideDescriptions=True)
+                                            hideDescriptions=hideDescriptions, showCodeOnly=True)
 
         layout: QtWidgets.QGridLayout = QtWidgets.QGridLayout()
         self.setLayout(layout)
@@ -131,6 +152,7 @@ class ParticlesPage(QtWidgets.QWizardPage):
         layout.addWidget(getIsMandatoryLabel(), 1, 0, 1, 3)
         layout.addWidget(QtWidgets.QLabel("Column Particle Size"), 2, 0)
         layout.addWidget(self._btnSize, 2, 1)
+        layout.addWidget(self._lblSizeWarning, 2, 2)
 
         layout.addWidget(getIsOptionalLabel(), 3, 0, 1, 3)
         layout.addWidget(QtWidgets.QLabel("Column Polymer Type"), 4, 0)
@@ -145,6 +167,8 @@ class ParticlesPage(QtWidgets.QWizardPage):
         layout.addWidget(self._btnColor, 6, 1)
         layout.addWidget(self._btnMapString2Color, 6, 2)
 
+        layout.addWidget(self._checkAggregate, 7, 0, 1, 3)
+
     def isComplete(self) -> bool:
         return self._tableItem.correctlySet()
 
@@ -156,7 +180,7 @@ class ParticlesPage(QtWidgets.QWizardPage):
         polymTypeColumn: Union[None, 'DomeCode'] = self._tableItem.getPolymTypeColumn()
         assert polymTypeColumn is not None, "The Type Column was not yet defined!"
         columnName: str = polymTypeColumn.code
-        availableCodes: List['DomeCode'] = getPolymerTypes()
+        availableCodes: Sequence['DomeCode'] = getPolymerTypes()
         self._launchCodeMapper(availableCodes, columnName, self._tableItem.setTypeMapping)
 
     def _mapShapeCodes(self) -> None:
@@ -167,7 +191,7 @@ class ParticlesPage(QtWidgets.QWizardPage):
         shapeColumn: Union[None, 'DomeCode'] = self._tableItem.getShapeColumn()
         assert shapeColumn is not None, "The Shape Column was not yet defined!"
         columnName: str = shapeColumn.code
-        availableCodes: List['DomeCode'] = getShapeParams()
+        availableCodes: Sequence['DomeCode'] = getShapeParams()
         self._launchCodeMapper(availableCodes, columnName, self._tableItem.setShapeMapping)
 
     def _mapColorCodes(self) -> None:
@@ -178,10 +202,10 @@ class ParticlesPage(QtWidgets.QWizardPage):
         colorColumn: Union[None, 'DomeCode'] = self._tableItem.getColorColumn()
         assert colorColumn is not None, "The Color Column was not yet defined!"
         columnName: str = colorColumn.code
-        availableCodes: List['DomeCode'] = getLitterProperties()
+        availableCodes: Sequence['DomeCode'] = getLitterProperties()
         self._launchCodeMapper(availableCodes, columnName, self._tableItem.setColorMapping)
 
-    def _launchCodeMapper(self, availableCodes: List['DomeCode'], columnName: str,
+    def _launchCodeMapper(self, availableCodes: Sequence['DomeCode'], columnName: str,
                           updateDictFunc: Callable[[Dict[str, 'DomeCode']], None]):
         """
         Launches (i.e., set up and show) the CodeMapper with the available Codes and the name of the column in the
@@ -191,7 +215,7 @@ class ParticlesPage(QtWidgets.QWizardPage):
         :param updateDictFunc: The function used to save the result dictionary mapping to
         :return:
         """
-        entriesInExcel: Set[str] = self._excelReader.getUniqueColumnContentsAsString(columnName)
+        entriesInExcel: Dict[str, int] = self._excelReader.getUniqueColumnContentsWithCounts(columnName)
         if len(entriesInExcel) > 0:
             self._codeMapper.setUp(entriesInExcel, availableCodes, updateDictFunc)
             if not testRunning:
@@ -205,7 +229,8 @@ class ParticlesPage(QtWidgets.QWizardPage):
 
     def _columnAssignmentChanged(self) -> None:
         """
-        Called when a column assignment was changed. Enables/Disables the corresponding codeMapButtons.
+        Called when a column assignment was changed. Enables/Disables the corresponding codeMapButtons and warns if
+        the size column contains entries that are not numbers.
         :return:
         """
         selectorBtns = [self._btnShape, self._btnColor, self._btnType]
@@ -214,6 +239,15 @@ class ParticlesPage(QtWidgets.QWizardPage):
         for selBtn, mapBtn in zip(selectorBtns, mapBtns):
             mapBtn.setDisabled(selBtn.text() == selBtn.DefaultText)
 
+        warning: str = ""
+        sizeColumn: Union[None, 'DomeCode'] = self._tableItem.getSizeColumn()
+        if sizeColumn is not None:
+            profile: Union[None, 'ColumnProfile'] = self._excelReader.getColumnProfiles().get(str(sizeColumn.code))
+            if profile is not None and not profile.isNumeric():
+                warning = f"Column '{sizeColumn.code}' does not contain only numbers ({profile.kind}), " \
+                          f"the export will fail."
+        self._lblSizeWarning.setText(warning)
+
 
 class CodeMapper(QtWidgets.QWidget):
     CodeMappingChanged: QtCore.pyqtSignal = QtCore.pyqtSignal()
@@ -228,6 +262,7 @@ class CodeMapper(QtWidgets.QWidget):
         self._codeDict: Dict[str, Union['DomeCode']] = {}
         self._setResultFunc: Optional[Callable[[Dict[str, 'DomeCode']], None]] = None
         self._lbls: List[QtWidgets.QLabel] = []
+        self._countLbls: List[QtWidgets.QLabel] = []
         self._btns: List[SelectorPushButton] = []
         self._btnAccept: QtWidgets.QPushButton = QtWidgets.QPushButton("Accept")
         self._btnAccept.setMaximumWidth(150)
@@ -236,11 +271,12 @@ class CodeMapper(QtWidgets.QWidget):
         layout.addLayout(self._gridLayout)
         layout.addWidget(self._btnAccept)
 
-    def setUp(self, lblsFromExcel: Set[str], availableCodes: List['DomeCode'],
+    def setUp(self, lblsFromExcel: Union[Set[str], Dict[str, int]], availableCodes: Sequence['DomeCode'],
               setResultFunc: Callable[[Dict[str, 'DomeCode']], None]) -> None:
         """
         Sets up the dialog windot to allow mapping between specific entry sets.
-        :param lblsFromExcel: The available (unique) labels from the Excel file
+        :param lblsFromExcel: The available (unique) labels from the Excel file. If given as dictionary with the number
+        of occurrences as values, the labels are listed from the most to the least frequent one.
         :param availableCodes: The available Dome codes to map to
         :param setResultFunc: The function to call when pressing the "Accept" button.
         :return:
@@ -250,16 +286,22 @@ class CodeMapper(QtWidgets.QWidget):
         self._setResultFunc = setResultFunc
 
         self._gridLayout.addWidget(QtWidgets.QLabel("Entry from Excel"), 0, 0)
-        self._gridLayout.addWidget(QtWidgets.QLabel("DOME Code"), 0, 1)
+        self._gridLayout.addWidget(QtWidgets.QLabel("Count"), 0, 1)
+        self._gridLayout.addWidget(QtWidgets.QLabel("DOME Code"), 0, 2)
 
         if len(lblsFromExcel) > 0:
-            for row, entry in enumerate(lblsFromExcel, start=1):
+            counts: Dict[str, int] = dict(lblsFromExcel) if isinstance(lblsFromExcel, dict) else {}
+            entries: List[str] = sorted(lblsFromExcel, key=lambda entry: -counts.get(entry, 0))
+            for row, entry in enumerate(entries, start=1):
                 lbl: QtWidgets.QLabel = QtWidgets.QLabel(entry)
+                countLbl: QtWidgets.QLabel = QtWidgets.QLabel(str(counts[entry]) if entry in counts else "")
                 btn: SelectorPushButton = SelectorPushButton(availableCodes, self._makeCodeAcceptFunc(entry))
                 self._lbls.append(lbl)
+                self._countLbls.append(countLbl)
                 self._btns.append(btn)
                 self._gridLayout.addWidget(lbl, row, 0)
-                self._gridLayout.addWidget(btn, row, 1)
+                self._gridLayout.addWidget(countLbl, row, 1)
+                self._gridLayout.addWidget(btn, row, 2)
                 self._codeDict[entry] = None
 
             self._gridLayout.setRowStretch(row, 1)
@@ -281,12 +323,13 @@ class CodeMapper(QtWidgets.QWidget):
                                                          "Please assign a code to each entry category and then proceed.")
 
     def _clearWidgetsAndLayout(self) -> None:
-        for lbl in self._lbls:
+        for lbl in self._lbls + self._countLbls:
             lbl.setParent(None)
         for btn in self._btns:
             btn.setParent(None)
 
         self._lbls = []
+        self._countLbls = []
         self._btns = []
 
         for i in reversed(range(self._gridLayout.count())):
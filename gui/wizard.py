@@ -64,7 +64,8 @@ class ParticleUploadWizard(QtWidgets.QWizard):
         self.addPage(self._monitoringPage)
 
         self._particlesPage: ParticlesPage = ParticlesPage(self._tableConverter.getParticleColumnAssignmentsTable(),
-                                                           self._tableConverter.createFinalDataFrame,
-                                                           self._tableConverter.getXLSReader())
+                                                           self._tableConverter.exportToCSV,
+                                                           self._tableConverter.getXLSReader(),
+                                                           self._tableConverter.setAggregateCounts)
         self._introPage.ActiveSheetSet.connect(self._particlesPage.setupToAvailableColumns)
         self.addPage(self._particlesPage)
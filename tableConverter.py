@@ -16,9 +16,9 @@ You should have received a copy of the GNU General Public License
 along with this program, see COPYING.
 If not, see <https://www.gnu.org/licenses/>.
 """
-from typing import List, TYPE_CHECKING, Optional, Dict, Tuple
+import os
+from typing import Optional, Tuple, Dict, Union, List
 import pandas as pd
-import numpy as np
 
 from tables.table_2_location import LocationTable
 from tables.table_1_id import IdentificationTable
@@ -26,17 +26,19 @@ from tables.table_3_time import TimeTable
 from tables.table_4_sample import SampleTable
 from tables.table_5_analysis import AnalysisTable
 from tables.table_6_monitoring import MonitoringTable
-from tables.table_7_particle import ParticleTable, ParticleColumnMapping
+from tables.table_7_particle import ParticleColumnMapping, ParticleTable, compileParticleColumns
 from dataimport.readXLS import XLSReader
-
-if TYPE_CHECKING:
-    from dataimport.domeCodes import DomeCode
+from dataexport.litterReport import LitterReport, aggregateParticleColumns
 
 
 class TableConverter:
     """
     Class for a collection of tables needed to write the new excel file format.
     """
+    _bytesPerOutputCell: int = 100  # Python string object of an output cell and its share of the csv text buffer
+    _processingOverhead: float = 3.0  # Accounts for temporary copies while parsing, compiling and writing a chunk
+    _minRowsPerChunk: int = 1000
+
     def __init__(self):
         self._xlsReader: XLSReader = XLSReader()
         self._idTable: IdentificationTable = IdentificationTable()
@@ -46,7 +48,8 @@ class TableConverter:
         self._monitoringTable: MonitoringTable = MonitoringTable()
         self._analysisTable: AnalysisTable = AnalysisTable()
         self._particleColMapping: ParticleColumnMapping = ParticleColumnMapping()
-        self._particleTables: List[ParticleTable] = []
+        self._memoryBudgetMB: float = 512.0  # Approximate memory limit for processing particle data during export
+        self._aggregateCounts: bool = False  # If True, identical particle rows are collapsed into counts
 
     def _allTablesComplete(self) -> Tuple[bool, str]:
         """
@@ -66,36 +69,93 @@ class TableConverter:
 
         return ok, msg
 
-    def createFinalDataFrame(self) -> pd.DataFrame:
+    def setMemoryBudget(self, megaBytes: float) -> None:
         """
-        Compiles all data into a dataframe.
+        Sets the approximate amount of memory to use for processing particle data when exporting to csv.
+        :param megaBytes: Memory budget in MB
         :return:
         """
-        dframe: pd.DataFrame = pd.DataFrame()
-        ok, errmsg = self._allTablesComplete()
-        assert ok, errmsg
+        assert megaBytes > 0, "The memory budget has to be positive."
+        self._memoryBudgetMB = megaBytes
 
-        self._createParticleTablesFromXLS()
+    def setAggregateCounts(self, aggregate: bool) -> None:
+        """
+        Sets whether identical particle rows are collapsed into one row with the number of particles as VALUE.
+        :param aggregate: If True, rows are aggregated. Otherwise each particle is reported in its own row.
+        :return:
+        """
+        self._aggregateCounts = aggregate
 
-        assert len(self._particleTables) > 0, "No Particles were created."
-        assert all([table.correctlySet() for table in self._particleTables]), "Not all of the particle tables are correct."
-        numParticles: int = len(self._particleTables)
+    def getAggregateCounts(self) -> bool:
+        return self._aggregateCounts
 
-        # First fill in all the data that is not per-particle
-        for table in [self._idTable, self._locationTable, self._timeTable, self._sampleTable, self._analysisTable,
-                      self._monitoringTable]:
-            for colName, entry in table.getCorrectlySetCodes().items():
-                dframe[colName] = [entry]*numParticles
+    def createLitterReport(self) -> LitterReport:
+        """
+        Compiles all data into a litter report.
+        :return:
+        """
+        ok, errmsg = self._allTablesComplete()
+        assert ok, errmsg
 
-        # Then add in all the per-particle data
-        for colName in self._particleTables[0].getPossibleColumns():
-            dframe[colName] = ""  # initializes empty columns for these possible entries
+        particleColumns: pd.DataFrame = self._createParticleColumnsFromXLS()
+        assert len(particleColumns) > 0, "No Particles were created."
+        report: LitterReport = LitterReport(self._getMetaData(), particleColumns)
+        if self._aggregateCounts:
+            report = report.aggregated()
+        return report
 
-        for i, ptable in enumerate(self._particleTables):
-            for colName, entry in ptable.getCorrectlySetCodes().items():
-                dframe[colName][i] = entry
+    def createFinalDataFrame(self) -> pd.DataFrame:
+        """
+        Compiles all data into a dataframe.
+        :return:
+        """
+        return self.createLitterReport().toDataFrame()
 
-        return dframe
+    def exportToCSV(self, fname: str) -> int:
+        """
+        Compiles all data and writes it into the given csv file. The particle sheet is read and processed in chunks
+        of rows, so that the memory needed stays within the memory budget, regardless of the number of particles.
+        When aggregating counts, the aggregated rows of all chunks are combined and written at the end.
+        The rows are written to a temporary file, which replaces the given file only if the export succeeds. So an
+        existing file is left untouched on errors.
+        :param fname: The csv file to write to, it must not be one of the files that are read
+        :return: The number of exported particles
+        """
+        ok, errmsg = self._allTablesComplete()
+        assert ok, errmsg
+        for inputFile in self._xlsReader.getFileNames():
+            if os.path.exists(fname) and os.path.exists(inputFile):
+                assert not os.path.samefile(fname, inputFile), \
+                    f"The output file {fname} is a file that is read, it must not be overwritten."
+
+        metaData: Dict[str, Union[str, float, int]] = self._getMetaData()
+        columns: List[str] = self._getMappedColumnNames()
+        rowsPerChunk: int = self._getRowsPerChunk(columns, len(metaData))
+        numParticles: int = 0
+        aggregatedColumns: Optional[pd.DataFrame] = None
+        tmpName: str = f"{fname}.{os.getpid()}.part"  # In the same directory, so that it can replace the file
+        try:
+            with open(tmpName, "w", newline="", encoding="utf-8") as fp:
+                for sheetChunk in self._xlsReader.iterActiveSheetChunks(rowsPerChunk, columns):
+                    particleColumns: pd.DataFrame = self._compileParticleColumns(sheetChunk)
+                    if self._aggregateCounts:
+                        if aggregatedColumns is not None:
+                            particleColumns = pd.concat([aggregatedColumns, particleColumns], ignore_index=True)
+                        aggregatedColumns = aggregateParticleColumns(particleColumns)
+                    else:
+                        LitterReport(metaData, particleColumns).appendToCSV(fp, writeHeader=numParticles == 0,
+                                                                            chunkSize=rowsPerChunk)
+                    numParticles += len(sheetChunk)
+
+                if aggregatedColumns is not None:
+                    LitterReport(metaData, aggregatedColumns).appendToCSV(fp, writeHeader=True, chunkSize=rowsPerChunk)
+            assert numParticles > 0, "No Particles were created."
+            os.replace(tmpName, fname)
+        except Exception:
+            if os.path.exists(tmpName):
+                os.remove(tmpName)  # Do not leave an incomplete file
+            raise
+        return numParticles
 
     def getXLSReader(self) -> XLSReader:
         return self._xlsReader
@@ -121,50 +181,68 @@ class TableConverter:
     def getParticleColumnAssignmentsTable(self) -> ParticleColumnMapping:
         return self._particleColMapping
 
-    def _createParticleTablesFromXLS(self) -> None:
+    def _createParticleColumnsFromXLS(self) -> pd.DataFrame:
         """
-        Uses the information from the particleColumnAssignments and populates the list of particleTables.
-        :return:
+        Uses the information from the particleColumnAssignments and converts the columns of the active sheet
+        into the per-particle output columns.
+        :return: DataFrame with one row per particle
         """
-        self._particleTables = []
-        assert self._particleColMapping.getSizeColumn() is not None, "Size Column not yet set!"
-        activeDF: pd.DataFrame = self._xlsReader.getActiveSheet()
+        mappedColumns: pd.DataFrame = self._xlsReader.getActiveSheetColumns(self._getMappedColumnNames())
+        return self._compileParticleColumns(mappedColumns)
 
-        sizes: pd.Series = activeDF[self._particleColMapping.getSizeColumn().code]
+    def _compileParticleColumns(self, sheet: pd.DataFrame) -> pd.DataFrame:
+        """
+        Converts the assigned columns of the given (part of the) particle sheet into the per-particle output columns.
+        :param sheet: Dataframe containing (at least) the assigned columns.
+        :return: DataFrame with one row per particle
+        """
+        assert self._particleColMapping.getSizeColumn() is not None, "Size Column not yet set!"
+        sizes: pd.Series = sheet[self._particleColMapping.getSizeColumn().code]
         types: Optional[pd.Series] = None
         if self._particleColMapping.getPolymTypeColumn():
-            types = activeDF[self._particleColMapping.getPolymTypeColumn().code]
-            assert len(types) == len(sizes), "Number of entries in Type column does not equal number of entries in Size column"
+            types = sheet[self._particleColMapping.getPolymTypeColumn().code]
         colors: Optional[pd.Series] = None
         if self._particleColMapping.getColorColumn():
-            colors = activeDF[self._particleColMapping.getColorColumn().code]
-            assert len(colors) == len(sizes), "Number of entries in Color column does not equal number of entries in Size column"
+            colors = sheet[self._particleColMapping.getColorColumn().code]
         shapes: Optional[pd.Series] = None
         if self._particleColMapping.getShapeColumn():
-            shapes = activeDF[self._particleColMapping.getShapeColumn().code]
-            assert len(shapes) == len(sizes), "Number of entries in Shape column does not equal number of entries in Size column"
-
-        mapColor: Dict[str, DomeCode] = self._particleColMapping.getColorMapping()
-        mapType: Dict[str, DomeCode] = self._particleColMapping.getTypeMapping()
-        mapShape: Dict[str, DomeCode] = self._particleColMapping.getShapeMapping()
-
-        numParticles: int = activeDF.shape[0]
-        for i in range(numParticles):
-            partTable: ParticleTable = ParticleTable()
-            partTable.setSize(sizes[i])
-            if colors is not None and self._notEmpty(colors[i]):
-                partTable.setColor(mapColor[colors[i]])
-            if types is not None and self._notEmpty(types[i]):
-                partTable.setPolymType(mapType[types[i]])
-            if shapes is not None and self._notEmpty(shapes[i]):
-                partTable.setShape(mapShape[shapes[i]])
-
-            assert partTable.correctlySet()
-            self._particleTables.append(partTable)
-
-    def _notEmpty(self, entry) -> bool:
-        notEmpty: bool = True
-        if type(entry) == np.float64 or type(entry) == float:
-            if np.isnan(entry):
-                notEmpty = False
-        return notEmpty
+            shapes = sheet[self._particleColMapping.getShapeColumn().code]
+
+        return compileParticleColumns(sizes, types, shapes, colors,
+                                      mapType=self._particleColMapping.getTypeMapping(),
+                                      mapShape=self._particleColMapping.getShapeMapping(),
+                                      mapColor=self._particleColMapping.getColorMapping())
+
+    def _getMetaData(self) -> Dict[str, Union[str, float, int]]:
+        """
+        Returns the codes of all tables that are not per-particle, i.e., that are identical for all rows.
+        """
+        metaData: Dict[str, Union[str, float, int]] = {}
+        for table in [self._idTable, self._locationTable, self._timeTable, self._sampleTable, self._analysisTable,
+                      self._monitoringTable]:
+            metaData.update(table.getCorrectlySetCodes())
+        return metaData
+
+    def _getMappedColumnNames(self) -> List[str]:
+        """
+        Returns the names of the columns of the particle sheet that are assigned to particle fields.
+        """
+        assert self._particleColMapping.getSizeColumn() is not None, "Size Column not yet set!"
+        columns: List[str] = []
+        for column in [self._particleColMapping.getSizeColumn(), self._particleColMapping.getPolymTypeColumn(),
+                       self._particleColMapping.getColorColumn(), self._particleColMapping.getShapeColumn()]:
+            if column is not None and column.code not in columns:
+                columns.append(column.code)
+        return columns
+
+    def _getRowsPerChunk(self, columns: List[str], numMetaColumns: int) -> int:
+        """
+        Determines how many rows of the particle sheet can be processed at once within the memory budget.
+        :param columns: The columns read from the particle sheet
+        :param numMetaColumns: The number of metadata columns in the output
+        :return: number of rows
+        """
+        numOutputColumns: int = numMetaColumns + len(ParticleTable().getPossibleColumns())
+        bytesPerRow: float = self._xlsReader.estimateBytesPerRow(columns) + numOutputColumns*self._bytesPerOutputCell
+        rowsPerChunk: int = int(self._memoryBudgetMB * 1024**2 / (bytesPerRow * self._processingOverhead))
+        return max(rowsPerChunk, self._minRowsPerChunk)
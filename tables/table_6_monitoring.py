@@ -17,10 +17,9 @@ along with this program, see COPYING.
 If not, see <https://www.gnu.org/licenses/>.
 """
 
-from typing import Union, Dict, List
-from dataclasses import dataclass, field
+from typing import Union, Dict
 
-from dataimport.domeCodes import DomeCode, getLitterSizes
+from dataimport.domeCodes import DomeCode
 from tables.tableItem import TableItem, Field
 
 
@@ -17,10 +17,12 @@ along with this program, see COPYING.
 If not, see <https://www.gnu.org/licenses/>.
 """
 
-from typing import Union, Dict, List
+from typing import Union, Dict, List, Optional, Sequence, Tuple
 from dataclasses import dataclass, field
+import numpy as np
+import pandas as pd
 
-from dataimport.domeCodes import DomeCode, getLitterSizes
+from dataimport.domeCodes import DomeCode, getLitterSizes, getVocabularyRegistry
 from tables.tableItem import TableItem, Field
 
 
@@ -128,6 +130,10 @@ class ParticleTable(TableItem):
     TYPPL	Type of polymer	https://vocab.ices.dk/?ref=1385
     LTPRP	Litter properties (including polymer shapes and colours)	https://vocab.ices.dk/?ref=1403
     """
+    defaultParam: DomeCode = DomeCode("LTT-249", "Litter - <5mm plastic particle")
+    defaultMunit: DomeCode = DomeCode("items", "Measurement unit")
+    defaultValue: DomeCode = DomeCode("1", "Value")
+
     def __init__(self):
         super(ParticleTable, self).__init__("Particle")
         self._param: Field = Field("Parameter")
@@ -138,11 +144,11 @@ class ParticleTable(TableItem):
         self._ltprp: Field = Field("Litter Properties", mandatory=False)
 
         # Set some defaults
-        self._param.content = DomeCode("LTT-249", "Litter - <5mm plastic particle")
-        self._munit.content = DomeCode("items", "Measurement unit")
-        self._value.content = DomeCode("1", "Value")
+        self._param.content = self.defaultParam
+        self._munit.content = self.defaultMunit
+        self._value.content = self.defaultValue
 
-        self._litterSizes: List['DomeCode'] = getLitterSizes()
+        self._sizeBins: LitterSizeBins = getLitterSizeBins()
 
         self._fields = [self._param, self._size, self._munit, self._value, self._typpl, self._ltprp]
 
@@ -182,23 +188,136 @@ class ParticleTable(TableItem):
         self._param.content = code
 
     def _getSizeCodeOfSize(self, size: float) -> DomeCode:
-        code: Union[DomeCode, None] = None
-        for sizeCode in self._litterSizes:
-            if sizeCode.descr.find("<=100 um") > 0:
-                if size <= 100:
-                    code = sizeCode
-                    break
-            else:
-                factor: float = 1.0  # i.e., startswith "micron"
-                if sizeCode.descr.startswith("mm"):
-                    factor = 1000
-                elif sizeCode.descr.startswith("cm"):
-                    factor = 10000
-
-                limitString: str = sizeCode.descr.split(" ")[1]
-                low, high = float(limitString.split("-")[0])*factor, float(limitString.split("-")[1])*factor
-                if low <= round(size) <= high:
-                    code = sizeCode
-                    break
-        assert code is not None, f"Code for size {size} could not be found."
-        return code
+        index: int = int(self._sizeBins.classify(np.array([size], dtype=float))[0])
+        assert index >= 0, f"Code for size {size} could not be found."
+        return self._sizeBins.codes[index]
+
+
+class LitterSizeBins:
+    """
+    The litter size vocabulary (LTSZC), compiled into sorted and non-overlapping numeric bins (in micrometer).
+    A size belongs to a bin if its rounded value lies within the bin edges (both inclusive). Where two bins of the
+    vocabulary share an edge, the bin listed first in the vocabulary keeps it.
+    """
+    def __init__(self, litterSizes: Sequence[DomeCode]):
+        bins: List[Tuple[float, float, int]] = []  # lower edge, upper edge, position in vocabulary
+        for priority, sizeCode in enumerate(litterSizes):
+            low, high = self._getLimitsOfDescription(sizeCode.descr)
+            bins.append((low, high, priority))
+        bins.sort()
+
+        for i in range(1, len(bins)):
+            prevLow, prevHigh, prevPriority = bins[i-1]
+            low, high, priority = bins[i]
+            if low <= prevHigh:
+                assert high > prevHigh, f"Size class {litterSizes[priority].descr} lies within " \
+                                        f"{litterSizes[prevPriority].descr}"
+                if prevPriority < priority:
+                    bins[i] = (np.nextafter(prevHigh, np.inf), high, priority)
+                else:
+                    bins[i-1] = (prevLow, np.nextafter(low, -np.inf), prevPriority)
+
+        self.lowerEdges: np.ndarray = np.array([entry[0] for entry in bins], dtype=float)
+        self.upperEdges: np.ndarray = np.array([entry[1] for entry in bins], dtype=float)
+        self.codes: Tuple[DomeCode, ...] = tuple(litterSizes[entry[2]] for entry in bins)
+
+    def classify(self, sizes: np.ndarray) -> np.ndarray:
+        """
+        Determines the size class of each of the given sizes.
+        :param sizes: Array of sizes in micrometer
+        :return: Array of indices into self.codes, -1 for sizes that fall outside every bin (or are nan).
+        """
+        roundedSizes: np.ndarray = np.round(np.asarray(sizes, dtype=float))
+        indices: np.ndarray = np.searchsorted(self.lowerEdges, roundedSizes, side="right") - 1
+        inBin: np.ndarray = indices >= 0
+        inBin[inBin] = roundedSizes[inBin] <= self.upperEdges[indices[inBin]]
+        indices[~inBin] = -1
+        return indices
+
+    @staticmethod
+    def _getLimitsOfDescription(descr: str) -> Tuple[float, float]:
+        """
+        Parses descriptions such as "micron <=100 um", "mm 1.0-2.79 mm" or "cm 2.5-4.9 cm" into the size limits
+        in micrometer.
+        """
+        if descr.find("<=") > 0:
+            return -np.inf, float(descr.split("<=")[1].split(" ")[0])
+
+        factor: float = 1.0  # i.e., startswith "micron"
+        if descr.startswith("mm"):
+            factor = 1000
+        elif descr.startswith("cm"):
+            factor = 10000
+        limitString: str = descr.split(" ")[1]
+        return float(limitString.split("-")[0])*factor, float(limitString.split("-")[1])*factor
+
+
+def getLitterSizeBins() -> LitterSizeBins:
+    """
+    Returns the compiled litter size bins. They are created only once and shared via the vocabulary registry.
+    """
+    return getVocabularyRegistry().getOrCreate("LitterSizeBins", lambda: LitterSizeBins(getLitterSizes()))
+
+
+def compileParticleColumns(sizes: pd.Series, types: Optional[pd.Series] = None, shapes: Optional[pd.Series] = None,
+                           colors: Optional[pd.Series] = None, mapType: Optional[Dict[str, DomeCode]] = None,
+                           mapShape: Optional[Dict[str, DomeCode]] = None,
+                           mapColor: Optional[Dict[str, DomeCode]] = None) -> pd.DataFrame:
+    """
+    Columnar counterpart of the ParticleTable. Converts the per-particle columns of the excel sheet into the
+    per-particle output columns in one pass, without creating a ParticleTable per row.
+    Empty entries in the type, shape or color columns leave the according output at its default.
+    :param sizes: Particle sizes in micrometer
+    :param types: Polymer type labels, as given in the excel sheet
+    :param shapes: Particle shape labels, as given in the excel sheet
+    :param colors: Particle color labels, as given in the excel sheet
+    :param mapType: Mapping of polymer type labels to DomeCodes
+    :param mapShape: Mapping of shape labels to DomeCodes
+    :param mapColor: Mapping of color labels to DomeCodes
+    :return: DataFrame with the columns given by ParticleTable.getPossibleColumns()
+    """
+    numParticles: int = len(sizes)
+    sizeValues: np.ndarray = pd.to_numeric(pd.Series(sizes), errors="coerce").to_numpy(dtype=float)
+    assert not np.isnan(sizeValues).any(), "The size column contains empty or non-numeric entries."
+
+    sizeBins: LitterSizeBins = getLitterSizeBins()
+    binIndices: np.ndarray = sizeBins.classify(sizeValues)
+    outsideRows: np.ndarray = np.flatnonzero(binIndices < 0)
+    assert len(outsideRows) == 0, f"{len(outsideRows)} particle size(s) could not be assigned to a size class, " \
+                                  f"e.g., in row(s) {list(pd.Series(sizes).index[outsideRows[:10]])} " \
+                                  f"with size(s) {list(sizeValues[outsideRows[:10]])}."
+    sizeCodes: np.ndarray = np.array([code.code for code in sizeBins.codes], dtype=object)
+
+    columns: Dict[str, np.ndarray] = {
+        "PARAM": _mapLabelsToCodes(shapes, mapShape, numParticles, ParticleTable.defaultParam.code),
+        "LTSZC": sizeCodes[binIndices],
+        "MUNIT": np.full(numParticles, ParticleTable.defaultMunit.code, dtype=object),
+        "VALUE": np.full(numParticles, ParticleTable.defaultValue.code, dtype=object),
+        "TYPPL": _mapLabelsToCodes(types, mapType, numParticles, ""),
+        "LTPRP": _mapLabelsToCodes(colors, mapColor, numParticles, "")}
+    return pd.DataFrame(columns)
+
+
+def _mapLabelsToCodes(labels: Optional[pd.Series], mapping: Optional[Dict[str, DomeCode]], numParticles: int,
+                      default: str) -> np.ndarray:
+    """
+    Maps a column of labels to the according code strings. Empty labels are replaced by the given default.
+    :param labels: The labels to map, can be None if the column was not assigned.
+    :param mapping: Mapping of label to DomeCode
+    :param numParticles: Expected number of entries
+    :param default: Code string to use for empty labels
+    :return: object array of code strings
+    """
+    codes: np.ndarray = np.full(numParticles, default, dtype=object)
+    if labels is not None:
+        assert len(labels) == numParticles, "Number of entries does not equal number of entries in Size column"
+        notEmpty: np.ndarray = pd.notna(labels).to_numpy()
+        if notEmpty.any():
+            assert mapping is not None, "No code mapping was set."
+            codeOfLabel: Dict[str, str] = {label: code.code for label, code in mapping.items()}
+            mapped: pd.Series = pd.Series(labels).loc[notEmpty].map(codeOfLabel)
+            unmapped: pd.Series = mapped.isna()
+            assert not unmapped.any(), f"No DOME code was assigned to the entries " \
+                                       f"{sorted(set(map(str, pd.Series(labels).loc[notEmpty][unmapped])))}"
+            codes[notEmpty] = mapped.to_numpy()
+    return codes
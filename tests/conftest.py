@@ -0,0 +1,40 @@
+"""
+DomeExcelConverter
+Copyright (C) 2021 Josef Brandt, University of Gothenburg <josef.brandt@gu.se>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program, see COPYING.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import os
+from typing import *
+import pytest
+
+from dataimport.sheetCache import cacheDirVariable
+
+
+@pytest.fixture(autouse=True, scope="session")
+def cacheDir(tmp_path_factory) -> Iterator[str]:
+    """
+    Points the persistent caches to a temporary directory, so that the tests do not write into the home directory.
+    """
+    directory: str = str(tmp_path_factory.mktemp("domeConverterCache"))
+    previousDir: Union[str, None] = os.environ.get(cacheDirVariable)
+    os.environ[cacheDirVariable] = directory
+    yield directory
+    if previousDir is None:
+        del os.environ[cacheDirVariable]
+    else:
+        os.environ[cacheDirVariable] = previousDir
@@ -18,9 +18,11 @@ If not, see <https://www.gnu.org/licenses/>.
 """
 
 from typing import TYPE_CHECKING, Union, Callable
+from PyQt6 import QtCore
 
 from dataimport.domeCodes import DomeCode
 if TYPE_CHECKING:
+    from gui.fieldSelectUI import CodeSelector
     from gui.checkableWidget import CheckableSpinBox, CheckableDoubleSpinBox
     from tables.tableItem import Field
 
@@ -44,3 +46,13 @@ def testCheckableSpinbox(spinbox: Union['CheckableSpinBox', 'CheckableDoubleSpin
     updateFn(spinbox.isChecked(), spinbox.getValue())
     assert fieldToSet.content == DomeCode("6", expectedCodeDescr)
 
+
+def clickCode(qtbot, selector: 'CodeSelector', row: int) -> None:
+    """
+    Shows the code selector and clicks the code in the given row of its table.
+    """
+    selector.show()
+    table = selector._codeTable
+    index: QtCore.QModelIndex = table.model().index(row, selector._model.getSelectColumn() + 1)
+    table.scrollTo(index)
+    qtbot.mouseClick(table.viewport(), QtCore.Qt.MouseButton.LeftButton, pos=table.visualRect(index).center())
@@ -21,8 +21,9 @@ If not, see <https://www.gnu.org/licenses/>.
 from typing import *
 from PyQt6.QtCore import Qt
 
-from gui.fieldSelectUI import SelectorPushButton
-from dataimport.domeCodes import DomeCode
+from gui.fieldSelectUI import SelectorPushButton, CodeSelector, getSelectorRegistry
+from dataimport.domeCodes import DomeCode, getShipCode
+from tests.helpers import clickCode
 
 
 def test_fieldSelectorButton(qtbot, tmpdir):
@@ -39,11 +40,112 @@ def test_fieldSelectorButton(qtbot, tmpdir):
     for i, code in enumerate(codes):
         qtbot.mousePress(selPushBtn, Qt.MouseButton.LeftButton)
 
-        qtbot.mousePress(selPushBtn._selector._btns[i], Qt.MouseButton.LeftButton)
+        clickCode(qtbot, selPushBtn.getSelector(), i)
         assert len(emittedCodes) == i+1
         assert code in emittedCodes
 
     numCodes: int = len(emittedCodes)
-    qtbot.mousePress(selPushBtn._selector._btnReset, Qt.MouseButton.LeftButton)
+    qtbot.mousePress(selPushBtn.getSelector()._btnReset, Qt.MouseButton.LeftButton)
     assert len(emittedCodes) == numCodes + 1
     assert emittedCodes[-1] is None
+
+
+def test_lazySelectorCreation(qtbot):
+    numCalls: List[int] = [0]
+    codes: List[DomeCode] = [DomeCode("Code1", "Description"), DomeCode("Code2", "Another Description")]
+
+    def getCodes() -> List[DomeCode]:
+        numCalls[0] += 1
+        return codes
+
+    selectedCodes: List[DomeCode] = []
+    selPushBtn: SelectorPushButton = SelectorPushButton(getCodes, selectedCodes.append)
+    qtbot.addWidget(selPushBtn)
+    assert numCalls[0] == 0  # neither the codes are loaded nor the selector is created with the button
+    assert selPushBtn._selector is None
+
+    selector = selPushBtn.getSelector()
+    assert selPushBtn.getSelector() is selector
+    assert numCalls[0] == 1
+    clickCode(qtbot, selector, 1)
+    assert selectedCodes == [codes[1]]
+    assert selPushBtn.text() == "Code2 (Another Description)"
+
+
+def test_searchFromFirstKeystroke(qtbot):
+    codes: List[DomeCode] = [DomeCode("PE", "Polyethylene"), DomeCode("PS", "Polystyrene"),
+                             DomeCode("ABS", "Acrylonitrile butadiene styrene")]
+    selector: CodeSelector = CodeSelector(codes)
+    qtbot.addWidget(selector)
+    assert [code.code for code in selector.getShownCodes()] == ["PE", "PS", "ABS"]
+    qtbot.keyClicks(selector._searchBar, "a")
+    assert [code.code for code in selector.getShownCodes()] == ["ABS"]
+    selector._searchBar.clear()
+    qtbot.keyClicks(selector._searchBar, "styrene")
+    assert [code.code for code in selector.getShownCodes()] == ["ABS", "PS"]  # word prefix before substring
+
+
+def test_browseAllAndSelectMultiple(qtbot):
+    shipCodes = getShipCode()
+    selector: CodeSelector = CodeSelector(shipCodes)
+    qtbot.addWidget(selector)
+    assert len(selector.getShownCodes()) == len(shipCodes) > 10000  # all codes are browsable
+    qtbot.keyClicks(selector._searchBar, "polarstern")
+    assert [code.descr for code in selector.getShownCodes()] == ["Polarstern"]
+
+    selector = CodeSelector(shipCodes, allowMultiSelect=True)
+    qtbot.addWidget(selector)
+    table = selector._codeTable
+    for row in [0, len(shipCodes) - 1]:
+        table.model().setData(table.model().index(row, 0), Qt.CheckState.Checked, Qt.ItemDataRole.CheckStateRole)
+    numSignals: List[int] = [0]
+    table.model().dataChanged.connect(lambda *args: numSignals.__setitem__(0, numSignals[0] + 1))
+    selector._model.clearSelectedCodes()
+    assert numSignals[0] == 1  # one signal for all rows, not one per row
+    assert table.model().index(0, 0).data(Qt.ItemDataRole.CheckStateRole) == Qt.CheckState.Unchecked
+
+    codes: List[DomeCode] = [DomeCode("PE", "Polyethylene"), DomeCode("PS", "Polystyrene"),
+                             DomeCode("PP", "Polypropylene")]
+    selector = CodeSelector(codes, allowMultiSelect=True)
+    qtbot.addWidget(selector)
+    selectedCodes: List[DomeCode] = []
+    selector.CodeSelected.connect(selectedCodes.append)
+    assert not selector._btnUseSelection.isEnabled()
+    table = selector._codeTable
+    for row in [0, 2]:
+        table.model().setData(table.model().index(row, 0), Qt.CheckState.Checked, Qt.ItemDataRole.CheckStateRole)
+    assert selector._btnUseSelection.isEnabled()
+    qtbot.keyClicks(selector._searchBar, "ps")  # Filtering the table keeps the selection
+    assert table.model().index(0, 0).data(Qt.ItemDataRole.CheckStateRole) == Qt.CheckState.Unchecked
+    qtbot.mousePress(selector._btnUseSelection, Qt.MouseButton.LeftButton)
+    assert len(selectedCodes) == 1
+    assert sorted(selectedCodes[0].code.split("~")) == ["PE", "PP"]
+
+
+def test_sharedSelectorPerVocabulary(qtbot):
+    from gui.pages.page_7_particles import CodeMapper
+
+    shipCodes: Tuple[DomeCode, ...] = getShipCode()
+    mapper: CodeMapper = CodeMapper()
+    qtbot.addWidget(mapper)
+    labels: Dict[str, int] = {f"Label {i}": i for i in range(300)}
+    numSelectors: int = getSelectorRegistry().getNumSelectors()
+    mapper.setUp(labels, shipCodes, lambda codeDict: None)
+    assert all(btn._selector is None for btn in mapper._btns)  # no selector is created with the buttons
+    assert getSelectorRegistry().getNumSelectors() <= numSelectors  # unused selectors may be garbage collected
+
+    firstBtn, secondBtn = mapper._btns[0], mapper._btns[1]
+    selector: CodeSelector = firstBtn.getSelector()
+    assert secondBtn.getSelector() is selector  # the last button retrieving the selector receives the code
+    assert firstBtn._selector is secondBtn._selector
+    assert getSelectorRegistry().getSelector(shipCodes) is selector
+    clickCode(qtbot, selector, 1)
+    assert firstBtn.getSelectedCode() is None and firstBtn.text() == SelectorPushButton.DefaultText
+    assert secondBtn.getSelectedCode() == shipCodes[1]
+    assert mapper._codeDict["Label 298"] == shipCodes[1]  # the labels are listed from the most frequent one
+
+    qtbot.keyClicks(firstBtn.getSelector()._searchBar, "polarstern")
+    clickCode(qtbot, selector, 0)
+    assert firstBtn.getSelectedCode().descr == "Polarstern"
+    assert secondBtn.getSelectedCode() == shipCodes[1]
+    assert len(secondBtn.getSelector().getShownCodes()) == len(shipCodes)  # the search is cleared for a new button
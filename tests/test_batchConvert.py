@@ -0,0 +1,234 @@
+"""
+DomeExcelConverter
+Copyright (C) 2021 Josef Brandt, University of Gothenburg <josef.brandt@gu.se>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program, see COPYING.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import List
+import pandas as pd
+import pytest
+
+from batchConvert import main, getOutputFileName, getOutputFileNames, convertFile, convertFiles, ConversionResult
+from dataimport.conversionProfile import createProfile, writeProfile, applyProfile
+from dataimport.domeCodes import DomeCode, getLitterProperties, getShapeParams
+from tableConverter import TableConverter
+
+
+def getTestConverter() -> TableConverter:
+    converter: TableConverter = TableConverter()
+    reader = converter.getXLSReader()
+    reader.readXlsFile(os.path.join("data", "exampledata.xlsx"))
+    reader.setActiveSheet("p3 unprocessed")
+
+    idTable = converter.getIDTable()
+    idTable.setReportingLab(DomeCode("TestLab", "Lab"))
+    idTable.setCruise(DomeCode("Summer Cruise", "Cruise"))
+    idTable.setStation(DomeCode("TestStation", "Station"))
+    idTable.setShipCode(DomeCode("NCC1701", "Ship"))
+    locationTable = converter.getLocationTable()
+    locationTable.setLatitude(58.146)
+    locationTable.setLongitude(11.5)
+    locationTable.setStationName(DomeCode("TestStationName", "Station Name"))
+    converter.getTimeTable().setSamplingDate(DomeCode("20210810", "Date"))
+    sampleTable = converter.getSampleTable()
+    sampleTable.setDType(DomeCode("Test-DTYPE", "DType"))
+    sampleTable.setMatrix(DomeCode("Sediment", "Matrix"))
+    sampleTable.setSampleNumber(DomeCode("2", "Sample Number"))
+    sampleTable.setSampleArea(100)
+    analysisTable = converter.getAnalysisTable()
+    analysisTable.setLab(DomeCode("TestLab", "Lab"))
+    analysisTable.setMethodAnalysis(DomeCode("uFTIR", "Analysis"))
+    analysisTable.setMethPretreat(DomeCode("Digestion", "Pretreatment"))
+    analysisTable.setMethodPurification(DomeCode("Filtration", "Purification"))
+    converter.getMonitoringTable().setMonitoringPurpose(DomeCode("TestPurpose", "Purpose"))
+    converter.getMonitoringTable().setProgramme(DomeCode("TestProgram", "Programme"))
+
+    columnMapping = converter.getParticleColumnAssignmentsTable()
+    columnMapping.setSizeColumn(DomeCode("MajorEllipse µ", "FakeCode"))
+    columnMapping.setColorColumn(DomeCode("Colour", "FakeCode"))
+    columnMapping.setShapeColumn(DomeCode("Shape 2D", "FakeCode"))
+    sheet = reader.getActiveSheet()
+    columnMapping.setColorMapping({label: getLitterProperties()[0] for label in sheet["Colour"].dropna().unique()})
+    columnMapping.setShapeMapping({label: getShapeParams()[0] for label in sheet["Shape 2D"].dropna().unique()})
+    return converter
+
+
+def test_batchConvert():
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))  # Otherwise path to testdata doesn't work
+
+    converter: TableConverter = getTestConverter()
+    profile = createProfile(converter)
+    assert profile["sheet"] == "p3 unprocessed"
+    assert profile["tables"]["LATIT"] == "58.146"
+    assert profile["particleColumns"] == {"size": "MajorEllipse µ", "shape": "Shape 2D", "color": "Colour"}
+
+    with tempfile.TemporaryDirectory() as tmpDirName:
+        expectedFileName: str = os.path.join(tmpDirName, "expected.csv")
+        converter.exportToCSV(expectedFileName)
+
+        profileFileName: str = os.path.join(tmpDirName, "profile.json")
+        writeProfile(profile, profileFileName)
+        outDir: str = os.path.join(tmpDirName, "out")
+        inputFile: str = os.path.join("data", "exampledata.xlsx")
+        assert main([profileFileName, inputFile, os.path.join("data", "*.xlsx"), "--output-dir", outDir]) == 0
+        assert os.listdir(outDir) == ["exampledata.csv"]
+        with open(expectedFileName) as expectedFile, open(getOutputFileName(inputFile, outDir)) as outFile:
+            assert expectedFile.read() == outFile.read()
+
+        # a failing file is reported without stopping the others
+        assert main([profileFileName, "nonExistent.xlsx", inputFile, "--output-dir", outDir]) == 1
+        assert main([profileFileName, os.path.join(tmpDirName, "*.xlsx")]) == 2
+
+    profile["codeMappings"]["color"]["White"] = "NotACode"
+    with pytest.raises(AssertionError):
+        applyProfile(profile, TableConverter())
+
+
+def test_batchConvertMergedSheets():
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))  # Otherwise path to testdata doesn't work
+
+    converter: TableConverter = getTestConverter()
+    sheet: pd.DataFrame = converter.getXLSReader().getActiveSheet()
+    with tempfile.TemporaryDirectory() as tmpDirName:
+        expectedFileName: str = os.path.join(tmpDirName, "expected.csv")
+        converter.exportToCSV(expectedFileName)
+
+        workbookName: str = os.path.join(tmpDirName, "filters.xlsx")
+        with pd.ExcelWriter(workbookName) as writer:
+            for i, start in enumerate(range(0, len(sheet), 12)):
+                sheet.iloc[start:start+12].to_excel(writer, sheet_name=f"Filter {i+1}", index=False)
+        profile = createProfile(converter)
+        profile["sheet"] = [f"Filter {i+1}" for i in range(12)]
+        result: ConversionResult = convertFile(workbookName, getOutputFileName(workbookName), profile)
+        assert result.success, result.message
+        assert result.numParticles == len(sheet)
+        with open(expectedFileName) as expectedFile, open(result.outputFile) as outFile:
+            assert expectedFile.read() == outFile.read()
+
+        merged: TableConverter = TableConverter()
+        applyProfile(profile, merged)
+        merged.getXLSReader().readXlsFile(workbookName)
+        merged.getXLSReader().setActiveSheets(profile["sheet"])
+        assert createProfile(merged)["sheet"] == profile["sheet"]
+
+
+def test_parallelBatchConvert():
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))  # Otherwise path to testdata doesn't work
+
+    profile = createProfile(getTestConverter())
+    inputFile: str = os.path.join("data", "exampledata.xlsx")
+    with tempfile.TemporaryDirectory() as tmpDirName:
+        sequentialDir, parallelDir = os.path.join(tmpDirName, "sequential"), os.path.join(tmpDirName, "parallel")
+        os.mkdir(sequentialDir)
+        os.mkdir(parallelDir)
+        convertFiles([inputFile], profile, sequentialDir)
+
+        inputFiles = ["nonExistent.xlsx", inputFile]
+        reported: List[ConversionResult] = []
+        results: List[ConversionResult] = convertFiles(inputFiles, profile, parallelDir, numWorkers=2,
+                                                       resultCallback=reported.append)
+        assert results == reported
+        assert [result.inputFile for result in results] == inputFiles
+        assert [result.success for result in results] == [False, True]
+        assert results[1].numParticles == 133 and results[1].seconds > 0
+
+        with open(getOutputFileName(inputFile, sequentialDir)) as seqFile, \
+                open(getOutputFileName(inputFile, parallelDir)) as parFile:
+            assert seqFile.read() == parFile.read()
+
+
+def test_uniqueOutputFileNames():
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))  # Otherwise path to testdata doesn't work
+
+    profile = createProfile(getTestConverter())
+    with tempfile.TemporaryDirectory() as tmpDirName:
+        inputFiles: List[str] = [os.path.join(tmpDirName, "cruise1", "s.xlsx"),
+                                 os.path.join(tmpDirName, "cruise2", "s.xlsx"),
+                                 os.path.join(tmpDirName, "cruise2", "t.xlsx")]
+        for inputFile in inputFiles:
+            os.makedirs(os.path.dirname(inputFile), exist_ok=True)
+            shutil.copy(os.path.join("data", "exampledata.xlsx"), inputFile)
+        outDir: str = os.path.join(tmpDirName, "out")
+        expectedFiles: List[str] = [os.path.join(outDir, "cruise1", "s.csv"), os.path.join(outDir, "cruise2", "s.csv"),
+                                    os.path.join(outDir, "t.csv")]
+        assert getOutputFileNames(inputFiles, outDir) == expectedFiles  # the same names keep their directories
+        results: List[ConversionResult] = convertFiles(inputFiles, profile, outDir, numWorkers=2)
+        assert all(result.success for result in results)
+        assert [result.outputFile for result in results] == expectedFiles
+        assert all(os.path.exists(fname) for fname in expectedFiles)
+
+        sameNames: List[str] = [os.path.join(tmpDirName, "cruise1", "s.xlsx"),
+                                os.path.join(tmpDirName, "cruise1", "s.xls")]
+        with pytest.raises(AssertionError):
+            getOutputFileNames(sameNames, outDir)
+        profileFileName: str = os.path.join(tmpDirName, "profile.json")
+        writeProfile(profile, profileFileName)
+        assert main([profileFileName] + sameNames) == 2  # nothing is converted
+
+
+def test_inputFilesAreNotOverwritten():
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))  # Otherwise path to testdata doesn't work
+
+    converter: TableConverter = getTestConverter()
+    profile = createProfile(converter)
+    del profile["sheet"]  # a csv file contains one sheet only
+    with tempfile.TemporaryDirectory() as tmpDirName:
+        csvFile: str = os.path.join(tmpDirName, "particles.csv")
+        converter.getXLSReader().getActiveSheet().to_csv(csvFile, index=False)
+        with open(csvFile) as fp:
+            csvContent: str = fp.read()
+        profileFileName: str = os.path.join(tmpDirName, "profile.json")
+        writeProfile(profile, profileFileName)
+
+        assert getOutputFileName(csvFile) == os.path.join(tmpDirName, "particles_converted.csv")
+        assert main([profileFileName, csvFile]) == 0
+        assert os.path.exists(os.path.join(tmpDirName, "particles_converted.csv"))
+        with open(csvFile) as fp:
+            assert fp.read() == csvContent
+
+        csvConverter: TableConverter = TableConverter()
+        applyProfile(profile, csvConverter)
+        csvConverter.getXLSReader().readXlsFile(csvFile)
+        csvConverter.getXLSReader().setActiveSheet("particles")
+        with pytest.raises(AssertionError):
+            csvConverter.exportToCSV(csvFile)
+        csvConverter.getParticleColumnAssignmentsTable().setSizeColumn(DomeCode("NonExistent", "FakeCode"))
+        existingFile: str = os.path.join(tmpDirName, "particles_converted.csv")
+        with open(existingFile) as fp:
+            existingContent: str = fp.read()
+        with pytest.raises(ValueError):
+            csvConverter.exportToCSV(existingFile)  # a failed export leaves an existing file untouched
+        with open(existingFile) as fp:
+            assert fp.read() == existingContent
+        with open(csvFile) as fp:
+            assert fp.read() == csvContent
+        assert sorted(os.listdir(tmpDirName)) == ["particles.csv", "particles_converted.csv", "profile.json"]
+
+
+def test_batchConvertWithoutQt():
+    code: str = "import sys, batchConvert; assert 'PyQt6' not in sys.modules"
+    assert subprocess.run([sys.executable, "-c", code]).returncode == 0
@@ -0,0 +1,80 @@
+"""
+DomeExcelConverter
+Copyright (C) 2021 Josef Brandt, University of Gothenburg <josef.brandt@gu.se>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program, see COPYING.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+
+from typing import *
+import numpy as np
+
+from dataimport import domeCodes as dc
+from dataimport.codeSearch import CodeSearchIndex
+
+
+def test_rankedSearch():
+    codes: List[dc.DomeCode] = [dc.DomeCode("PE", "Polyethylene"),
+                                dc.DomeCode("PET", "Polyethylene terephthalate"),
+                                dc.DomeCode("PP", "Polypropylene", "Also known as polypropene"),
+                                dc.DomeCode("ABS", "Acrylonitrile butadiene styrene, a PEt-like plastic"),
+                                dc.DomeCode("PS", "Polystyrene")]
+    index: CodeSearchIndex = CodeSearchIndex(codes)
+    assert list(index.search("")) == list(range(len(codes)))
+    assert index.searchCodes("pe") == [codes[0], codes[1], codes[3]]  # exact code, code prefix, word prefix
+    assert [code.code for code in index.searchCodes("pet")] == ["PET", "ABS"]  # exact code, then word prefix
+    assert [code.code for code in index.searchCodes("styrene")] == ["ABS", "PS"]  # word prefix, then substring
+    assert [code.code for code in index.searchCodes("propene")] == ["PP"]  # only in the long description
+    assert [code.code for code in index.searchCodes("  POLY ")] == ["PE", "PET", "PP", "PS"]
+    assert [code.code for code in index.searchCodes("ethylene tere")] == ["PET"]
+    assert index.searchCodes("x") == []
+    assert index.searchCodes("poly-") == []
+
+
+def test_searchShipCodes():
+    shipCodes: Tuple[dc.DomeCode, ...] = dc.getShipCode()
+    index: CodeSearchIndex = CodeSearchIndex(shipCodes)
+    assert index.searchCodes("06AQ")[0].descr == "Polarstern"
+    for query in ["polar", "sea", "of the", "74e"]:  # same hits as a linear search
+        expected: Set[int] = {i for i, code in enumerate(shipCodes)
+                              if query in code.code.lower() or query in code.descr.lower()}
+        assert set(index.search(query).tolist()) == expected
+
+    # Only the trigram candidates are compared with the query, not the whole vocabulary
+    index._shortTexts._texts = _AccessRecordingList(index._shortTexts._texts)
+    index._longTexts._texts = _AccessRecordingList(index._longTexts._texts)
+    for query in ["a", "po"]:  # prefix search only
+        index.search(query)
+        assert len(index._shortTexts._texts.accessed) == len(index._longTexts._texts.accessed) == 0
+    for query in ["polarstern", "unspecified"]:
+        numHits: int = len(index.search(query))
+        assert 0 < len(index._shortTexts._texts.accessed) < max(10 * numHits, len(shipCodes) // 100)
+        assert len(index._longTexts._texts.accessed) < len(shipCodes) // 100
+        index._shortTexts._texts.accessed.clear()
+        index._longTexts._texts.accessed.clear()
+
+
+class _AccessRecordingList(list):
+    """
+    List that records the positions of the accessed items.
+    """
+    def __init__(self, items: List[str]):
+        super().__init__(items)
+        self.accessed: Set[int] = set()
+
+    def __getitem__(self, i: int) -> str:
+        self.accessed.add(i)
+        return super().__getitem__(i)
@@ -50,8 +50,8 @@ def test_complete_compilation(tmpdir, qtbot):
 
     # Load file:
     introPage: IntroPage = wizard._introPage
-    introPage._getXLSFileName = lambda: r"data\exampledata.xlsx"  # now take a valid file
-    assert os.path.exists(introPage._getXLSFileName())
+    introPage._getXLSFileNames = lambda: [r"data\exampledata.xlsx"]  # now take a valid file
+    assert os.path.exists(introPage._getXLSFileNames()[0])
     introPage._btnLoadXLS.pressed.disconnect()
     introPage._btnLoadXLS.pressed.connect(lambda: introPage._loadXLSFile(preferredSheetName="p3 unprocessed"))
     qtbot.mousePress(introPage._btnLoadXLS, QtCore.Qt.MouseButton.LeftButton)
@@ -19,10 +19,14 @@ If not, see <https://www.gnu.org/licenses/>.
 
 
 import os
-from PyQt6 import QtCore
+import tempfile
+from typing import List
+import pandas as pd
+from PyQt6 import QtCore, QtWidgets
 
 from dataimport.readXLS import XLSReader
-from gui.pages.page_0_intro import IntroPage
+import gui.pages.page_0_intro
+from gui.pages.page_0_intro import IntroPage, LoadingTask, SheetChooser
 
 
 def test_is_complete(qtbot, tmpdir):
@@ -35,8 +39,8 @@ def test_is_complete(qtbot, tmpdir):
     qtbot.waitForWindowShown(introPage)
     assert not introPage.isComplete()
 
-    introPage._getXLSFileName = lambda: r"data\exampledata.xlsx"  # now take a valid file
-    assert os.path.exists(introPage._getXLSFileName())
+    introPage._getXLSFileNames = lambda: [r"data\exampledata.xlsx"]  # now take a valid file
+    assert os.path.exists(introPage._getXLSFileNames()[0])
     introPage._btnLoadXLS.pressed.disconnect()
     introPage._btnLoadXLS.pressed.connect(lambda: introPage._loadXLSFile(preferredSheetName="p3 unprocessed"))
     qtbot.mousePress(introPage._btnLoadXLS, QtCore.Qt.MouseButton.LeftButton)
@@ -45,3 +49,107 @@ def test_is_complete(qtbot, tmpdir):
 
     assert introPage.isComplete()
 
+
+
+def test_loadInBackground(qtbot, monkeypatch):
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))  # Otherwise path to testdata doesn't work
+
+    monkeypatch.setattr(gui.pages.page_0_intro, "testRunning", False)  # i.e., run the loading in a worker thread
+    introPage: IntroPage = IntroPage(XLSReader())
+    qtbot.addWidget(introPage)
+    introPage._getXLSFileNames = lambda: [os.path.join("data", "exampledata.xlsx")]
+    with qtbot.waitSignal(introPage.ActiveSheetSet, timeout=10000):
+        introPage._loadXLSFile(preferredSheetName="p3 unprocessed")
+        assert not introPage.isComplete()  # Loading is not yet finished
+
+    assert introPage.isComplete()
+    assert introPage._xlsReader.isSheetLoaded("p3 unprocessed")
+    assert introPage._btnLoadXLS.isEnabled()
+    assert introPage._loadingThread is None
+    assert "Compacted memory" not in introPage._lblXLSLoaded.text()
+
+    introPage._checkCompact.setChecked(True)
+    assert introPage._xlsReader.getCompactSheets()
+    with qtbot.waitSignal(introPage.ActiveSheetSet, timeout=10000):
+        introPage._loadXLSFile(preferredSheetName="p3 unprocessed")
+    assert "Compacted memory" in introPage._lblXLSLoaded.text()
+
+
+def test_cancelLoadingTask(qtbot):
+    numRowsRead: List[int] = []
+
+    def loadFunc(progressCallback) -> bool:
+        for numRows in range(1000, 10000, 1000):
+            if not progressCallback(numRows):
+                return False
+        return True
+
+    task: LoadingTask = LoadingTask(loadFunc)
+    task.Progress.connect(numRowsRead.append)
+    task.Progress.connect(lambda numRows: task.cancel() if numRows == 3000 else None)
+    with qtbot.waitSignal(task.Finished) as blocker:
+        task.run()
+    assert blocker.args == [False]
+    assert numRowsRead == [1000, 2000, 3000]
+
+
+def test_mergeChosenSheets(qtbot, monkeypatch):
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))  # Otherwise path to testdata doesn't work
+
+    sheetNames: List[str] = ["Filter 1", "Filter 2", "Other"]
+    chooser: SheetChooser = SheetChooser(sheetNames)
+    qtbot.addWidget(chooser)
+    assert chooser.getSelectedSheets() == ["Filter 1"]
+    chooser._sheetList.item(1).setSelected(True)
+    assert chooser.getSelectedSheets() == ["Filter 1", "Filter 2"]
+
+    sheet: pd.DataFrame = pd.read_excel(os.path.join("data", "exampledata.xlsx"), sheet_name="p3 unprocessed")
+    with tempfile.TemporaryDirectory() as tmpDirName:
+        workbookName: str = os.path.join(tmpDirName, "filters.xlsx")
+        with pd.ExcelWriter(workbookName) as writer:
+            sheet.iloc[:100].to_excel(writer, sheet_name="Filter 1", index=False)
+            sheet.iloc[100:].to_excel(writer, sheet_name="Filter 2", index=False)
+            sheet[["Colour"]].to_excel(writer, sheet_name="Other", index=False)
+
+        introPage: IntroPage = IntroPage(XLSReader())
+        qtbot.addWidget(introPage)
+        introPage._getXLSFileNames = lambda: [workbookName]
+        monkeypatch.setattr(SheetChooser, "exec", lambda self: QtWidgets.QDialog.DialogCode.Accepted)
+        monkeypatch.setattr(SheetChooser, "getSelectedSheets", lambda self: ["Filter 1", "Filter 2"])
+        introPage._loadXLSFile()
+        assert introPage.isComplete()
+        assert introPage._xlsReader.getActiveSheetNames() == ["Filter 1", "Filter 2"]
+        assert len(introPage._xlsReader.getActiveSheet()) == len(sheet)
+
+        monkeypatch.setattr(SheetChooser, "getSelectedSheets", lambda self: ["Filter 1", "Other"])
+        introPage._loadXLSFile()  # The sheets have different columns and can not be merged
+        assert not introPage.isComplete()
+        assert introPage._btnLoadXLS.isEnabled()
+
+
+def test_sheetEstimatesInChooser(qtbot, monkeypatch):
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))  # Otherwise path to testdata doesn't work
+
+    introPage: IntroPage = IntroPage(XLSReader())
+    qtbot.addWidget(introPage)
+    introPage._getXLSFileNames = lambda: [os.path.join("data", "exampledata.xlsx")]
+    monkeypatch.setattr(SheetChooser, "exec", lambda self: QtWidgets.QDialog.DialogCode.Rejected)
+    introPage._loadXLSFile()
+    assert list(introPage._sheetEstimates.keys()) == introPage._xlsReader.getSheetNames()
+    assert introPage._sheetEstimates["p3 unprocessed"].numRows == 133
+    assert not introPage._xlsReader.isSheetLoaded("p3 unprocessed")
+
+    chooser: SheetChooser = SheetChooser(introPage._xlsReader.getSheetNames(), introPage._sheetEstimates)
+    qtbot.addWidget(chooser)
+    assert "rows" in chooser._sheetList.item(2).text()
+    assert chooser.getSelectedSheets() == ["P1 info"]  # the sheet names are returned without the estimates
+    assert chooser._lblEstimate.text().startswith("Selection: ~30 rows")
+    chooser._sheetList.item(0).setSelected(False)
+    chooser._sheetList.item(2).setSelected(True)
+    chooser._sheetList.item(3).setSelected(True)
+    assert chooser.getSelectedSheets() == ["p3 unprocessed", "G1 tims doc"]
+    assert chooser._lblEstimate.text().startswith("Selection: ~263 rows")
+    assert "large selection" not in chooser._lblEstimate.text()
@@ -0,0 +1,66 @@
+"""
+DomeExcelConverter
+Copyright (C) 2021 Josef Brandt, University of Gothenburg <josef.brandt@gu.se>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program, see COPYING.
+If not, see <https://www.gnu.org/licenses/>.
+"""
+
+
+import os
+import tempfile
+import pandas as pd
+
+from dataexport.litterReport import LitterReport, aggregateParticleColumns
+
+
+def test_writeLitterReport():
+    particleColumns: pd.DataFrame = pd.DataFrame({"PARAM": ["LTT-249", "Fiber", "LTT-249"],
+                                                  "LTSZC": ["30", "31", "35"],
+                                                  "TYPPL": ["PE", "", "PP"]})
+    report: LitterReport = LitterReport({"RLABO": "TestLab", "MPROG": "TestProgram", "LATIT": "58.146"},
+                                        particleColumns)
+    assert report.getColumnNames() == ["RLABO", "LATIT", "PARAM", "LTSZC", "TYPPL", "MPROG"]
+
+    dframe: pd.DataFrame = report.toDataFrame()
+    assert list(dframe.columns) == report.getColumnNames()
+    assert list(dframe["RLABO"]) == ["TestLab"]*3
+    assert dframe["RLABO"].dtype == "category"
+
+    with tempfile.TemporaryDirectory() as tmpDirName:
+        fullFileName: str = os.path.join(tmpDirName, "full.csv")
+        chunkedFileName: str = os.path.join(tmpDirName, "chunked.csv")
+        dframe.to_csv(fullFileName, index=False)
+        report.writeCSV(chunkedFileName, chunkSize=2)
+        with open(fullFileName) as fullFile, open(chunkedFileName) as chunkedFile:
+            assert fullFile.read() == chunkedFile.read()
+
+
+def test_aggregateParticleColumns():
+    particleColumns: pd.DataFrame = pd.DataFrame({"PARAM": ["LTT-249", "Fiber", "LTT-249", "LTT-249"],
+                                                  "LTSZC": ["30", "31", "30", "35"],
+                                                  "VALUE": ["1", "1", "1", "1"],
+                                                  "TYPPL": ["PE", "", "PE", "PP"]})
+    aggregated: pd.DataFrame = aggregateParticleColumns(particleColumns)
+    assert list(aggregated.columns) == list(particleColumns.columns)
+    assert list(aggregated["PARAM"]) == ["LTT-249", "Fiber", "LTT-249"]
+    assert list(aggregated["LTSZC"]) == ["30", "31", "35"]
+    assert list(aggregated["VALUE"]) == ["2", "1", "1"]
+
+    # aggregating already aggregated chunks sums up their counts
+    combined: pd.DataFrame = aggregateParticleColumns(pd.concat([aggregated, aggregated], ignore_index=True))
+    assert list(combined["VALUE"]) == ["4", "2", "2"]
+
+    report: LitterReport = LitterReport({"RLABO": "TestLab"}, particleColumns).aggregated()
+    assert report.getNumRows() == 3
@@ -23,6 +23,7 @@ from PyQt6 import QtCore
 from gui.pages.page_1_id import IDPage
 from tables.table_1_id import IdentificationTable
 from dataimport.domeCodes import DomeCode
+from tests.helpers import clickCode
 
 
 def test_is_complete(qtbot, tmpdir):
@@ -35,7 +36,7 @@ def test_is_complete(qtbot, tmpdir):
 
     assert table._lab.content is None
     qtbot.mousePress(idPage._btnRLABO, QtCore.Qt.MouseButton.LeftButton)
-    qtbot.mousePress(idPage._btnRLABO._selector._btns[0], QtCore.Qt.MouseButton.LeftButton)
+    clickCode(qtbot, idPage._btnRLABO.getSelector(), 0)
     assert type(table._lab.content) == DomeCode
     assert not idPage.isComplete()
 
@@ -76,7 +77,7 @@ def test_is_complete(qtbot, tmpdir):
 
     assert table._ship.content is None
     qtbot.mousePress(idPage._btnShip, QtCore.Qt.MouseButton.LeftButton)
-    qtbot.mousePress(idPage._btnShip._selector._btns[0], QtCore.Qt.MouseButton.LeftButton)
+    clickCode(qtbot, idPage._btnShip.getSelector(), 0)
     assert type(table._ship.content) == DomeCode
     assert not idPage.isComplete()
 
@@ -23,6 +23,7 @@ from PyQt6 import QtCore
 from gui.pages.page_2_location import LocationPage
 from tables.table_2_location import LocationTable
 from dataimport.domeCodes import DomeCode
+from tests.helpers import clickCode
 
 
 def test_is_complete(qtbot, tmpdir):
@@ -83,13 +84,13 @@ def test_is_complete(qtbot, tmpdir):
 
     assert table._subst.content is None
     qtbot.mousePress(locPage._btnSubstrType, QtCore.Qt.MouseButton.LeftButton)
-    qtbot.mousePress(locPage._btnSubstrType._selector._btns[0], QtCore.Qt.MouseButton.LeftButton)
+    clickCode(qtbot, locPage._btnSubstrType.getSelector(), 0)
     assert type(table._subst.content) == DomeCode
     assert not locPage.isComplete()
 
     assert table._posys.content is None
     qtbot.mousePress(locPage._btnPOSYS, QtCore.Qt.MouseButton.LeftButton)
-    qtbot.mousePress(locPage._btnPOSYS._selector._btns[0], QtCore.Qt.MouseButton.LeftButton)
+    clickCode(qtbot, locPage._btnPOSYS.getSelector(), 0)
     assert type(table._posys.content) == DomeCode
     assert not locPage.isComplete()
 
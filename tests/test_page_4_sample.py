@@ -23,6 +23,7 @@ from gui.pages.page_4_sample import SamplePage
 from tables.table_4_sample import SampleTable
 
 from dataimport.domeCodes import DomeCode
+from tests.helpers import clickCode
 if TYPE_CHECKING:
     from gui.checkableWidget import CheckableSpinBox, CheckableDoubleSpinBox
     from tables.tableItem import Field
@@ -56,7 +57,7 @@ def test_is_complete(qtbot, tmpdir):
 
     assert table._dtype.content is None
     qtbot.mousePress(page._btnDType, QtCore.Qt.MouseButton.LeftButton)
-    qtbot.mousePress(page._btnDType._selector._btns[0], QtCore.Qt.MouseButton.LeftButton)
+    clickCode(qtbot, page._btnDType.getSelector(), 0)
     assert type(table._dtype.content) == DomeCode
     assert not page.isComplete()
 
@@ -72,7 +73,7 @@ def test_is_complete(qtbot, tmpdir):
 
     assert table._finfl.content is None
     qtbot.mousePress(page._btnInfFac, QtCore.Qt.MouseButton.LeftButton)
-    qtbot.mousePress(page._btnInfFac._selector._btns[0], QtCore.Qt.MouseButton.LeftButton)
+    clickCode(qtbot, page._btnInfFac.getSelector(), 0)
     assert type(table._finfl.content) == DomeCode
     assert not page.isComplete()
 
@@ -84,7 +85,7 @@ def test_is_complete(qtbot, tmpdir):
 
     assert table._matrx.content is None
     qtbot.mousePress(page._btnMatrix, QtCore.Qt.MouseButton.LeftButton)
-    qtbot.mousePress(page._btnMatrix._selector._btns[0], QtCore.Qt.MouseButton.LeftButton)
+    clickCode(qtbot, page._btnMatrix.getSelector(), 0)
     assert type(table._matrx.content) == DomeCode
     assert page.isComplete()
 
@@ -23,6 +23,7 @@ from gui.pages.page_5_analysis import AnalysisPage
 from tables.table_5_analysis import AnalysisTable
 
 from dataimport.domeCodes import DomeCode
+from tests.helpers import clickCode
 if TYPE_CHECKING:
     from gui.fieldSelectUI import SelectorPushButton
     from tables.tableItem import Field
@@ -32,11 +33,11 @@ def test_is_complete(qtbot, tmpdir):
     def testSelectorButton(btn: 'SelectorPushButton', assignedField: 'Field'):
         assert assignedField.content is None
         qtbot.mousePress(btn, QtCore.Qt.MouseButton.LeftButton)
-        qtbot.mousePress(btn._selector._btns[0], QtCore.Qt.MouseButton.LeftButton)
+        clickCode(qtbot, btn.getSelector(), 0)
         assert type(assignedField.content) == DomeCode
-        qtbot.mousePress(btn._selector._btnReset, QtCore.Qt.MouseButton.LeftButton)
+        qtbot.mousePress(btn.getSelector()._btnReset, QtCore.Qt.MouseButton.LeftButton)
         assert assignedField.content is None
-        qtbot.mousePress(btn._selector._btns[0], QtCore.Qt.MouseButton.LeftButton)
+        clickCode(qtbot, btn.getSelector(), 0)
         assert type(assignedField.content) == DomeCode
 
     table: AnalysisTable = AnalysisTable()
@@ -18,17 +18,20 @@ If not, see <https://www.gnu.org/licenses/>.
 """
 import os
 import tempfile
-from typing import TYPE_CHECKING, Dict, Callable
+from typing import TYPE_CHECKING, Dict, Callable, List
 
+import numpy as np
 import pandas as pd
 from PyQt6 import QtCore
 from unittest.mock import Mock
 import random
+import pytest
 
 from gui.pages.page_7_particles import ParticlesPage
-from tables.table_7_particle import ParticleColumnMapping, ParticleTable
+from tables.table_7_particle import ParticleColumnMapping, ParticleTable, compileParticleColumns, getLitterSizeBins
 from dataimport.domeCodes import DomeCode
 from dataimport.readXLS import XLSReader
+from tests.helpers import clickCode
 
 if TYPE_CHECKING:
     from PyQt6 import QtWidgets
@@ -41,13 +44,13 @@ def test_is_complete(qtbot, tmpdir):
     def testSelectorButton(btn: 'SelectorPushButton', assignedField: 'Field'):
         assert assignedField.content is None
         qtbot.mousePress(btn, QtCore.Qt.MouseButton.LeftButton)
-        btnText: str = btn._selector._btns[0].text()
-        qtbot.mousePress(btn._selector._btns[0], QtCore.Qt.MouseButton.LeftButton)
+        btnText: str = btn.getSelector().getShownCodes()[0].code
+        clickCode(qtbot, btn.getSelector(), 0)
         assert type(assignedField.content) == DomeCode
         assert assignedField.content.code == btnText
-        qtbot.mousePress(btn._selector._btnReset, QtCore.Qt.MouseButton.LeftButton)
+        qtbot.mousePress(btn.getSelector()._btnReset, QtCore.Qt.MouseButton.LeftButton)
         assert assignedField.content is None
-        qtbot.mousePress(btn._selector._btns[0], QtCore.Qt.MouseButton.LeftButton)
+        clickCode(qtbot, btn.getSelector(), 0)
         assert type(assignedField.content) == DomeCode
         assert assignedField.content.code == btnText
 
@@ -60,19 +63,18 @@ def test_is_complete(qtbot, tmpdir):
         expectedDict: Dict[str, 'DomeCode'] = {}
         for lbl, btn in zip(codeMapper._lbls, codeMapper._btns):
             qtbot.mousePress(btn, QtCore.Qt.MouseButton.LeftButton)  # Opens the CodeSelector
-            numEntries: int = len(btn._selector._btns)
+            numEntries: int = len(btn.getSelector().getShownCodes())
             randBtnInd: int = random.randint(0, numEntries-1)
-            qtbot.mousePress(btn._selector._btns[randBtnInd], QtCore.Qt.MouseButton.LeftButton)
-            expectedDict[lbl.text()] = btn._selector._codes[randBtnInd]
+            clickCode(qtbot, btn.getSelector(), randBtnInd)
+            expectedDict[lbl.text()] = btn.getSelector().getShownCodes()[randBtnInd]
         qtbot.mousePress(codeMapper._btnAccept, QtCore.Qt.MouseButton.LeftButton)
         assert getAssignedDictFunc() == expectedDict
 
-    def failFunc():
+    def failFunc(fname: str):
         raise AssertionError
 
     table: ParticleColumnMapping = ParticleColumnMapping()
-    createDFrameMock: Mock = Mock()
-    createDFrameMock.return_value = pd.DataFrame()
+    exportMock: Mock = Mock()
 
     if os.getcwd().endswith("tests"):
         os.chdir(os.path.dirname(os.getcwd()))
@@ -81,7 +83,7 @@ def test_is_complete(qtbot, tmpdir):
     xlsReader.readXlsFile(r"data\exampledata.xlsx")
     xlsReader.setActiveSheet("p3 unprocessed")
 
-    page: ParticlesPage = ParticlesPage(table, createDFrameMock, xlsReader)
+    page: ParticlesPage = ParticlesPage(table, exportMock, xlsReader)
     page.setupToAvailableColumns()
 
     qtbot.addWidget(page)
@@ -116,9 +118,9 @@ def test_is_complete(qtbot, tmpdir):
         page._getSaveFileName = lambda: resultFileName
         success: bool = page.validatePage()  # i.e., click "Finish"
         assert success
-        createDFrameMock.assert_called_once()
+        exportMock.assert_called_once_with(resultFileName + ".csv")
 
-        page._createDFrameFunc = failFunc
+        page._exportFunc = failFunc
         success: bool = page.validatePage()  # i.e., click "Finish" again
         assert not success
 
@@ -152,3 +154,68 @@ def test_getParticleSize(qtbot, tmpdir):
 
     assert partTable._getSizeCodeOfSize(2000) == DomeCode("5", "mm 1.0-2.79 mm")
     assert partTable._getSizeCodeOfSize(5500) == DomeCode("8", "cm 0.5-0.99 cm")
+
+
+def test_compileParticleColumns():
+    sizes: pd.Series = pd.Series([50, 150.4, 400.902, 1000, 2000, 5500])
+    types: pd.Series = pd.Series(["PE", np.nan, "PP", "PE", np.nan, "PP"])
+    shapes: pd.Series = pd.Series([np.nan, "Fiber", "Fiber", np.nan, "Oval", "Oval"])
+    mapType: Dict[str, DomeCode] = {"PE": DomeCode("PE-Code", "TestCode"), "PP": DomeCode("PP-Code", "TestCode")}
+    mapShape: Dict[str, DomeCode] = {"Fiber": DomeCode("Fiber-Code", "TestCode"), "Oval": DomeCode("Oval-Code", "TestCode")}
+
+    columns: pd.DataFrame = compileParticleColumns(sizes, types=types, shapes=shapes, mapType=mapType, mapShape=mapShape)
+    assert list(columns.columns) == ParticleTable().getPossibleColumns()
+    assert len(columns) == len(sizes)
+
+    for i in range(len(sizes)):
+        partTable: ParticleTable = ParticleTable()
+        partTable.setSize(sizes[i])
+        if type(types[i]) == str:
+            partTable.setPolymType(mapType[types[i]])
+        if type(shapes[i]) == str:
+            partTable.setShape(mapShape[shapes[i]])
+        expected: Dict[str, str] = {colName: "" for colName in partTable.getPossibleColumns()}
+        expected.update(partTable.getCorrectlySetCodes())
+        assert columns.iloc[i].to_dict() == expected
+
+    with pytest.raises(AssertionError):
+        compileParticleColumns(sizes, types=pd.Series(["PE", "PS", "PP", "PE", "PE", "PE"]), mapType=mapType)
+
+
+def test_litterSizeBins():
+    sizeBins = getLitterSizeBins()
+    assert all(sizeBins.lowerEdges[1:] > sizeBins.upperEdges[:-1])  # sorted and non-overlapping
+    sizes: np.ndarray = np.array([5, 100, 150, 1000, 1000.4, 2000, 2795, 5500, np.nan])
+    codes: List[str] = [sizeBins.codes[i].code if i >= 0 else "" for i in sizeBins.classify(sizes)]
+    assert codes == ["30", "30", "31", "35", "35", "5", "", "8", ""]
+
+    with pytest.raises(AssertionError):
+        compileParticleColumns(pd.Series([50, 2795, 150]))
+
+
+def test_columnProfilesInSelector(qtbot):
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))
+
+    table: ParticleColumnMapping = ParticleColumnMapping()
+    xlsReader: XLSReader = XLSReader()
+    xlsReader.readXlsFile(os.path.join("data", "exampledata.xlsx"))
+    xlsReader.setActiveSheet("p3 unprocessed")
+    xlsReader.profileActiveSheet()
+
+    page: ParticlesPage = ParticlesPage(table, Mock(), xlsReader)
+    page.setupToAvailableColumns()
+    qtbot.addWidget(page)
+
+    codes: List[DomeCode] = list(page._btnSize.getSelector()._codes)
+    assert [code.code for code in codes] == xlsReader.getColumnsOfActiveSheet()
+    zoomCode: DomeCode = codes[[code.code for code in codes].index("Zoom")]
+    assert zoomCode.descr == xlsReader.getColumnProfiles()["Zoom"].getSummary()
+    assert not page._btnSize.getSelector()._hideDescriptions
+
+    page._btnSize.getSelector()._emitAndClose(codes[[code.code for code in codes].index("Shape 2D")])
+    assert page._btnSize.text() == "Shape 2D"
+    assert "Shape 2D" in page._lblSizeWarning.text()  # a text column can not be used as size column
+
+    page._btnSize.getSelector()._emitAndClose(zoomCode)
+    assert page._lblSizeWarning.text() == ""
@@ -18,8 +18,15 @@ If not, see <https://www.gnu.org/licenses/>.
 """
 
 
+import os
+import shutil
+import tempfile
 from typing import *
+from dataclasses import FrozenInstanceError
+import pytest
+
 from dataimport import domeCodes as dc
+from dataimport.vocabularyStore import VocabularyStore
 
 
 def test_readLitterSource():
@@ -30,3 +37,48 @@ def test_readLitterSource():
         assert type(code.code) == str
         assert type(code.descr) == str
         assert type(code.long_descr) == str
+
+
+def test_vocabularyRegistry():
+    shipCodes: Tuple[dc.DomeCode, ...] = dc.getShipCode()
+    assert type(shipCodes) == tuple
+    assert dc.getShipCode() is shipCodes  # the file is only read once, all callers share the same codes
+    with pytest.raises(FrozenInstanceError):
+        shipCodes[0].code = "Modified"
+
+    registry: dc.VocabularyRegistry = dc.getVocabularyRegistry()
+    registry.clear()
+    assert dc.getShipCode() is not shipCodes
+    assert dc.getShipCode() == shipCodes
+
+
+def test_vocabularyStore(cacheDir):
+    defaultStore: VocabularyStore = dc.getVocabularyRegistry().getStore()
+    assert defaultStore.getStorePath() == os.path.join(cacheDir, "vocabularies.sqlite")  # not in the home directory
+
+    with tempfile.TemporaryDirectory() as tmpDirName:
+        codeFolder: str = os.path.join(tmpDirName, "codes")
+        shutil.copytree(dc.codeFolder, codeFolder)
+        storePath: str = os.path.join(tmpDirName, "store", "vocabularies.sqlite")
+        store: VocabularyStore = VocabularyStore(codeFolder, storePath)
+        assert store.getCodes("ShipCode.csv") == dc.createCodesFromFile("ShipCode.csv")
+        assert store.getCodes("1382_LTSRC.xlsx") == dc.createCodesFromFile("1382_LTSRC.xlsx")
+        with pytest.raises(AssertionError):
+            store.getCodes("NotExisting.csv")
+
+        assert VocabularyStore(codeFolder, storePath).update() == []  # nothing changed since compiling
+        with open(os.path.join(codeFolder, "Posys.csv"), "a") as fp:
+            fp.write("999,NEWSYS,New positioning system\n")
+        os.remove(os.path.join(codeFolder, "Matrix.csv"))
+        store = VocabularyStore(codeFolder, storePath)
+        assert store.update() == ["Posys.csv"]
+        assert store.getCodes("Posys.csv")[-1] == dc.DomeCode("NEWSYS", "New positioning system")
+        with pytest.raises(AssertionError):
+            store.getCodes("Matrix.csv")
+
+        registry: dc.VocabularyRegistry = dc.VocabularyRegistry(store)
+        assert registry.getCodes("Posys.csv")[-1].code == "NEWSYS"
+        blockingFile: str = os.path.join(tmpDirName, "file")
+        open(blockingFile, "w").close()
+        registry = dc.VocabularyRegistry(VocabularyStore(dc.codeFolder, os.path.join(blockingFile, "store.sqlite")))
+        assert registry.getCodes("Posys.csv") == tuple(dc.createCodesFromFile("Posys.csv"))  # parsed, store unusable
@@ -18,12 +18,20 @@ If not, see <https://www.gnu.org/licenses/>.
 """
 
 
-from typing import List, Set
+from typing import List, Set, Dict
+import numpy as np
 import pandas as pd
 import pytest
 import os
+import shutil
+import tempfile
+import zipfile
 
 from dataimport.readXLS import XLSReader
+from dataimport.sheetCache import SheetCache
+from dataimport.columnProfile import ColumnProfile, profileColumn
+from dataimport.dtypeCompaction import MemoryReport
+from dataimport.sheetEstimate import SheetEstimate
 
 
 def test_read_xls_file():
@@ -54,3 +62,552 @@ def test_read_xls_file():
     uniqueShapes: Set[str] = reader.getUniqueColumnContentsAsString("Shape 2D")
     assert uniqueShapes == {'Irregular', 'Fiber', 'Triangle', 'Oval', 'Rectangle', 'Circular', 'Square', 'Empty'}
 
+
+def test_uniqueColumnContentsWithCounts():
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))
+
+    fname: str = os.path.join("data", "exampledata.xlsx")
+    reader: XLSReader = XLSReader()
+    reader.readXlsFile(fname)
+    reader.setActiveSheet("p3 unprocessed")
+    counts: Dict[str, int] = reader.getUniqueColumnContentsWithCounts("Shape 2D")
+
+    column: pd.Series = pd.read_excel(fname, sheet_name="p3 unprocessed")["Shape 2D"]
+    expectedCounts: Dict[str, int] = column.value_counts().to_dict()
+    expectedCounts["Empty"] = int(column.isna().sum())
+    assert counts == expectedCounts
+    assert list(counts.values()) == sorted(counts.values(), reverse=True)  # most frequent entries first
+
+    counts["Irregular"] = 0  # the returned dictionary is a copy of the cached one
+    assert reader.getUniqueColumnContentsWithCounts("Shape 2D") == expectedCounts
+    assert ("p3 unprocessed", "Shape 2D") in reader._uniqueEntries
+
+    reader.readXlsFile(fname)  # reading a file invalidates the cache
+    assert reader._uniqueEntries == {}
+
+    mixedReader: XLSReader = XLSReader()
+    mixedReader._dataframes = {"mixed": pd.DataFrame({"col": ["a", 1, np.nan, "b", "a", 2.5, None]})}
+    mixedReader._sheetNames = ["mixed"]
+    mixedReader.setActiveSheet("mixed")
+    assert mixedReader.getUniqueColumnContentsWithCounts("col") == {"a": 2, "Empty": 2, "b": 1}
+
+
+def test_lazySheetLoading():
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))
+
+    reader: XLSReader = XLSReader()
+    reader.readXlsFile(os.path.join("data", "exampledata.xlsx"))
+    assert len(reader.getSheetNames()) == 5
+    assert reader._dataframes == {}  # No sheet is parsed before its contents are needed
+
+    reader.setActiveSheet("p3 unprocessed")
+    assert not reader.isSheetLoaded("p3 unprocessed")
+    assert len(reader.getColumnsOfActiveSheet()) == 24  # only the header row is read for that
+    assert not reader.isSheetLoaded("p3 unprocessed")
+    reader.getActiveSheet()
+    assert list(reader._dataframes.keys()) == ["p3 unprocessed"]
+    assert reader.getActiveSheet() is reader.getSheet("p3 unprocessed")  # parsed sheets are cached
+
+    pd.testing.assert_frame_equal(reader.getSheet("P1 info"),
+                                  pd.read_excel(os.path.join("data", "exampledata.xlsx"), sheet_name="P1 info"))
+    assert sorted(reader._dataframes.keys()) == ["P1 info", "p3 unprocessed"]
+
+
+def test_projectedColumnReading():
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))
+
+    testFilePath: str = os.path.join("data", "exampledata.xlsx")
+    fullSheet: pd.DataFrame = pd.read_excel(testFilePath, sheet_name="p3 unprocessed")
+    reader: XLSReader = XLSReader()
+    reader.readXlsFile(testFilePath)
+    reader.setActiveSheet("p3 unprocessed")
+    assert reader.getColumnsOfActiveSheet() == list(fullSheet.columns)
+
+    columns: List[str] = ["Shape 2D", "MajorEllipse µ"]
+    pd.testing.assert_frame_equal(reader.getActiveSheetColumns(columns), fullSheet[columns])
+    assert list(reader._columnFrames["p3 unprocessed"].columns) == ["MajorEllipse µ", "Shape 2D"]
+
+    columns = ["MajorEllipse µ", "Colour", "Chemical ID"]  # only the missing columns are read in addition
+    pd.testing.assert_frame_equal(reader.getActiveSheetColumns(columns), fullSheet[columns])
+    assert len(reader._columnFrames["p3 unprocessed"].columns) == 4
+    assert not reader.isSheetLoaded("p3 unprocessed")
+
+    with pytest.raises(AssertionError):
+        reader.getActiveSheetColumns(["NonExistentColumn"])
+
+
+def test_columnNamesOfHeaderRow():
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))
+
+    testFilePath: str = os.path.join("data", "exampledata.xlsx")
+    reader: XLSReader = XLSReader()
+    reader.readXlsFile(testFilePath)
+    for sheetName in reader.getSheetNames():
+        reader.setActiveSheet(sheetName)
+        expectedColumns: List[str] = list(pd.read_excel(testFilePath, sheet_name=sheetName).columns)
+        assert reader.getColumnsOfActiveSheet() == expectedColumns  # read from the header row only
+        assert not reader.isSheetLoaded(sheetName)
+    reader.setActiveSheet("P1 info")  # The header row has empty cells, also after the last named column
+    assert reader.getColumnsOfActiveSheet()[-1] == "Unnamed: 10"
+
+
+def test_staleSheetDimensions():
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))
+
+    sheet: pd.DataFrame = pd.DataFrame({"Size": [1.5, 2, 3, 4, 5], "Type": list("abcde"), "Colour": list("vwxyz")})
+    with tempfile.TemporaryDirectory() as tmpDirName:
+        workbookName: str = os.path.join(tmpDirName, "staleDimension.xlsx")
+        _writeWorkbookWithStaleDimension(sheet, workbookName)
+        assert pd.read_excel(workbookName, sheet_name="S").shape == sheet.shape
+
+        reader: XLSReader = XLSReader()
+        reader.readXlsFile(workbookName)
+        reader.setActiveSheet("S")
+        assert reader.getColumnsOfActiveSheet() == list(sheet.columns)
+        estimate: SheetEstimate = reader.estimateSheet("S")  # from the size of the sheet xml, not the dimension
+        assert estimate.numColumns == sheet.shape[1]
+        assert 0 < estimate.numRows < 10 * len(sheet) and estimate.seconds > 0
+        assert not reader.isSheetLoaded("S")
+
+        expectedSheet: pd.DataFrame = pd.read_excel(workbookName, sheet_name="S")
+        chunks: List[pd.DataFrame] = list(reader.iterActiveSheetChunks(1000, ["Size", "Type"]))
+        pd.testing.assert_frame_equal(pd.concat(chunks), expectedSheet[["Size", "Type"]])
+        pd.testing.assert_frame_equal(pd.concat(reader.iterActiveSheetChunks(2)), expectedSheet)
+
+        progress: List[int] = []
+        assert reader.loadActiveSheet(lambda numRows: progress.append(numRows) is None, 2)
+        pd.testing.assert_frame_equal(reader.getActiveSheet(), expectedSheet)
+        assert progress == [2, 4, 6]
+
+
+def _writeWorkbookWithStaleDimension(sheet: pd.DataFrame, workbookName: str) -> None:
+    """
+    Writes the sheet to a workbook whose dimension info is a single cell ("A1"), as left by some writers.
+    """
+    completeName: str = workbookName + ".complete.xlsx"
+    sheet.to_excel(completeName, sheet_name="S", index=False)
+    with zipfile.ZipFile(completeName) as source, zipfile.ZipFile(workbookName, "w") as target:
+        for info in source.infolist():
+            content: bytes = source.read(info.filename)
+            if info.filename.startswith("xl/worksheets/"):
+                start: int = content.index(b"<dimension")
+                content = content[:start] + b'<dimension ref="A1"/>' + content[content.index(b"/>", start) + 2:]
+            target.writestr(info, content)
+    os.remove(completeName)
+
+
+def test_sheetCache():
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))
+
+    with tempfile.TemporaryDirectory() as tmpDirName:
+        testFilePath: str = os.path.join(tmpDirName, "exampledata.xlsx")
+        shutil.copy(os.path.join("data", "exampledata.xlsx"), testFilePath)
+        cache: SheetCache = SheetCache(os.path.join(tmpDirName, "cache"))
+        columns: List[str] = ["MajorEllipse µ", "Colour"]
+
+        reader: XLSReader = XLSReader()
+        reader.setSheetCache(cache)
+        reader.readXlsFile(testFilePath)  # The cache is not used by default
+        reader.setActiveSheet("p3 unprocessed")
+        reader.getActiveSheet()
+        assert cache.getSizeMB() == 0
+
+        reader.setUseCache(True)
+        reader.readXlsFile(testFilePath)
+        reader.setActiveSheet("p3 unprocessed")
+        expectedColumns: pd.DataFrame = reader.getActiveSheetColumns(columns)
+        expectedSheet: pd.DataFrame = reader.getSheet("P1 info")
+        assert cache.getSizeMB() > 0
+
+        cachedReader: XLSReader = XLSReader()
+        cachedReader.setSheetCache(cache)
+        cachedReader.setUseCache(True)
+        cachedReader.readXlsFile(testFilePath)
+        assert cachedReader._excelFile is None  # Everything is taken from the cache, without opening the workbook
+        assert cachedReader.getSheetNames() == reader.getSheetNames()
+        cachedReader.setActiveSheet("p3 unprocessed")
+        assert cachedReader.getColumnsOfActiveSheet() == reader.getColumnsOfActiveSheet()
+        pd.testing.assert_frame_equal(cachedReader.getActiveSheetColumns(columns), expectedColumns)
+        pd.testing.assert_frame_equal(cachedReader.getSheet("P1 info"), expectedSheet)
+        assert cachedReader._excelFile is None
+
+        os.utime(testFilePath, (0, 0))  # A changed modification time invalidates the cache entry
+        cachedReader.readXlsFile(testFilePath)
+        assert cachedReader._excelFile is not None
+
+        cache.setMaxSize(cache.getSizeMB() * 0.75)  # the least recently used entry is removed
+        cachedReader.setActiveSheet("p3 unprocessed")
+        cachedReader.getActiveSheetColumns(columns)
+        assert len(cache._getEntryKeys()) == 1
+        assert cache.getSheetNames(SheetCache.getFileKey(testFilePath)) is not None
+
+
+def test_sheetCacheWithCompaction(cacheDir):
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))
+
+    assert XLSReader().getSheetCache().getDirectory() == cacheDir  # the tests do not write into the home directory
+    with tempfile.TemporaryDirectory() as tmpDirName:
+        testFilePath: str = os.path.join(tmpDirName, "exampledata.xlsx")
+        shutil.copy(os.path.join("data", "exampledata.xlsx"), testFilePath)
+        cache: SheetCache = SheetCache(os.path.join(tmpDirName, "cache"))
+        sheets: Dict[bool, pd.DataFrame] = {}
+        for compact in [True, False]:
+            reader: XLSReader = XLSReader()
+            reader.setSheetCache(cache)
+            reader.setUseCache(True)
+            reader.setCompactSheets(compact)
+            reader.readXlsFile(testFilePath)
+            sheets[compact] = reader.getSheet("p3 unprocessed")
+        assert sheets[True]["Colour"].dtype == "category"
+        pd.testing.assert_frame_equal(sheets[False], pd.read_excel(testFilePath, sheet_name="p3 unprocessed"))
+
+        reader.setCompactSheets(True)  # Changing the compaction of an open file switches to the according entry
+        pd.testing.assert_frame_equal(reader.getSheet("p3 unprocessed"), sheets[False])  # the sheet is in memory
+        assert reader._excelFile is not None
+        reader.readXlsFile(testFilePath)
+        assert reader._excelFile is None  # taken from the cache
+        pd.testing.assert_frame_equal(reader.getSheet("p3 unprocessed"), sheets[True])
+
+
+def test_readTextFiles():
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))
+
+    sheet: pd.DataFrame = pd.read_excel(os.path.join("data", "exampledata.xlsx"), sheet_name="p3 unprocessed")
+    columns: List[str] = ["MajorEllipse µ", "Colour", "Shape 2D"]
+    with tempfile.TemporaryDirectory() as tmpDirName:
+        csvFileName: str = os.path.join(tmpDirName, "particles.csv")
+        sheet.to_csv(csvFileName, sep=";", index=False, encoding="latin-1")
+        tsvFileName: str = os.path.join(tmpDirName, "particles.tsv")
+        sheet.to_csv(tsvFileName, sep="\t", index=False)
+
+        for fname in [csvFileName, tsvFileName]:
+            reader: XLSReader = XLSReader()
+            reader.readXlsFile(fname)
+            assert reader.getSheetNames() == ["particles"]
+            reader.setActiveSheet("particles")
+            assert reader.getColumnsOfActiveSheet() == list(sheet.columns)
+            pd.testing.assert_frame_equal(reader.getActiveSheetColumns(columns), sheet[columns])
+
+            reader = XLSReader()
+            reader.readXlsFile(fname)
+            reader.setActiveSheet("particles")
+            chunks: List[pd.DataFrame] = list(reader.iterActiveSheetChunks(50, columns))
+            assert [len(chunk) for chunk in chunks] == [50, 50, 33]
+            pd.testing.assert_frame_equal(pd.concat(chunks), sheet[columns])
+            pd.testing.assert_frame_equal(reader.getActiveSheet(), sheet)
+            assert reader.getUniqueColumnContentsAsString("Shape 2D") == {'Irregular', 'Fiber', 'Triangle', 'Oval',
+                                                                          'Rectangle', 'Circular', 'Square', 'Empty'}
+
+
+def test_readColumnarFiles():
+    pytest.importorskip("pyarrow")
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))
+
+    sheet: pd.DataFrame = pd.read_excel(os.path.join("data", "exampledata.xlsx"), sheet_name="p3 unprocessed")
+    sheet = sheet.astype({col: str for col in sheet.columns if sheet[col].dtype == object})
+    with tempfile.TemporaryDirectory() as tmpDirName:
+        parquetFileName: str = os.path.join(tmpDirName, "particles.parquet")
+        sheet.to_parquet(parquetFileName)
+        featherFileName: str = os.path.join(tmpDirName, "particles.feather")
+        sheet.to_feather(featherFileName)
+        for fname in [parquetFileName, featherFileName]:
+            reader: XLSReader = XLSReader()
+            reader.readXlsFile(fname)
+            reader.setActiveSheet("particles")
+            assert reader.getColumnsOfActiveSheet() == list(sheet.columns)
+            pd.testing.assert_frame_equal(reader.getActiveSheetColumns(["Colour"]), sheet[["Colour"]])
+            assert sum(len(chunk) for chunk in reader.iterActiveSheetChunks(50, ["Colour"])) == len(sheet)
+
+
+def test_estimateColumnarFiles():
+    pytest.importorskip("pyarrow")
+    sheet: pd.DataFrame = pd.DataFrame({"Size": np.arange(1000) * 1.5, "Colour": ["Red", "Blue"] * 500})
+    with tempfile.TemporaryDirectory() as tmpDirName:
+        fileNames: List[str] = [os.path.join(tmpDirName, "particles.parquet")]
+        sheet.to_parquet(fileNames[0])
+        for compression in ["uncompressed", "lz4", "zstd"]:
+            fileNames.append(os.path.join(tmpDirName, f"{compression}.feather"))
+            sheet.to_feather(fileNames[-1], compression=compression, chunksize=300)  # in several record batches
+        for fname in fileNames:
+            reader: XLSReader = XLSReader()
+            reader.readXlsFile(fname)
+            sheetName: str = reader.getSheetNames()[0]
+            estimate: SheetEstimate = reader.estimateSheet(sheetName)
+            assert (estimate.numRows, estimate.numColumns) == (1000, 2)
+            assert not estimate.inMemory and not reader.isSheetLoaded(sheetName)
+
+
+def test_iterActiveSheetChunks():
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))
+
+    testFilePath: str = os.path.join("data", "exampledata.xlsx")
+    reader: XLSReader = XLSReader()
+    reader.readXlsFile(testFilePath)
+    reader.setActiveSheet("p3 unprocessed")
+    fullSheet: pd.DataFrame = reader.getActiveSheet()
+    columns: List[str] = ["MajorEllipse µ", "Colour", "Shape 2D", "Chemical ID"]
+
+    chunks: List[pd.DataFrame] = list(reader.iterActiveSheetChunks(50, columns))
+    assert [len(chunk) for chunk in chunks] == [50, 50, 33]
+    pd.testing.assert_frame_equal(pd.concat(chunks), fullSheet[columns])
+
+    reader._dataframes = {}  # i.e., the sheet is not in memory and has to be streamed from the file.
+    chunks = list(reader.iterActiveSheetChunks(50, columns))
+    assert [len(chunk) for chunk in chunks] == [50, 50, 33]
+    pd.testing.assert_frame_equal(pd.concat(chunks), fullSheet[columns])
+
+    for sheetName in reader.getSheetNames():  # Streamed sheets equal the sheets read by pandas
+        expectedSheet: pd.DataFrame = pd.read_excel(testFilePath, sheet_name=sheetName)
+        reader.setActiveSheet(sheetName)
+        reader._dataframes = {}
+        pd.testing.assert_frame_equal(pd.concat(reader.iterActiveSheetChunks(20)), expectedSheet)
+
+
+def test_readDataFrame():
+    sheet: pd.DataFrame = pd.DataFrame({"Size": [10.5, 20.0, 30.0], "Colour": ["Red", "Blue", "Red"]})
+    reader: XLSReader = XLSReader()
+    reader.setCompactSheets(True)
+    reader.readDataFrame(sheet, "Particles")
+    assert reader.getSheetNames() == ["Particles"]
+    assert reader.isSheetLoaded("Particles")
+    reader.setActiveSheet("Particles")
+    assert reader.getColumnsOfActiveSheet() == ["Size", "Colour"]
+    assert reader.getMemoryReport("Particles") is not None  # compacted like a parsed sheet
+    assert reader.getUniqueColumnContentsWithCounts("Colour") == {"Red": 2, "Blue": 1}
+    chunks: List[pd.DataFrame] = list(reader.iterActiveSheetChunks(2, ["Size"]))
+    pd.testing.assert_frame_equal(pd.concat(chunks), sheet[["Size"]], check_dtype=False)
+
+
+def test_profileActiveSheet():
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))
+
+    reader: XLSReader = XLSReader()
+    reader.readXlsFile(os.path.join("data", "exampledata.xlsx"))
+    reader.setActiveSheet("p3 unprocessed")
+    assert reader.getColumnProfiles() == {}
+
+    profiles: Dict[str, ColumnProfile] = reader.profileActiveSheet()
+    assert list(profiles.keys()) == reader.getColumnsOfActiveSheet()
+    assert reader.getColumnProfiles() is profiles
+
+    zoom: ColumnProfile = profiles["Zoom"]
+    assert zoom.kind == "numeric" and zoom.isNumeric()
+    assert (zoom.numRows, zoom.numEmpty, zoom.numDistinct) == (133, 0, 10)
+    assert (zoom.minimum, zoom.maximum) == (2, 16)
+    assert zoom.topEntries[0] == ("16.0", 36)
+
+    shape: ColumnProfile = profiles["Shape 2D"]
+    assert shape.kind == "text" and not shape.isNumeric()
+    assert (shape.numEmpty, shape.numDistinct, shape.minimum) == (55, 7, None)
+    assert shape.topEntries[0] == ("Irregular", 24)
+    assert profiles["Stored"].topEntries == ()  # unique entries are not listed
+    assert profiles["Particle #"].kind == "empty"
+
+    mixed: ColumnProfile = profileColumn("mixed", pd.Series([1, "n/a", 2.5, np.nan, "n/a", False]))
+    assert mixed.kind == "mixed" and not mixed.isNumeric()
+    assert (mixed.numNumeric, mixed.minimum, mixed.maximum) == (2, 1.0, 2.5)
+    assert mixed.topEntries[0] == ("n/a", 2)
+
+    reader.readXlsFile(os.path.join("data", "exampledata.xlsx"))
+    assert reader._columnProfiles == {}
+
+
+def test_compactSheets():
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))
+
+    fname: str = os.path.join("data", "exampledata.xlsx")
+    sheet: pd.DataFrame = pd.read_excel(fname, sheet_name="p3 unprocessed")
+    reader: XLSReader = XLSReader()
+    reader.setCompactSheets(True)
+    reader.readXlsFile(fname)
+    reader.setActiveSheet("p3 unprocessed")
+    colour: pd.DataFrame = reader.getActiveSheetColumns(["Colour"])
+    assert colour["Colour"].dtype == "category"
+    partialReport: MemoryReport = reader.getMemoryReport("p3 unprocessed")
+    assert partialReport.bytesAfter < partialReport.bytesBefore
+
+    compacted: pd.DataFrame = reader.getActiveSheet()
+    report: MemoryReport = reader.getMemoryReport("p3 unprocessed")
+    assert report.bytesBefore == sheet.memory_usage(deep=True).sum()
+    assert report.bytesAfter == compacted.memory_usage(deep=True).sum()
+    assert report.bytesAfter < 0.6 * report.bytesBefore
+    assert compacted["Shape 2D"].dtype == "category"
+    assert compacted["Stored"].dtype == object  # unique labels are not made categorical
+    assert compacted["FeretX"].dtype == np.int16
+    assert compacted["Area µ"].dtype == np.float64  # not representable in float32 without loss
+    pd.testing.assert_frame_equal(compacted, sheet, check_dtype=False, check_categorical=False)
+    assert reader.getUniqueColumnContentsAsString("Shape 2D") == {'Irregular', 'Fiber', 'Triangle', 'Oval',
+                                                                  'Rectangle', 'Circular', 'Square', 'Empty'}
+    assert reader.profileActiveSheet()["Shape 2D"].kind == "text"
+
+    uncompactedReader: XLSReader = XLSReader()
+    uncompactedReader.readXlsFile(fname)
+    uncompactedReader.setActiveSheet("p3 unprocessed")
+    pd.testing.assert_frame_equal(uncompactedReader.getActiveSheet(), sheet)
+    assert uncompactedReader.getMemoryReport("p3 unprocessed") is None
+
+
+def test_boundedSheetMemory():
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))
+
+    fname: str = os.path.join("data", "exampledata.xlsx")
+    reader: XLSReader = XLSReader()
+    reader.readXlsFile(fname)
+    sheetNames: List[str] = reader.getSheetNames()
+    sheets: Dict[str, pd.DataFrame] = {name: reader.getSheet(name) for name in sheetNames}
+    sheetSizes: Dict[str, float] = {name: sheet.memory_usage(deep=True).sum() / 1024**2
+                                    for name, sheet in sheets.items()}
+    assert reader.getMemoryUsageMB() == pytest.approx(sum(sheetSizes.values()))
+
+    reader.setActiveSheet("p3 unprocessed")
+    reader.setMaxMemory(sheetSizes["p3 unprocessed"] / 2)  # only the active sheet is kept
+    assert list(reader._dataframes.keys()) == ["p3 unprocessed"]
+    assert reader.getMemoryUsageMB() == pytest.approx(sheetSizes["p3 unprocessed"])
+    assert sorted(reader._spilledSheets.keys()) == sorted(set(sheetNames) - {"p3 unprocessed"})
+    pd.testing.assert_frame_equal(reader.getSheet("P1 info"), sheets["P1 info"])
+    assert list(reader._dataframes.keys()) == ["p3 unprocessed"]  # restored from the spill file and evicted again
+
+    reader.setMaxMemory(sheetSizes["p3 unprocessed"] + sheetSizes["P1 info"] + sheetSizes["P1 results"])
+    pd.testing.assert_frame_equal(reader.getSheet("P1 info"), sheets["P1 info"])  # restored from the spill file
+    pd.testing.assert_frame_equal(reader.getSheet("P1 results"), sheets["P1 results"])
+    assert list(reader._dataframes.keys()) == ["p3 unprocessed", "P1 info", "P1 results"]
+
+    reader.getSheet("P1 info")  # now P1 results is least recently used after the active sheet
+    reader.getSheet("G1 info max")
+    assert "P1 results" not in reader._dataframes.keys()
+    assert reader.isSheetLoaded("p3 unprocessed") and reader.isSheetLoaded("G1 info max")
+    assert reader.getMemoryUsageMB() <= reader.getMaxMemory()
+
+    reader.setActiveSheet("G1 info max")
+    reader.setMaxMemory(sheetSizes["G1 info max"])
+    assert list(reader._dataframes.keys()) == ["G1 info max"]  # the formerly active sheet is evicted, too
+    reader.setActiveSheet("p3 unprocessed")
+    pd.testing.assert_frame_equal(reader.getActiveSheetColumns(["Colour"]), sheets["p3 unprocessed"][["Colour"]])
+
+    spillDir: str = reader._spillDir.name
+    reader.readXlsFile(fname)
+    assert not os.path.exists(spillDir)
+    assert reader._spilledSheets == {}
+
+
+def test_mergeSheetsAndFiles():
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))
+
+    sheet: pd.DataFrame = pd.read_excel(os.path.join("data", "exampledata.xlsx"), sheet_name="p3 unprocessed")
+    filters: List[pd.DataFrame] = [sheet.iloc[:50], sheet.iloc[50:90], sheet.iloc[90:]]
+    columns: List[str] = ["MajorEllipse µ", "Colour", XLSReader.sourceColumnName]
+    with tempfile.TemporaryDirectory() as tmpDirName:
+        workbookName: str = os.path.join(tmpDirName, "sample.xlsx")
+        with pd.ExcelWriter(workbookName) as writer:
+            for i, filterSheet in enumerate(filters):
+                filterSheet.to_excel(writer, sheet_name=f"Filter {i+1}", index=False)
+            sheet[["Colour", "Shape 2D"]].to_excel(writer, sheet_name="Other", index=False)
+
+        reader: XLSReader = XLSReader()
+        reader.readXlsFile(workbookName)
+        reader.setActiveSheets(["Filter 1", "Filter 2", "Filter 3"])
+        assert reader.getActiveSheetNames() == ["Filter 1", "Filter 2", "Filter 3"]
+        assert reader.getColumnsOfActiveSheet() == list(sheet.columns) + [XLSReader.sourceColumnName]
+        merged: pd.DataFrame = reader.getActiveSheetColumns(columns)
+        pd.testing.assert_frame_equal(merged[columns[:2]], sheet[columns[:2]])
+        assert list(merged[XLSReader.sourceColumnName]) == ["Filter 1"] * 50 + ["Filter 2"] * 40 + ["Filter 3"] * 43
+
+        reader = XLSReader()
+        reader.readXlsFile(workbookName)
+        reader.setActiveSheets(["Filter 1", "Filter 2", "Filter 3"])
+        chunks: List[pd.DataFrame] = list(reader.iterActiveSheetChunks(30, columns))
+        assert [len(chunk) for chunk in chunks] == [30, 20, 30, 10, 30, 13]  # streamed chunks do not span sheets
+        pd.testing.assert_frame_equal(pd.concat(chunks), merged, check_categorical=False)
+
+        reader = XLSReader()
+        reader.readXlsFile(workbookName)
+        reader.setActiveSheets(["Filter 1", "Filter 2", "Filter 3"])
+        progress: List[int] = []
+        assert reader.loadActiveSheet(lambda numRows: progress.append(numRows) or True, progressInterval=10)
+        assert max(progress) > 90  # rows are counted across the merged sheets
+        pd.testing.assert_frame_equal(reader.getActiveSheet().drop(columns=XLSReader.sourceColumnName), sheet)
+
+        with pytest.raises(AssertionError):
+            reader.setActiveSheets(["Filter 1", "Other"])  # different columns
+        reader.setActiveSheets(["Filter 2"])
+        assert reader.getActiveSheetName() == "Filter 2"
+
+        csvNames: List[str] = []
+        for i, filterSheet in enumerate(filters):
+            csvNames.append(os.path.join(tmpDirName, f"filter{i+1}.csv"))
+            filterSheet.to_csv(csvNames[-1], index=False)
+        reader = XLSReader()
+        reader.readXlsFiles(csvNames)
+        assert reader.getFileNames() == csvNames
+        reader.setActiveSheets(reader.getSheetNames())
+        assert reader.getActiveSheetNames() == ["filter1"]
+        merged = reader.getActiveSheet()
+        pd.testing.assert_frame_equal(merged[list(sheet.columns)], sheet)
+        assert merged[XLSReader.sourceColumnName].iloc[-1] == "filter3.csv: filter3"
+
+
+def test_estimateSheets():
+    if os.getcwd().endswith("tests"):
+        os.chdir(os.path.dirname(os.getcwd()))
+
+    sheet: pd.DataFrame = pd.read_excel(os.path.join("data", "exampledata.xlsx"), sheet_name="p3 unprocessed")
+    reader: XLSReader = XLSReader()
+    reader.readXlsFile(os.path.join("data", "exampledata.xlsx"))
+    estimate: SheetEstimate = reader.estimateSheet("p3 unprocessed")
+    assert (estimate.numRows, estimate.numColumns) == sheet.shape
+    assert estimate.seconds > 0 and estimate.megaBytes > 0
+    assert not estimate.inMemory and not estimate.isLarge()
+    assert not reader.isSheetLoaded("p3 unprocessed")  # estimated from the dimension info, without parsing
+
+    reader.setActiveSheet("p3 unprocessed")
+    reader.loadActiveSheet()
+    loadedEstimate: SheetEstimate = reader.estimateSheet("p3 unprocessed")
+    assert loadedEstimate.inMemory and loadedEstimate.seconds == 0
+    assert (loadedEstimate.numRows, loadedEstimate.numColumns) == sheet.shape
+
+    with tempfile.TemporaryDirectory() as tmpDirName:
+        workbookName: str = os.path.join(tmpDirName, "sample.xlsx")
+        with pd.ExcelWriter(workbookName) as writer:
+            sheet.iloc[:50].to_excel(writer, sheet_name="Filter 1", index=False)
+            sheet.iloc[50:].to_excel(writer, sheet_name="Filter 2", index=False)
+        reader = XLSReader()
+        reader.readXlsFile(workbookName)
+        merged: SheetEstimate = reader.estimateSheets(["Filter 1", "Filter 2"])
+        assert (merged.numRows, merged.numColumns) == sheet.shape
+        reader.setActiveSheets(["Filter 1", "Filter 2"])
+        assert reader.estimateSheet(reader.getActiveSheetName()) == merged
+
+        # Without dimension info, the number of rows is estimated from the size of the sheet xml
+        strippedName: str = os.path.join(tmpDirName, "noDimension.xlsx")
+        with zipfile.ZipFile(workbookName) as source, zipfile.ZipFile(strippedName, "w") as target:
+            for info in source.infolist():
+                content: bytes = source.read(info.filename)
+                if info.filename.startswith("xl/worksheets/"):
+                    start: int = content.index(b"<dimension")
+                    content = content[:start] + content[content.index(b"/>", start) + 2:]
+                target.writestr(info, content)
+        reader.readXlsFile(strippedName)
+        estimate = reader.estimateSheet("Filter 2")
+        assert estimate.numColumns == sheet.shape[1]
+        assert 0 < estimate.numRows < 10 * (len(sheet) - 50)
+
+        csvName: str = os.path.join(tmpDirName, "particles.csv")
+        pd.concat([sheet] * 100).to_csv(csvName, index=False)
+        reader.readXlsFile(csvName)
+        estimate = reader.estimateSheet("particles")
+        assert estimate.numColumns == sheet.shape[1]
+        assert 0.8 * 100 * len(sheet) < estimate.numRows < 1.2 * 100 * len(sheet)